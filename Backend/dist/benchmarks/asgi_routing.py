@@ -0,0 +1,73 @@
+"""
+Throughput of the top-level ASGI dispatcher in edustream/asgi.py.
+
+The Django, Channels, Socket.IO and metrics sub-apps are replaced with no-op
+stubs, so the number measured is the cost of routing plus whatever logging the
+router does under the active LOGGING configuration.
+
+    cd Backend/dist
+    python benchmarks/asgi_routing.py --requests 200000 2>/dev/null
+
+stderr is discarded so console logging costs what it would writing to a pipe.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'edustream.settings')
+
+from edustream import asgi  # noqa: E402
+
+# Traffic mix: mostly REST calls, some Socket.IO polling and WebSocket upgrades
+SCOPES = (
+    [{'type': 'http', 'path': f'/api/courses/{i}/'} for i in range(7)]
+    + [{'type': 'http', 'path': '/socket.io/'}] * 2
+    + [{'type': 'websocket', 'path': '/socket.io/'}]
+)
+
+
+async def stub_app(scope, receive, send):
+    return None
+
+
+def stub_sub_apps():
+    """Points every sub-app the dispatcher can reach at ``stub_app``."""
+    if hasattr(asgi.application, 'routes'):
+        asgi.application.routes = {
+            scope_type: ([(prefix, stub_app) for prefix, _ in prefixes], stub_app)
+            for scope_type, (prefixes, _) in asgi.application.routes.items()
+        }
+    else:
+        # Plain application function of commits before the PrefixRouter, for comparison
+        for name in ('django_asgi_app', 'socketio_app', 'channels_app', 'metrics_app'):
+            setattr(asgi, name, stub_app)
+
+
+async def run(total):
+    app = asgi.application
+    scopes = SCOPES
+    count = len(scopes)
+    start = time.perf_counter()
+    for i in range(total):
+        await app(scopes[i % count], None, None)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    stub_sub_apps()
+    best = min(asyncio.run(run(args.requests)) for _ in range(args.rounds))
+    print(f"{args.requests} dispatches, best of {args.rounds}: {best:.3f}s "
+          f"({args.requests / best:,.0f} dispatches/s, {best / args.requests * 1e6:.2f} us each)")
+
+
+if __name__ == '__main__':
+    main()
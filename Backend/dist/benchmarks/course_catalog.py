@@ -0,0 +1,91 @@
+"""
+Course catalog serialization: time and queries for CourseSerializer(many=True).
+
+Builds ``--courses`` active courses, each with a weekday and a weekend batch
+spanning ``--days`` days of sessions, then serializes the catalog the way
+CourseListView does (admin view, so every batch is included).
+
+    cd Backend/dist
+    DJANGO_SETTINGS_MODULE=benchmarks.settings python benchmarks/course_catalog.py 2>/dev/null
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from edu_platform.models import ClassSchedule, ClassSession, Course, CoursePricing, User  # noqa: E402
+from edu_platform.serializers.course_serializers import CourseSerializer, schedule_summary_prefetch  # noqa: E402
+from edu_platform.utility.schedule_summary import refresh_schedule_summary  # noqa: E402
+
+BATCH_DAYS = {
+    'weekdays': {0, 1, 2, 3, 4},
+    'weekends': {5, 6},
+}
+
+
+def build_catalog(courses, days):
+    teacher = User.objects.create_user(
+        email='catalog@example.com', username='catalog', password='bench', role='teacher'
+    )
+    start = date.today() + timedelta(days=7)
+    for i in range(courses):
+        course = Course.objects.create(
+            name=f'Course {i}', description='Benchmark course', category=f'cat{i % 5}', base_price=100
+        )
+        CoursePricing.objects.create(course=course, original_price=100, discount_percent=10, final_price=90)
+        for batch, weekdays in BATCH_DAYS.items():
+            schedule = ClassSchedule.objects.create(
+                course=course, teacher=teacher, batch=batch,
+                batch_start_date=start, batch_end_date=start + timedelta(days=days - 1)
+            )
+            sessions = []
+            for offset in range(days):
+                session_date = start + timedelta(days=offset)
+                if session_date.weekday() in weekdays:
+                    sessions.append(ClassSession(
+                        schedule=schedule,
+                        teacher=teacher,
+                        session_date=session_date,
+                        start_time=timezone.make_aware(datetime.combine(session_date, dt_time(9))),
+                        end_time=timezone.make_aware(datetime.combine(session_date, dt_time(10, 30))),
+                    ))
+            # bulk_create skips the signals, so summarize once per schedule
+            ClassSession.objects.bulk_create(sessions)
+            refresh_schedule_summary(schedule.id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--courses', type=int, default=50)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0, keepdb=False)
+    build_catalog(args.courses, args.days)
+
+    queryset = Course.objects.filter(is_active=True).select_related('current_pricing').prefetch_related(schedule_summary_prefetch())
+    with CaptureQueriesContext(connection) as queries:
+        CourseSerializer(queryset.all(), many=True, context={}).data
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        CourseSerializer(queryset.all(), many=True, context={}).data
+    elapsed = (time.perf_counter() - start) / args.repeat
+    print(f"{args.courses} courses x 2 batches x {args.days} days: "
+          f"{elapsed * 1000:.1f} ms per listing, {len(queries)} queries")
+
+
+if __name__ == '__main__':
+    main()
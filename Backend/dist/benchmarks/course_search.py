@@ -0,0 +1,119 @@
+"""
+Course search latency: icontains versus full-text search with ranking.
+
+Seeds ``--courses`` courses into a PostgreSQL test database (the search
+vector, its GIN index and the trigram index come from the migrations), then
+times each query in a fixed set of searches both ways and prints the plan
+PostgreSQL chose for the first one. Needs the PostgreSQL settings
+(edustream.settings) and a user allowed to create databases and the pg_trgm
+extension.
+
+    cd Backend/dist
+    DJANGO_SETTINGS_MODULE=edustream.settings python benchmarks/course_search.py 2>/dev/null
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'edustream.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from edu_platform.models import Course  # noqa: E402
+from edu_platform.utility.course_search import search_courses  # noqa: E402
+
+SUBJECTS = [
+    'python', 'javascript', 'statistics', 'algebra', 'calculus', 'physics', 'chemistry', 'biology',
+    'history', 'economics', 'marketing', 'design', 'photography', 'music', 'spanish', 'french',
+    'databases', 'networking', 'security', 'robotics', 'astronomy', 'accounting', 'writing', 'drawing',
+]
+WORDS = [
+    'introduction', 'advanced', 'practical', 'foundations', 'projects', 'analysis', 'theory', 'workshop',
+    'beginners', 'masterclass', 'applied', 'modern', 'complete', 'essentials', 'bootcamp', 'guide',
+    'learn', 'build', 'understand', 'explore', 'hands', 'exercises', 'weekly', 'assignments', 'quizzes',
+]
+SEARCHES = ['python', 'pyth', 'machine learning', 'statistcs', 'intro algebra', 'web design', 'zzzz']
+CATEGORIES = ['programming', 'science', 'mathematics', 'business', 'arts', 'languages']
+
+
+def seed(count, batch_size=5000):
+    rng = random.Random(42)
+    for start in range(0, count, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, count)):
+            subject = rng.choice(SUBJECTS)
+            name = f"{rng.choice(WORDS).title()} {subject.title()} {rng.choice(WORDS)} {i}"
+            description = ' '.join(rng.choice(WORDS + SUBJECTS) for _ in range(60))
+            batch.append(Course(
+                name=name, slug=f'course-{i}', description=description,
+                category=rng.choice(CATEGORIES), base_price=100,
+            ))
+        # The trigger fills search_vector for bulk inserts as well
+        Course.objects.bulk_create(batch)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE courses")
+
+
+def icontains(queryset, search):
+    return queryset.filter(
+        Q(name__icontains=search) | Q(description__icontains=search) | Q(category__icontains=search)
+    )
+
+
+def timed(build, search, limit, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(build(Course.objects.filter(is_active=True).defer('search_vector'), search)[:limit])
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def plan(build, search):
+    queryset = build(Course.objects.filter(is_active=True), search)[:50]
+    return queryset.explain().splitlines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--courses', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit("This benchmark needs PostgreSQL (run it with edustream.settings).")
+
+    database_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=False)
+    try:
+        start = time.perf_counter()
+        seed(args.courses)
+        print(f"Seeded {args.courses} courses in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'search':<18}{'icontains ms':>14}{'fts ms':>10}{'fts hits':>10}")
+        for search in SEARCHES:
+            slow = timed(icontains, search, args.limit, args.repeat)
+            fast = timed(search_courses, search, args.limit, args.repeat)
+            hits = search_courses(Course.objects.all(), search).count()
+            print(f"{search:<18}{slow:>14.1f}{fast:>10.1f}{hits:>10}")
+
+        for name, build in (('icontains', icontains), ('fts', search_courses)):
+            print(f"\nPlan ({name}, '{SEARCHES[0]}'):")
+            for line in plan(build, SEARCHES[0])[:8]:
+                print(f"  {line}")
+    finally:
+        connection.creation.destroy_test_db(database_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
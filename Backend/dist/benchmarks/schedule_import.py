@@ -0,0 +1,122 @@
+"""
+Schedule import: one ClassScheduleView-style create per batch versus import_schedules().
+
+Writes a workbook with ``--batches`` rows (a weekday batch of ``--days`` days
+per course, each course with its own teacher), imports it with the bulk
+importer and, for comparison, creates the same batches one at a time through
+ClassScheduleSerializer as the schedule POST does. Prints the time and
+queries of each.
+
+    cd Backend/dist
+    DJANGO_SETTINGS_MODULE=benchmarks.settings python benchmarks/schedule_import.py 2>/dev/null
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from openpyxl import Workbook  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from edu_platform.models import ClassSession, Course, User  # noqa: E402
+from edu_platform.serializers.class_serializers import ClassScheduleSerializer  # noqa: E402
+from edu_platform.utility.schedule_import import import_schedules  # noqa: E402
+
+HEADER = ['course_id', 'teacher_email', 'batch', 'start_date', 'end_date', 'days', 'start_time', 'end_time']
+
+
+def make_batches(label, count, days):
+    start = date.today() + timedelta(days=7)
+    end = start + timedelta(days=days - 1)
+    courses = [
+        Course.objects.create(name=f'{label} {i}', description='Benchmark course', category='bench', base_price=100)
+        for i in range(count)
+    ]
+    # bulk_create skips password hashing, which would dominate the setup
+    teachers = [User(email=f'{label}-{i}@example.com', username=f'{label}-{i}', role='teacher') for i in range(count)]
+    for teacher in teachers:
+        teacher.set_unusable_password()
+    User.objects.bulk_create(teachers)
+    return [
+        [course.id, teacher.email, 'weekdays', start, end, 'Monday, Wednesday, Friday', '9:00 AM', '10:30 AM']
+        for course, teacher in zip(courses, teachers)
+    ]
+
+
+def workbook(rows):
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet()
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    data = io.BytesIO()
+    book.save(data)
+    data.seek(0)
+    return data
+
+
+def one_by_one(rows, admin):
+    request = APIRequestFactory().post('/api/classes/schedules/')
+    request.user = admin
+    for course_id, email, batch, start, end, days, start_time, end_time in rows:
+        serializer = ClassScheduleSerializer(data={
+            'course_id': course_id, 'teacher_id': User.objects.get(email=email).id, 'batch': batch,
+            'weekdays_start_date': start, 'weekdays_end_date': end,
+            'weekdays_days': [day.strip() for day in days.split(',')], 'weekdays_start': start_time, 'weekdays_end': end_time,
+        }, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+
+def measure(label, run):
+    # Counted with a wrapper: CaptureQueriesContext stops at the 9000 queries Django keeps
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    before = ClassSession.objects.count()
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+    sessions = ClassSession.objects.count() - before
+    print(f"{label:>12}: {sessions} sessions, {elapsed * 1000:.1f} ms, {queries} queries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--batches', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=120)
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0, keepdb=False)
+    admin = User.objects.create_user(email='import@example.com', username='import', password='bench', role='admin')
+
+    rows = make_batches('serializer', args.batches, args.days)
+    measure('serializer', lambda: one_by_one(rows, admin))
+
+    data = workbook(make_batches('import', args.batches, args.days))
+
+    def run_import():
+        result = import_schedules(data, 'schedules.xlsx')
+        if result['errors']:
+            raise SystemExit(result['errors'][:5])
+
+    measure('import', run_import)
+
+
+if __name__ == '__main__':
+    main()
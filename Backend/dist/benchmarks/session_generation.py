@@ -0,0 +1,101 @@
+"""
+Session generation: day-by-day ClassSession.objects.create versus create_sessions().
+
+For ``--batches`` schedules, creates a weekday batch (Monday to Friday) and a
+weekend batch (Saturday and Sunday, separate timings) spanning ``--days``
+days, first with the per-day loop the schedule serializers used to run and
+then with the bulk generator, and prints the time and queries of each.
+
+    cd Backend/dist
+    DJANGO_SETTINGS_MODULE=benchmarks.settings python benchmarks/session_generation.py 2>/dev/null
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from edu_platform.models import ClassSchedule, ClassSession, Course, User  # noqa: E402
+from edu_platform.utility.schedule_summary import deferred_schedule_summaries  # noqa: E402
+from edu_platform.utility.session_generator import create_sessions  # noqa: E402
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+
+def batch_rules(start, end):
+    return {
+        'weekdays': [
+            {'start_date': start, 'end_date': end, 'days': WEEKDAYS, 'start_time': dt_time(9), 'end_time': dt_time(10, 30)},
+        ],
+        'weekends': [
+            {'start_date': start, 'end_date': end, 'days': ['Saturday'], 'start_time': dt_time(10), 'end_time': dt_time(12)},
+            {'start_date': start, 'end_date': end, 'days': ['Sunday'], 'start_time': dt_time(14), 'end_time': dt_time(16)},
+        ],
+    }
+
+
+def create_day_by_day(schedule, rules):
+    """The loop the serializers ran before create_sessions()."""
+    for rule in rules:
+        current_date = rule['start_date']
+        while current_date <= rule['end_date']:
+            if current_date.strftime('%A') in rule['days']:
+                ClassSession.objects.create(
+                    schedule=schedule,
+                    session_date=current_date,
+                    start_time=timezone.make_aware(datetime.combine(current_date, rule['start_time'])),
+                    end_time=timezone.make_aware(datetime.combine(current_date, rule['end_time'])),
+                )
+            current_date += timedelta(days=1)
+
+
+def run(label, create, teacher, batches, days):
+    start = date.today() + timedelta(days=7)
+    end = start + timedelta(days=days - 1)
+    schedules = []
+    for i in range(batches):
+        course = Course.objects.create(name=f'{label} {i}', description='Benchmark course', category='bench', base_price=100)
+        for batch in ('weekdays', 'weekends'):
+            schedules.append(ClassSchedule.objects.create(
+                course=course, teacher=teacher, batch=batch, batch_start_date=start, batch_end_date=end
+            ))
+    rules = batch_rules(start, end)
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        with deferred_schedule_summaries():
+            for schedule in schedules:
+                create(schedule, rules[schedule.batch])
+        elapsed = time.perf_counter() - started
+    sessions = ClassSession.objects.filter(schedule__in=schedules).count()
+    print(f"{label:>12}: {len(schedules)} schedules, {sessions} sessions, "
+          f"{elapsed * 1000:.1f} ms ({elapsed * 1000 / len(schedules):.1f} ms per schedule), {len(queries)} queries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--batches', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0, keepdb=False)
+    teacher = User.objects.create_user(
+        email='sessions@example.com', username='sessions', password='bench', role='teacher'
+    )
+    run('day-by-day', create_day_by_day, teacher, args.batches, args.days)
+    run('bulk', create_sessions, teacher, args.batches, args.days)
+
+
+if __name__ == '__main__':
+    main()
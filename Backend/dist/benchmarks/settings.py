@@ -0,0 +1,15 @@
+"""
+Settings for running the benchmarks without a Postgres server.
+
+Everything comes from edustream.settings except the database, which is an
+in-memory SQLite test database created by the benchmark itself.
+"""
+
+from edustream.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
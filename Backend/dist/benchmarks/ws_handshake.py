@@ -0,0 +1,83 @@
+"""
+WebSocket handshakes per second through JwtAuthMiddleware.
+
+Each handshake is a websocket scope carrying ``?token=Bearer <jwt>`` that is
+authenticated by the middleware and handed to a no-op inner app. Tokens are
+minted for a small pool of users, so the run mixes first-seen tokens with
+repeat connections (page reloads, reconnects), like a class starting.
+
+    cd Backend/dist
+    DJANGO_SETTINGS_MODULE=benchmarks.settings python benchmarks/ws_handshake.py 2>/dev/null
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+from edu_platform.jwt_middleware import JwtAuthMiddleware  # noqa: E402
+from edu_platform.models import User  # noqa: E402
+
+
+async def inner_app(scope, receive, send):
+    if not scope['user'].is_authenticated:
+        raise AssertionError("handshake was not authenticated")
+
+
+def make_scopes(users):
+    scopes = []
+    for user in users:
+        token = str(AccessToken.for_user(user))
+        scopes.append({
+            'type': 'websocket',
+            'path': '/ws/class/1/',
+            'query_string': f'token=Bearer {token}'.encode(),
+        })
+    return scopes
+
+
+async def run(middleware, scopes, total, concurrency):
+    count = len(scopes)
+    start = time.perf_counter()
+    for batch_start in range(0, total, concurrency):
+        await asyncio.gather(*(
+            middleware(scopes[i % count], None, None)
+            for i in range(batch_start, min(batch_start + concurrency, total))
+        ))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--handshakes', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0, keepdb=False)
+    users = [
+        User.objects.create_user(
+            email=f'bench{i}@example.com', username=f'bench{i}', password='bench', role='teacher'
+        )
+        for i in range(args.users)
+    ]
+    scopes = make_scopes(users)
+    middleware = JwtAuthMiddleware(inner_app)
+
+    elapsed = asyncio.run(run(middleware, scopes, args.handshakes, args.concurrency))
+    print(f"{args.handshakes} handshakes ({args.users} users, concurrency {args.concurrency}): "
+          f"{elapsed:.3f}s, {args.handshakes / elapsed:,.0f} handshakes/s")
+
+
+if __name__ == '__main__':
+    main()
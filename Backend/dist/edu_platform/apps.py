@@ -9,21 +9,34 @@ class EduPlatformConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'edu_platform'
     def ready(self):
+        # Keeps ClassScheduleSummary rows in sync with ClassSession writes
+        from edu_platform.utility import schedule_summary  # noqa: F401
+        # Invalidates cached course listings on course/pricing/schedule writes
+        from edu_platform.utility import course_list_cache  # noqa: F401
+        # Renders resized copies of uploaded thumbnails and profile pictures
+        from edu_platform.utility import image_variants  # noqa: F401
+
         # Start background thread for trial cleanup
         # Only start if not in migration or other management commands
         import sys
         # Don’t run during migrations or shell
-        if any(cmd in sys.argv for cmd in ['migrate', 'makemigrations', 'createsuperuser', 'shell']):
+        if any(cmd in sys.argv for cmd in ['migrate', 'makemigrations', 'createsuperuser', 'shell', 'serve']):
+            return
+
+        # Under ``manage.py serve`` only the first worker runs the cleanup
+        import os
+        if os.environ.get('EDUSTREAM_WORKER_ID', '0') != '0':
             return
 
         # Start thread for any ASGI/WSGI server (runserver, daphne, uvicorn, gunicorn, etc.)
         self.start_cleanup_thread()
     
     def start_cleanup_thread(self):
-        """Start a background thread to cleanup expired trials"""
+        """Start a background thread to cleanup expired trials and materialize upcoming class sessions"""
         def cleanup_loop():
             # Wait 10 seconds for Django to fully start
             time.sleep(10)
+            next_materialize = 0
             
             while True:
                 try:
@@ -60,11 +73,27 @@ class EduPlatformConfig(AppConfig):
                         logger.info(f"[AUTO-CLEANUP] Deleted {len(deleted_emails)} expired trials: {', '.join(deleted_emails)}")
                         print(f"[AUTO-CLEANUP] Deleted {len(deleted_emails)} expired trials: {', '.join(deleted_emails)}")
                     
+                    # Once a day, write the rows of lazily generated sessions that entered the window
+                    if settings.SESSION_MATERIALIZE_DAYS and time.monotonic() >= next_materialize:
+                        from .utility.session_generator import materialize_due_sessions
+                        created, skipped = materialize_due_sessions()
+                        next_materialize = time.monotonic() + 86400
+                        for schedule_id, error in skipped:
+                            logger.warning(
+                                f"[MATERIALIZE] Schedule {schedule_id}: {len(error.conflicts)} occurrences overlap the teacher's other classes; skipped"
+                            )
+                        logger.info(f"[MATERIALIZE] Created {created} class sessions")
+                    
+                    # Return the connection to the pool instead of holding it while asleep
+                    connection.close()
+                    
                     # Wait for next interval
                     time.sleep(interval)
                     
                 except Exception as e:
                     logger.error(f"Error in cleanup thread: {e}")
+                    from django.db import connection
+                    connection.close()
                     time.sleep(60)  # Wait a minute before retrying
         
         # Start thread as daemon so it stops when main process stops
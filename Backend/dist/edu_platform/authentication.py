@@ -0,0 +1,172 @@
+"""
+JWT authentication that does not query the users table on every request.
+
+The user row behind a token's ``user_id`` claim is cached as a plain dict,
+first in a per-process LRU and then in Redis (the default Django cache).
+``CachedUser`` answers field and property lookups (``id``, ``role``,
+``is_admin``, ``has_purchased_courses``, ``is_trial_expired``...) from that
+dict, so permission classes such as IsAdmin/IsTeacher/IsStudent and most
+views never touch the database for the user. Anything else - saving,
+related objects, using the user in an ORM filter - loads the real ``User``
+on first use. Saving or deleting a ``User``, or updating users through
+``User.objects...update()`` (the ``users_updated`` signal), evicts their entries.
+An update whose filter does not name the users retires every Redis entry at
+once by bumping a generation number stored next to them.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from edu_platform.models import users_updated
+from edu_platform.utility.ttl_cache import TTLCache
+import logging
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+CACHE_KEY = 'auth:user:{}'
+# Bumped by updates that do not name their users; Redis entries from an older generation are misses
+GENERATION_KEY = 'auth:user:generation'
+
+local_user_cache = TTLCache(
+    maxsize=getattr(settings, 'AUTH_USER_LOCAL_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'AUTH_USER_LOCAL_CACHE_TTL', 30),
+)
+
+
+def user_to_cache_data(user):
+    """Returns the cacheable fields of ``user`` (every concrete field except the password)."""
+    data = {
+        field.attname: getattr(user, field.attname)
+        for field in User._meta.concrete_fields
+        if field.attname != 'password'
+    }
+    data['pk'] = user.pk
+    return data
+
+
+def get_cached_user_data(user_id):
+    """Looks up a user's fields in the local LRU, then Redis, then the database."""
+    data = local_user_cache.get(user_id)
+    if data is not None:
+        return data
+
+    key = CACHE_KEY.format(user_id)
+    try:
+        found = cache.get_many([key, GENERATION_KEY])
+    except Exception as e:
+        logger.warning(f"User cache read failed: user_id={user_id}, error={e}")
+        found = {}
+    generation = found.get(GENERATION_KEY, 0)
+    entry = found.get(key)
+    data = entry[1] if isinstance(entry, tuple) and entry[0] == generation else None
+
+    if data is None:
+        try:
+            user = User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            return None
+        data = user_to_cache_data(user)
+        try:
+            cache.set(key, (generation, data), getattr(settings, 'AUTH_USER_CACHE_TTL', 300))
+        except Exception as e:
+            logger.warning(f"User cache write failed: user_id={user_id}, error={e}")
+
+    local_user_cache.set(user_id, data)
+    return data
+
+
+def evict_users(pks):
+    """Removes the given users from both cache tiers."""
+    pks = set(pks)
+    local_user_cache.discard_where(lambda key: key in pks)
+    try:
+        cache.delete_many([CACHE_KEY.format(pk) for pk in pks])
+    except Exception as e:
+        logger.warning(f"User cache invalidation failed: user_ids={sorted(pks)}, error={e}")
+
+
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Evicts a changed or deleted user from both cache tiers."""
+    evict_users([instance.pk])
+
+
+def evict_all_users():
+    """Empties the local tier and retires every Redis entry by moving to a new generation."""
+    local_user_cache.clear()
+    try:
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            # No generation yet: entries were cached under 0
+            cache.add(GENERATION_KEY, 1, timeout=None)
+    except Exception as e:
+        logger.warning(f"User cache invalidation failed: all users, error={e}")
+
+
+def invalidate_updated_users(sender, pks, **kwargs):
+    """Evicts users changed by a queryset update() (every user when ``pks`` is None)."""
+    if pks is None:
+        evict_all_users()
+    else:
+        evict_users(pks)
+
+
+post_save.connect(invalidate_user_cache, sender=User)
+post_delete.connect(invalidate_user_cache, sender=User)
+users_updated.connect(invalidate_updated_users, sender=User)
+
+
+class CachedUser(SimpleLazyObject):
+    """Lazy ``User`` that serves cached fields and model properties without a query.
+
+    The real row is loaded the first time something outside the cached data is
+    needed (``save()``, relations, ``isinstance``/ORM lookups); after that every
+    access goes to the loaded instance.
+    """
+
+    def __init__(self, data):
+        user_id = data['pk']
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__['_cached_data'] = data
+
+    def __getattr__(self, name):
+        if self._wrapped is empty:
+            data = self.__dict__['_cached_data']
+            if name in data:
+                return data[name]
+            # Model properties (is_admin, is_trial_expired, ...) run against the cached fields
+            attr = getattr(User, name, None)
+            if isinstance(attr, property):
+                return attr.fget(self)
+        return super().__getattr__(name)
+
+    def __bool__(self):
+        # Truthiness checks (e.g. IsAuthenticated) must not force a load
+        return True
+
+    is_authenticated = True
+    is_anonymous = False
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Drop-in for JWTAuthentication that resolves the user from the cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        data = get_cached_user_data(user_id)
+        if data is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not data.get('is_active', True):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return CachedUser(data)
@@ -3,6 +3,7 @@ from channels.db import database_sync_to_async
 from django.core.exceptions import PermissionDenied
 import redis.asyncio as redis
 from django.utils import timezone
+from edustream.metrics import instrument_event
 import asyncio
 import json
 import logging
@@ -11,6 +12,7 @@ import os
 logger = logging.getLogger(__name__)
 
 class ClassRoomConsumer(AsyncWebsocketConsumer):
+    @instrument_event('channels', 'connect')
     async def connect(self):
         # Lazy imports
         from edu_platform.models import ClassSession, CourseSubscription
@@ -23,20 +25,20 @@ class ClassRoomConsumer(AsyncWebsocketConsumer):
         self.group_name = f'class_{self.class_id}'
 
         # Log connection attempt
-        logger.debug(f"WebSocket connection attempt: class_id={self.class_id}, user={user}")
+        logger.debug("WebSocket connection attempt: class_id=%s, user=%s", self.class_id, user)
 
         # Check authentication
         if not user.is_authenticated:
-            logger.warning(f"Unauthorized connection attempt: class_id={self.class_id}")
+            logger.warning("Unauthorized connection attempt: class_id=%s", self.class_id)
             await self.close(code=4001)
             return
 
         # Verify eligibility
         logger.debug("Starting eligibility check")
         eligible = await self.is_eligible(user)
-        logger.debug(f"Eligibility result: {eligible}")
+        logger.debug("Eligibility result: %s", eligible)
         if not eligible:
-            logger.warning(f"Forbidden connection attempt: user={user.email}, class_id={self.class_id}")
+            logger.warning("Forbidden connection attempt: user=%s, class_id=%s", user.email, self.class_id)
             await self.close(code=4003)
             return
 
@@ -44,7 +46,7 @@ class ClassRoomConsumer(AsyncWebsocketConsumer):
         try:
             session = await database_sync_to_async(ClassSession.objects.get)(class_id=self.class_id, is_active=True)
             if not (session.start_time <= current_time <= session.end_time):
-                logger.warning(f"Class not active: class_id={self.class_id}, time={current_time}")
+                logger.warning("Class not active: class_id=%s, time=%s", self.class_id, current_time)
                 await self.close(code=4004, reason="Class is not currently active.")
                 return
         except ClassSession.DoesNotExist:
@@ -87,8 +89,9 @@ class ClassRoomConsumer(AsyncWebsocketConsumer):
                 'sender': 'system',
             }
         )
-        logger.info(f"User {user.email} connected to class {self.class_id}")
+        logger.info("User %s connected to class %s", user.email, self.class_id)
 
+    @instrument_event('channels', 'disconnect')
     async def disconnect(self, close_code):
         user = self.scope['user']
 
@@ -112,18 +115,19 @@ class ClassRoomConsumer(AsyncWebsocketConsumer):
                     'sender': 'system',
                 }
             )
-        logger.info(f"User {user.email} disconnected from class {self.class_id}, code={close_code}")
+        logger.info("User %s disconnected from class %s, code=%s", user.email, self.class_id, close_code)
 
+    @instrument_event('channels', 'receive')
     async def receive(self, text_data):
         try:
             data = json.loads(text_data)
             message_type = data.get('type')
-            logger.debug(f"Received message: class_id={self.class_id}, type={message_type}")
+            logger.debug("Received message: class_id=%s, type=%s", self.class_id, message_type)
 
             if message_type == 'chat':
                 message = data.get('message', '').strip()
                 if not message or len(message) > 500:
-                    logger.warning(f"Invalid chat message: {message}")
+                    logger.warning("Invalid chat message: %s", message)
                     return
                 await self.channel_layer.group_send(
                     self.group_name,
@@ -138,7 +142,7 @@ class ClassRoomConsumer(AsyncWebsocketConsumer):
                 emoji = data.get('emoji', '').strip()
                 allowed_emojis = ['🙋', '👍', '👏', '😊']
                 if emoji not in allowed_emojis:
-                    logger.warning(f"Invalid emoji: {emoji}")
+                    logger.warning("Invalid emoji: %s", emoji)
                     return
                 await self.channel_layer.group_send(
                     self.group_name,
@@ -152,7 +156,7 @@ class ClassRoomConsumer(AsyncWebsocketConsumer):
 
             elif message_type == 'signaling':
                 if not data.get('data'):
-                    logger.warning(f"Invalid signaling data: {data}")
+                    logger.warning("Invalid signaling data: %s", data)
                     return
                 await self.channel_layer.group_send(
                     self.group_name,
@@ -166,6 +170,7 @@ class ClassRoomConsumer(AsyncWebsocketConsumer):
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {e}")
 
+    @instrument_event('channels', 'chat_message')
     async def chat_message(self, event):
         await self.send(text_data=json.dumps({
             'type': 'chat',
@@ -174,6 +179,7 @@ class ClassRoomConsumer(AsyncWebsocketConsumer):
             'is_emoji': event.get('is_emoji', False),
         }))
 
+    @instrument_event('channels', 'signaling_message')
     async def signaling_message(self, event):
         await self.send(text_data=json.dumps({
             'type': 'signaling',
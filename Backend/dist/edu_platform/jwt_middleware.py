@@ -1,33 +1,92 @@
 # dist/edu_platform/middleware.py
 
-import jwt
+import asyncio
 import logging
 from channels.auth import AuthMiddlewareStack
 from urllib.parse import parse_qs
-from channels.db import database_sync_to_async
+from channels.db import DatabaseSyncToAsync
 from channels.middleware import BaseMiddleware
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.conf import settings
+from django.db.models.signals import post_save, post_delete
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import UntypedToken
-from django.db import close_old_connections
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from edu_platform.models import users_updated
+from edu_platform.utility.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
-@database_sync_to_async
-def get_user_from_token(payload):
-    """
-    Get user from validated token payload.
-    """
+# Users resolved from access tokens, keyed by (user_id, token iat). A reconnect with
+# the same token skips the database; a new login (new iat) always re-reads the user.
+user_cache = TTLCache(
+    maxsize=getattr(settings, 'WEBSOCKET_USER_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'WEBSOCKET_USER_CACHE_TTL', 60),
+)
+# Lookups in flight, so concurrent handshakes with the same token share one query
+_pending_lookups = {}
+
+
+def _load_user(user_id):
+    """Returns the active user for ``user_id`` or AnonymousUser."""
     try:
-        user = User.objects.get(id=payload['user_id'])
+        user = User.objects.get(id=user_id)
         return user if user.is_active else AnonymousUser()
     except User.DoesNotExist:
-        logger.warning(f"User not found from token: user_id={payload.get('user_id')}")
+        logger.warning(f"User not found from token: user_id={user_id}")
         return AnonymousUser()
 
+
+# Not thread-sensitive: lookups run on the default thread pool instead of queueing
+# behind every other sync call on the single shared thread.
+load_user = DatabaseSyncToAsync(_load_user, thread_sensitive=False)
+
+
+async def _fetch_and_cache(key):
+    user = await load_user(key[0])
+    user_cache.set(key, user)
+    return user
+
+
+async def get_user_from_token(payload):
+    """
+    Get user from validated token payload, via the (user_id, iat) cache.
+    """
+    key = (payload[api_settings.USER_ID_CLAIM], payload.get('iat'))
+    user = user_cache.get(key)
+    if user is not None:
+        return user
+
+    task = _pending_lookups.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_and_cache(key))
+        _pending_lookups[key] = task
+        task.add_done_callback(lambda _: _pending_lookups.pop(key, None))
+    # Shielded so one cancelled handshake does not fail the others waiting on it
+    return await asyncio.shield(task)
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drops cached entries for a user that was changed or deleted."""
+    user_cache.discard_where(lambda key: key[0] == instance.pk)
+
+
+def invalidate_updated_users(sender, pks, **kwargs):
+    """Drops cached entries for users changed by a queryset update() (all of them when ``pks`` is None)."""
+    if pks is None:
+        user_cache.clear()
+        return
+    pks = set(pks)
+    user_cache.discard_where(lambda key: key[0] in pks)
+
+
+post_save.connect(invalidate_cached_user, sender=User)
+post_delete.connect(invalidate_cached_user, sender=User)
+users_updated.connect(invalidate_updated_users, sender=User)
+
+
 class JwtAuthMiddleware(BaseMiddleware):
     """
     Custom middleware to authenticate JWT from query params (?token=Bearer <jwt>).
@@ -37,20 +96,15 @@ class JwtAuthMiddleware(BaseMiddleware):
         logger.info("JWT Auth Middleware initialized")
 
     async def __call__(self, scope, receive, send):
-        close_old_connections()
-
         if scope['type'] != 'websocket':
             logger.debug("Non-WebSocket scope, skipping JWT auth")
             return await super().__call__(scope, receive, send)
 
-        logger.debug(f"Processing WebSocket scope: {scope.get('path')}")
+        logger.debug("Processing WebSocket scope: %s", scope.get('path'))
 
         # Extract token from query string
-        query_string = scope.get('query_string', b'').decode('utf-8')
-        logger.debug(f"Query string: {query_string}")
-        query_params = parse_qs(query_string)
+        query_params = parse_qs(scope.get('query_string', b'').decode('utf-8'))
         raw_token = query_params.get('token', [None])[0]
-        logger.debug(f"Raw token from query: {raw_token[:20] if raw_token else None}...")
 
         if not raw_token or not raw_token.startswith('Bearer '):
             logger.warning("No valid Bearer token in query string")
@@ -60,26 +114,18 @@ class JwtAuthMiddleware(BaseMiddleware):
         token = raw_token[7:].strip()  # Remove 'Bearer ' and any extra spaces
 
         try:
-            # Validate token using simplejwt
-            untyped_token = UntypedToken(token)
-            logger.debug("Token validation passed (simplejwt)")
-
-            # Decode payload
-            decoded_payload = jwt.decode(
-                token,
-                settings.SECRET_KEY,
-                algorithms=['HS256'],
-                audience=None,
-                issuer=None
-            )
-            logger.debug(f"Token decoded successfully: user_id={decoded_payload.get('user_id')}")
-
-            # Get user async
-            user = await get_user_from_token(decoded_payload)
+            # Single decode: signature, expiry and token type are checked together
+            payload = AccessToken(token).payload
+            user = await get_user_from_token(payload)
             scope['user'] = user
-            logger.info(f"JWT Auth successful: user_id={decoded_payload.get('user_id')}, email={user.email if user.is_authenticated else 'Anonymous'}")
-
-        except (InvalidToken, TokenError, jwt.InvalidTokenError, jwt.ExpiredSignatureError, jwt.DecodeError, jwt.InvalidAlgorithmError) as e:
+            user_id = payload.get(api_settings.USER_ID_CLAIM)
+            if user.is_authenticated:
+                logger.info("JWT Auth successful: user_id=%s, email=%s", user_id, user.email)
+            else:
+                # Valid token, but the user is gone or deactivated
+                logger.debug("JWT user_id=%s not found or inactive; connecting as anonymous", user_id)
+
+        except (InvalidToken, TokenError) as e:
             logger.error(f"JWT Error: {str(e)}, token={token[:20]}...")
             scope['user'] = AnonymousUser()
         except Exception as e:
@@ -92,4 +138,4 @@ class JwtAuthMiddleware(BaseMiddleware):
 # Stack function
 def JwtAuthMiddlewareStack(inner):
     logger.info("Creating JwtAuthMiddlewareStack")
-    return JwtAuthMiddleware(AuthMiddlewareStack(inner))
\ No newline at end of file
+    return JwtAuthMiddleware(AuthMiddlewareStack(inner))
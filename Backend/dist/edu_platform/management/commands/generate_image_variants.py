@@ -0,0 +1,30 @@
+"""
+Renders image variants for uploads saved before the variant pipeline existed.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from edu_platform.utility.image_variants import IMAGE_FIELDS, generate_variants, variants_attname
+
+
+class Command(BaseCommand):
+    help = (
+        "Render missing or stale WebP/JPEG variants of course thumbnails and profile pictures. "
+        "Safe to re-run; rows whose variants match their image are skipped."
+    )
+
+    def handle(self, *args, **options):
+        for model_label, fields in IMAGE_FIELDS.items():
+            model = apps.get_model(model_label)
+            for field_name in fields:
+                rows = (
+                    model.objects.exclude(**{field_name: ''}).exclude(**{f"{field_name}__isnull": True})
+                    .values_list('pk', field_name, variants_attname(field_name))
+                )
+                rendered = 0
+                for pk, name, variants in rows.iterator():
+                    if name != (variants or {}).get('source'):
+                        generate_variants(model_label, pk, field_name)
+                        rendered += 1
+                self.stdout.write(f"{model_label}.{field_name}: rendered {rendered}")
+        self.stdout.write(self.style.SUCCESS("Image variants are up to date."))
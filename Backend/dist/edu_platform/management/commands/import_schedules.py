@@ -0,0 +1,36 @@
+"""
+Creates class schedules from an .xlsx or .csv sheet, see edu_platform.utility.schedule_import.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from edu_platform.utility.schedule_import import ImportFileError, import_schedules
+
+
+class Command(BaseCommand):
+    help = (
+        "Import class schedules (one batch per row) from an .xlsx or .csv file. "
+        "Nothing is created unless every row is valid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path of the .xlsx or .csv file")
+        parser.add_argument('--dry-run', action='store_true', help="Only validate the file")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_schedules(file, options['path'], dry_run=options['dry_run'])
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+        for report in result['errors']:
+            row = f"Row {report['row']}" if report['row'] else "Import"
+            for error in report['errors']:
+                self.stderr.write(f"{row}: {error}")
+        if result['errors']:
+            raise CommandError(f"{len(result['errors'])} of {result['rows']} rows have errors; no schedules were created.")
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"All {result['rows']} rows are valid."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Imported {result['created']} schedules with {result['sessions']} sessions."
+            ))
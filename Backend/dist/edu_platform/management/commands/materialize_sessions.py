@@ -0,0 +1,21 @@
+"""
+Writes ClassSession rows for occurrences that entered the SESSION_MATERIALIZE_DAYS window.
+"""
+
+from django.core.management.base import BaseCommand
+from edu_platform.utility.session_generator import materialize_due_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the class sessions that are now within SESSION_MATERIALIZE_DAYS of today. "
+        "The first server worker runs this daily; safe to re-run."
+    )
+
+    def handle(self, *args, **options):
+        created, skipped = materialize_due_sessions()
+        for schedule_id, error in skipped:
+            self.stderr.write(
+                f"Schedule {schedule_id}: {len(error.conflicts)} occurrences overlap the teacher's other classes; skipped"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Created {created} class sessions."))
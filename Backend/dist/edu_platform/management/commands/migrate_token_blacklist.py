@@ -0,0 +1,43 @@
+"""
+Copies revocations from simplejwt's token_blacklist tables into the Redis backend.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from edu_platform.token_blacklist import RedisBlacklistBackend, get_blacklist_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy unexpired BlacklistedToken rows into the Redis token blacklist. Safe to re-run; "
+        "run it again after the last worker on the database backend has stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--purge', action='store_true',
+            help="Afterwards delete all OutstandingToken/BlacklistedToken rows (only once every worker uses Redis)."
+        )
+
+    def handle(self, *args, **options):
+        backend = get_blacklist_backend()
+        if not isinstance(backend, RedisBlacklistBackend):
+            raise CommandError("TOKEN_BLACKLIST['BACKEND'] is not the Redis backend; nothing to migrate to.")
+
+        now = timezone.now()
+        rows = (
+            BlacklistedToken.objects
+            .filter(token__expires_at__gt=now)
+            .values_list('token__jti', 'token__expires_at')
+        )
+        copied = 0
+        for jti, expires_at in rows.iterator(chunk_size=options['batch_size']):
+            backend.blacklist_jti(jti, expires_at.timestamp())
+            copied += 1
+        self.stdout.write(self.style.SUCCESS(f"Copied {copied} revoked tokens to Redis."))
+
+        if options['purge']:
+            deleted, _ = OutstandingToken.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} token_blacklist rows."))
@@ -0,0 +1,168 @@
+"""
+Runs the ASGI application in several uvicorn or daphne worker processes.
+
+The command binds the listening socket once and hands its file descriptor to
+every worker, so the kernel spreads connections across them and a worker
+being replaced never closes the port. uvicorn workers exit after
+``--max-requests`` (plus jitter so they do not all recycle together) and are
+started again; any worker that dies is replaced.
+
+Socket.IO long-polling requires every request of a session to reach the
+worker holding it, which a shared socket cannot guarantee. With more than
+one worker the Socket.IO server is limited to the websocket transport (a
+websocket stays on the worker that accepted it); rooms and emits already
+cross workers through the Redis manager.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from prometheus_client import multiprocess
+import glob
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+APPLICATION = 'edustream.asgi:application'
+# A worker that exits this soon after starting is treated as crashing, not recycled
+MIN_UPTIME_SECONDS = 5
+RESTART_BACKOFF_SECONDS = 1
+
+
+class Command(BaseCommand):
+    help = "Serve edustream.asgi:application with N uvicorn or daphne workers sharing one socket."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='0.0.0.0')
+        parser.add_argument('--port', type=int, default=8000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--server', choices=['uvicorn', 'daphne'], default='uvicorn')
+        parser.add_argument(
+            '--max-requests', type=int, default=10000,
+            help="Recycle a uvicorn worker after this many requests (0 disables; daphne workers are not recycled)."
+        )
+        parser.add_argument('--max-requests-jitter', type=int, default=1000)
+        parser.add_argument(
+            '--graceful-timeout', type=int, default=30,
+            help="Seconds workers get to finish open requests on shutdown before being killed."
+        )
+        parser.add_argument('--backlog', type=int, default=2048)
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1.")
+        self.options = options
+        self.sock = self.bind(options['host'], options['port'], options['backlog'])
+        self.env = self.worker_env()
+        self.stopping = False
+        self.workers = {}  # slot -> (Popen, started_at)
+
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+
+        self.stdout.write(
+            f"Serving {APPLICATION} on {options['host']}:{options['port']} with "
+            f"{options['workers']} {options['server']} workers (pid {os.getpid()})"
+        )
+        try:
+            for slot in range(options['workers']):
+                self.spawn(slot)
+            self.supervise()
+        finally:
+            self.stop_workers()
+            self.sock.close()
+            if self.own_metrics_dir:
+                shutil.rmtree(self.env['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+
+    def bind(self, host, port, backlog):
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((host, port))
+        except OSError as e:
+            sock.close()
+            raise CommandError(f"Could not bind {host}:{port}: {e}")
+        sock.listen(backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def worker_env(self):
+        env = os.environ.copy()
+        if self.options['workers'] > 1:
+            # Not a default: polling would break whatever SOCKETIO_TRANSPORTS says
+            env['SOCKETIO_TRANSPORTS'] = 'websocket'
+
+        # Metrics from all workers are aggregated through a shared directory
+        self.own_metrics_dir = 'PROMETHEUS_MULTIPROC_DIR' not in env
+        if self.own_metrics_dir:
+            env['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='edustream-metrics-')
+        else:
+            os.makedirs(env['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+            for path in glob.glob(os.path.join(env['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+                os.remove(path)
+        return env
+
+    def command(self):
+        fd = str(self.sock.fileno())
+        if self.options['server'] == 'daphne':
+            return [sys.executable, '-m', 'daphne', '--fd', fd, APPLICATION]
+
+        cmd = [
+            sys.executable, '-m', 'uvicorn', APPLICATION,
+            '--fd', fd,
+            '--lifespan', 'on',
+            '--timeout-graceful-shutdown', str(self.options['graceful_timeout']),
+        ]
+        if self.options['max_requests'] > 0:
+            limit = self.options['max_requests'] + random.randint(0, self.options['max_requests_jitter'])
+            cmd += ['--limit-max-requests', str(limit)]
+        return cmd
+
+    def spawn(self, slot):
+        env = dict(self.env, EDUSTREAM_WORKER_ID=str(slot))
+        process = subprocess.Popen(self.command(), env=env, cwd=settings.BASE_DIR, pass_fds=[self.sock.fileno()])
+        self.workers[slot] = (process, time.monotonic())
+        self.stdout.write(f"Worker {slot} started (pid {process.pid})")
+
+    def supervise(self):
+        while not self.stopping:
+            for slot, (process, started_at) in list(self.workers.items()):
+                code = process.poll()
+                if code is None:
+                    continue
+                multiprocess.mark_process_dead(process.pid, self.env['PROMETHEUS_MULTIPROC_DIR'])
+                if self.stopping:
+                    break
+                uptime = time.monotonic() - started_at
+                if code == 0:
+                    self.stdout.write(f"Worker {slot} (pid {process.pid}) exited after {uptime:.0f}s; restarting")
+                else:
+                    self.stderr.write(f"Worker {slot} (pid {process.pid}) died with code {code}; restarting")
+                    if uptime < MIN_UPTIME_SECONDS:
+                        time.sleep(RESTART_BACKOFF_SECONDS)
+                self.spawn(slot)
+            time.sleep(0.5)
+
+    def request_stop(self, signum, frame):
+        self.stopping = True
+
+    def stop_workers(self):
+        """Asks every worker to finish open requests, then kills stragglers."""
+        for process, _ in self.workers.values():
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        deadline = time.monotonic() + self.options['graceful_timeout'] + 5
+        for slot, (process, _) in self.workers.items():
+            try:
+                process.wait(timeout=max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                self.stderr.write(f"Worker {slot} (pid {process.pid}) did not stop in time; killing")
+                process.kill()
+                process.wait()
+        self.stdout.write("All workers stopped")
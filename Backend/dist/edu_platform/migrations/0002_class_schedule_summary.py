@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:55
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractIsoWeekDay
+import django.db.models.deletion
+
+# Frozen copy of edu_platform.utility.schedule_summary as of this migration;
+# the module has changed since, and replays must not depend on its current code
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def format_time_range(start, end):
+    return f"{start.strftime('%I:%M %p')} to {end.strftime('%I:%M %p')}"
+
+
+def summarize_sessions(sessions):
+    ordered = sessions.order_by('session_date', 'start_time')
+
+    def first_range(queryset):
+        first = queryset.values('start_time', 'end_time').first()
+        return format_time_range(first['start_time'], first['end_time']) if first else None
+
+    weekdays = (
+        sessions.order_by()
+        .annotate(weekday=ExtractIsoWeekDay('session_date'))
+        .values_list('weekday', flat=True)
+        .distinct()
+    )
+    return {
+        'days': sorted(WEEKDAY_NAMES[weekday - 1] for weekday in weekdays),
+        'time': first_range(ordered),
+        'saturday_time': first_range(ordered.filter(session_date__iso_week_day=6)),
+        'sunday_time': first_range(ordered.filter(session_date__iso_week_day=7)),
+        'session_count': sessions.count(),
+    }
+
+
+def backfill_summaries(apps, schema_editor):
+    ClassSession = apps.get_model('edu_platform', 'ClassSession')
+    ClassScheduleSummary = apps.get_model('edu_platform', 'ClassScheduleSummary')
+    schedule_ids = ClassSession.objects.order_by().values_list('schedule_id', flat=True).distinct()
+    for schedule_id in schedule_ids.iterator():
+        ClassScheduleSummary.objects.update_or_create(
+            schedule_id=schedule_id,
+            defaults=summarize_sessions(ClassSession.objects.filter(schedule_id=schedule_id)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edu_platform', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassScheduleSummary',
+            fields=[
+                ('schedule', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='edu_platform.classschedule')),
+                ('days', models.JSONField(default=list, help_text='Weekday names that have at least one session')),
+                ('time', models.CharField(blank=True, help_text='Time range of the first session', max_length=32, null=True)),
+                ('saturday_time', models.CharField(blank=True, help_text='Time range of the first Saturday session', max_length=32, null=True)),
+                ('sunday_time', models.CharField(blank=True, help_text='Time range of the first Sunday session', max_length=32, null=True)),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'class_schedule_summaries',
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:58
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Django 4.2 has no generated fields, so a trigger keeps search_vector current.
+# Must match edu_platform.utility.course_search.SEARCH_CONFIG.
+FORWARD_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION courses_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER courses_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON courses
+    FOR EACH ROW EXECUTE FUNCTION courses_search_vector_update();
+
+UPDATE courses SET search_vector =
+    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'C');
+
+CREATE INDEX courses_search_vector_gin ON courses USING gin (search_vector);
+CREATE INDEX courses_name_trgm ON courses USING gin (name gin_trgm_ops);
+"""
+
+REVERSE_SQL = """
+DROP INDEX IF EXISTS courses_name_trgm;
+DROP INDEX IF EXISTS courses_search_vector_gin;
+DROP TRIGGER IF EXISTS courses_search_vector_trigger ON courses;
+DROP FUNCTION IF EXISTS courses_search_vector_update();
+"""
+
+
+def postgresql_only(sql):
+    def run(apps, schema_editor):
+        # Other backends (the SQLite benchmark settings) keep the column empty
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edu_platform', '0002_class_schedule_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(postgresql_only(FORWARD_SQL), postgresql_only(REVERSE_SQL)),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:06
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_current_pricing(apps, schema_editor):
+    Course = apps.get_model('edu_platform', 'Course')
+    CoursePricing = apps.get_model('edu_platform', 'CoursePricing')
+    latest = CoursePricing.objects.filter(course=OuterRef('pk')).order_by('-created_at', '-id').values('pk')[:1]
+    Course.objects.update(current_pricing=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edu_platform', '0004_updated_at_validators'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='current_pricing',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='edu_platform.coursepricing'),
+        ),
+        migrations.AddIndex(
+            model_name='coursepricing',
+            index=models.Index(fields=['course', '-created_at'], name='course_pricing_history_idx'),
+        ),
+        migrations.RunPython(backfill_current_pricing, migrations.RunPython.noop),
+    ]
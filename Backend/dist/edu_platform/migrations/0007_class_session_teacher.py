@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_teacher(apps, schema_editor):
+    ClassSchedule = apps.get_model('edu_platform', 'ClassSchedule')
+    ClassSession = apps.get_model('edu_platform', 'ClassSession')
+    teacher = ClassSchedule.objects.filter(pk=OuterRef('schedule_id')).values('teacher_id')[:1]
+    ClassSession.objects.update(teacher_id=Subquery(teacher))
+
+
+# Made NOT NULL in 0008: PostgreSQL will not ALTER a table with the backfill's
+# deferred foreign key checks still pending in the same transaction
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('edu_platform', '0006_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classsession',
+            name='teacher',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='class_sessions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_teacher, migrations.RunPython.noop),
+    ]
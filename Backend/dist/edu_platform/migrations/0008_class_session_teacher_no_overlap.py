@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Must match edu_platform.utility.session_generator.OVERLAP_CONSTRAINT.
+# btree_gist provides the gist operator class for "teacher_id WITH =".
+FORWARD_SQL = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE class_sessions ADD CONSTRAINT class_sessions_teacher_no_overlap
+    EXCLUDE USING gist (teacher_id WITH =, tstzrange(start_time, end_time) WITH &&);
+"""
+
+REVERSE_SQL = """
+ALTER TABLE class_sessions DROP CONSTRAINT IF EXISTS class_sessions_teacher_no_overlap;
+"""
+
+# Pairs of one teacher's sessions that would stop the constraint from being added
+OVERLAPS_SQL = """
+SELECT a.teacher_id, a.id, b.id, a.start_time, a.end_time
+FROM class_sessions a
+JOIN class_sessions b
+    ON a.teacher_id = b.teacher_id AND a.id < b.id
+    AND tstzrange(a.start_time, a.end_time) && tstzrange(b.start_time, b.end_time)
+LIMIT 20
+"""
+
+
+def add_overlap_constraint(apps, schema_editor):
+    # Other backends (the SQLite benchmark settings) rely on the application checks
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(OVERLAPS_SQL)
+        overlaps = cursor.fetchall()
+    if overlaps:
+        listed = '\n'.join(
+            f"  teacher {teacher_id}: sessions {first} and {second} ({start} to {end})"
+            for teacher_id, first, second, start, end in overlaps
+        )
+        raise RuntimeError(
+            "Cannot add the teacher overlap constraint; reschedule or delete these overlapping sessions "
+            f"and run the migration again:\n{listed}"
+        )
+    schema_editor.execute(FORWARD_SQL)
+
+
+def drop_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('edu_platform', '0007_class_session_teacher'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='classsession',
+            name='teacher',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='class_sessions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(add_overlap_constraint, drop_overlap_constraint),
+    ]
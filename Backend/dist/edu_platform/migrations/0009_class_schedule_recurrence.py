@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edu_platform', '0008_class_session_teacher_no_overlap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classschedule',
+            name='recurrence',
+            field=models.JSONField(blank=True, default=dict, help_text='Recurrence rules (days, times, date range) and exception dates'),
+        ),
+        migrations.AddField(
+            model_name='classschedule',
+            name='sessions_materialized_until',
+            field=models.DateField(blank=True, editable=False, help_text='Last date with ClassSession rows; later occurrences are expanded from the recurrence. Empty when all have rows', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edu_platform', '0009_class_schedule_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='calendar_feed_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+    ]
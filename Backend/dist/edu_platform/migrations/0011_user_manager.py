@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:03
+
+from django.db import migrations
+import edu_platform.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edu_platform', '0010_user_calendar_feed_key'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', edu_platform.models.UserManager()),
+            ],
+        ),
+    ]
@@ -1,5 +1,11 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import AbstractUser, UserManager as AuthUserManager
+from django.db import models, transaction, IntegrityError
+from django.db.models import OuterRef, Subquery
+from django.db.models.expressions import Col
+from django.db.models.lookups import Exact, In
+from django.db.models.sql.where import AND
+from django.db.models.signals import post_delete
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.conf import settings
@@ -7,11 +13,51 @@ from datetime import timedelta, datetime, date
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.dispatch import Signal
+from edu_platform.utility.session_generator import find_conflicts, is_overlap_violation
 import random
 import uuid
 
 
 #--------Auth models---------#
+# Sent by UserQuerySet.update(), since update() sends no post_save. ``pks`` holds the
+# users it may have changed when the filter names them, or None for any user.
+users_updated = Signal()
+
+
+def _filtered_pks(query):
+    """The pks a ``pk=``/``pk__in=`` filter restricts ``query`` to, or None if it is filtered otherwise."""
+    where = query.where
+    if where.negated or where.connector != AND:
+        return None
+    for lookup in where.children:
+        if not isinstance(lookup, (Exact, In)) or not isinstance(lookup.lhs, Col) or not lookup.lhs.target.primary_key:
+            continue
+        values = [lookup.rhs] if isinstance(lookup, Exact) else lookup.rhs
+        # Subqueries and expressions would need a query to resolve
+        if isinstance(values, (list, tuple, set, frozenset)) and not any(hasattr(v, 'resolve_expression') for v in values):
+            return set(values)
+    return None
+
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Updates the rows and sends ``users_updated`` so cached copies of those
+        users are dropped. The pks come from the filter rather than a SELECT;
+        other filters send None and caches drop every user lazily.
+        """
+        pks = _filtered_pks(self.query)
+        rows = super().update(**kwargs)
+        if rows:
+            users_updated.send(sender=self.model, pks=pks)
+        return rows
+
+
+class UserManager(AuthUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     """Custom user model for managing user roles, verification, and trial periods."""
     ROLE_CHOICES = (
@@ -32,6 +78,10 @@ class User(AbstractUser):
 
     trial_end_date = models.DateTimeField(null=True, blank=True)
     has_purchased_courses = models.BooleanField(default=False)
+    # Signed into the user's ICS feed URL; a new key revokes the old URL, see edu_platform.utility.calendar_feed
+    calendar_feed_key = models.CharField(max_length=32, blank=True, default='', editable=False)
+
+    objects = UserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -123,6 +173,8 @@ class TeacherProfile(models.Model):
     specialization = models.JSONField(default=list, help_text="List of subjects/areas of expertise")
     bio = models.TextField(blank=True, help_text="Brief professional biography")
     profile_picture = models.ImageField(upload_to='teacher_profiles/', null=True, blank=True)
+    # Storage names of the resized copies (edu_platform.utility.image_variants)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     linkedin_url = models.URLField(blank=True)
     resume = models.FileField(upload_to='teacher_resumes/', null=True, blank=True)
     is_verified = models.BooleanField(default=False, help_text="Verified by admin")
@@ -150,6 +202,8 @@ class StudentProfile(models.Model):
         limit_choices_to={'role': 'student'}
     )
     profile_picture = models.ImageField(upload_to='student_profiles/', null=True, blank=True)
+    # Storage names of the resized copies (edu_platform.utility.image_variants)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -231,9 +285,22 @@ class Course(models.Model):
     category = models.CharField(max_length=100)
     level = models.CharField(max_length=20, choices=LEVEL_CHOICES, default='beginner')
     thumbnail = models.ImageField(upload_to='course_thumbnails/', blank=True, null=True)
+    # Storage names of the resized copies (edu_platform.utility.image_variants)
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     duration_hours = models.IntegerField(help_text="Total course duration in hours", default=30)
     base_price = models.DecimalField(max_digits=10, decimal_places=2)
     advantages = models.JSONField(default=list, help_text="List of course advantages/features")
+    # Latest CoursePricing, maintained by CoursePricing.save()/delete so readers need no extra query
+    current_pricing = models.ForeignKey(
+        'CoursePricing',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+'
+    )
+    # Written by a database trigger on PostgreSQL (migration 0003): name (A), category (B), description (C)
+    search_vector = SearchVectorField(null=True, editable=False)
     
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -256,6 +323,14 @@ class Course(models.Model):
         # Auto-generate slug if not set
         if not self.slug:
             self.slug = slugify(self.name)
+        if self.pk and not self._state.adding and not args and kwargs.get('update_fields') is None:
+            # current_pricing belongs to CoursePricing.save() and search_vector to the database
+            # trigger; never write back a stale copy of either, nor deferred fields never loaded
+            skipped = {'current_pricing', 'search_vector'} | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped and field.attname not in skipped
+            ]
         super().save(*args, **kwargs)
 
 
@@ -315,6 +390,7 @@ class CourseSubscription(models.Model):
     # Timestamps
     purchased_at = models.DateTimeField(auto_now_add=True)
     payment_completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     # Access control
     is_active = models.BooleanField(default=True)
@@ -349,6 +425,12 @@ class ClassSchedule(models.Model):
     batch = models.CharField( max_length=20, choices=[("weekdays", "Weekdays"), ("weekends", "Weekends")])
     batch_start_date = models.DateField()
     batch_end_date = models.DateField()
+    # Rules the sessions are generated from, see edu_platform.utility.session_generator
+    recurrence = models.JSONField(default=dict, blank=True, help_text="Recurrence rules (days, times, date range) and exception dates")
+    sessions_materialized_until = models.DateField(
+        null=True, blank=True, editable=False,
+        help_text="Last date with ClassSession rows; later occurrences are expanded from the recurrence. Empty when all have rows"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -362,6 +444,21 @@ class ClassSchedule(models.Model):
     def __str__(self):
         return f"{self.course.name} - {self.teacher.email} - {self.batch} - Batch from - {self.batch_start_date} to {self.batch_end_date}"
 
+    def save(self, *args, **kwargs):
+        """Saves the schedule and moves its sessions' teacher copy along with it."""
+        adding = self._state.adding
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                if not adding:
+                    self.sessions.exclude(teacher_id=self.teacher_id).update(teacher_id=self.teacher_id)
+        except IntegrityError as e:
+            if is_overlap_violation(e):
+                raise ValidationError(
+                    f"Teacher {self.teacher.email} already has classes at the times of this schedule's sessions."
+                ) from e
+            raise
+
 
 class ClassSession(models.Model):
     schedule = models.ForeignKey(
@@ -369,6 +466,13 @@ class ClassSession(models.Model):
         on_delete=models.CASCADE,
         related_name='sessions'
     )
+    # Copy of schedule.teacher, kept in step by save(); the overlap constraint needs it on this table
+    teacher = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='class_sessions',
+        editable=False
+    )
     class_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     session_date = models.DateField()
     start_time = models.DateTimeField()
@@ -385,28 +489,65 @@ class ClassSession(models.Model):
             models.Index(fields=["schedule", "session_date", "start_time"]),
         ]
         ordering = ["created_at"]
+        # On PostgreSQL, migration 0008 adds the exclusion constraint OVERLAP_CONSTRAINT:
+        # one teacher's sessions may not overlap (teacher_id WITH =, tstzrange(start_time, end_time) WITH &&)
 
     def __str__(self):
         return f"Class - {self.schedule.course.name} ({self.schedule.batch})- Timing - {self.start_time} - {self.end_time}"
 
+    def overlap_error(self):
+        """The error reported when this session overlaps another class of its teacher."""
+        return ValidationError(
+            f"Teacher {self.schedule.teacher.email} already has a class "
+            f"at {self.start_time.strftime('%H:%M')}–{self.end_time.strftime('%H:%M')} "
+            f"on {self.session_date}."
+        )
+
     def clean(self):
         if self.start_time >= self.end_time:
             raise ValidationError("Start time must be before end time.")
 
         # Check overlapping sessions only for the same teacher
-        overlapping_sessions = ClassSession.objects.filter(
-            schedule__teacher=self.schedule.teacher,
-            session_date=self.session_date,
-            start_time__lt=self.end_time,
-            end_time__gt=self.start_time,
-        ).exclude(pk=self.pk)
+        conflicts = find_conflicts(
+            self.schedule.teacher_id, [(self.start_time, self.end_time)], exclude=[self.pk] if self.pk else []
+        )
+
+        if conflicts:
+            raise self.overlap_error()
+
+    def save(self, *args, **kwargs):
+        """Copies the schedule's teacher and reports overlap constraint violations as ValidationError."""
+        self.teacher_id = self.schedule.teacher_id
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            # Another write took the slot after clean() ran
+            if is_overlap_violation(e):
+                raise self.overlap_error() from e
+            raise
+
+
+class ClassScheduleSummary(models.Model):
+    """Per-schedule session facts shown in course listings, kept in sync on ClassSession writes."""
+    schedule = models.OneToOneField(
+        ClassSchedule,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='summary'
+    )
+    days = models.JSONField(default=list, help_text="Weekday names that have at least one session")
+    time = models.CharField(max_length=32, null=True, blank=True, help_text="Time range of the first session")
+    saturday_time = models.CharField(max_length=32, null=True, blank=True, help_text="Time range of the first Saturday session")
+    sunday_time = models.CharField(max_length=32, null=True, blank=True, help_text="Time range of the first Sunday session")
+    session_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
-        if overlapping_sessions.exists():
-            raise ValidationError(
-                f"Teacher {self.schedule.teacher.email} already has a class "
-                f"at {self.start_time.strftime('%H:%M')}–{self.end_time.strftime('%H:%M')} "
-                f"on {self.session_date}."
-            )
+    class Meta:
+        db_table = 'class_schedule_summaries'
+
+    def __str__(self):
+        return f"Summary - schedule {self.schedule_id} ({self.session_count} sessions)"
 
 
 #--------Enrollment models---------#
@@ -439,6 +580,7 @@ class CourseEnrollment(models.Model):
     )
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Amount paid by student")
     enrolled_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'course_enrollments'
@@ -462,8 +604,34 @@ class CoursePricing(models.Model):
     discount_percent=models.DecimalField(max_digits=10,decimal_places=2)
     final_price=models.DecimalField(max_digits=10,decimal_places=2)
     created_at=models.DateTimeField(auto_now_add=True)
+    updated_at=models.DateTimeField(auto_now=True)
     class Meta:
         db_table='course_pricings'
         ordering=['-created_at']
+        indexes=[
+            models.Index(fields=['course', '-created_at'], name='course_pricing_history_idx'),
+        ]
     def __str__(self):
-        return f"{self.course.name} - {self.final_price}"
\ No newline at end of file
+        return f"{self.course.name} - {self.final_price}"
+
+    @classmethod
+    def refresh_current(cls, course_id):
+        """Points the course's current_pricing at its latest pricing (None if it has none)."""
+        latest = cls.objects.filter(course=OuterRef('pk')).order_by('-created_at', '-id').values('pk')[:1]
+        Course.objects.filter(pk=course_id).update(current_pricing=Subquery(latest))
+
+    def save(self, *args, **kwargs):
+        """Saves the pricing and moves the course's current_pricing in the same transaction."""
+        with transaction.atomic():
+            # Lock the course so concurrent pricing writes cannot leave a stale pointer
+            list(Course.objects.select_for_update().filter(pk=self.course_id).values_list('pk', flat=True))
+            super().save(*args, **kwargs)
+            CoursePricing.refresh_current(self.course_id)
+
+
+def _pricing_deleted(sender, instance, **kwargs):
+    # SET_NULL has cleared the pointer if this was the current pricing; fall back to the previous one
+    CoursePricing.refresh_current(instance.course_id)
+
+
+post_delete.connect(_pricing_deleted, sender=CoursePricing, dispatch_uid='course_pricing_deleted')
\ No newline at end of file
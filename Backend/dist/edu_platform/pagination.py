@@ -0,0 +1,183 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are read with ``WHERE (ordering columns) > (values of the last row)``
+instead of OFFSET, so deep pages cost the same as the first one and rows
+added or removed between requests do not shift later pages. Every ordering
+must end in a unique field (``id``) to be stable.
+
+Query parameters:
+
+* ``cursor`` - opaque value from the previous page's ``next``.
+* ``page_size`` - rows per page (default ``PAGE_SIZE``, at most ``max_page_size``).
+* ``paginate=false`` - return the whole list in one response, for small
+  clients that do not follow cursors.
+
+Views put the page in the usual ``api_response`` envelope and add the
+``next`` cursor (``None`` on the last page) from ``get_envelope()``.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from drf_yasg import openapi
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import uuid
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that cannot be decoded for the current ordering."""
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=_json_default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """Decodes ``cursor`` and converts each value with the matching model field's ``to_python()``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidCursor("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor("Invalid cursor.")
+    try:
+        values = [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValueError, TypeError, ValidationError):
+        raise InvalidCursor("Invalid cursor.")
+    # A NULL never compares greater or less than anything, so it cannot be a keyset bound
+    if any(value is None for value in values):
+        raise InvalidCursor("Invalid cursor.")
+    return values
+
+
+def ordering_fields(queryset, ordering):
+    """The model (or annotation output) field behind each ordering entry, following ``__`` relations."""
+    fields = []
+    for entry in ordering:
+        name = entry.lstrip('-')
+        if name in queryset.query.annotations:
+            fields.append(queryset.query.annotations[name].output_field)
+            continue
+        model, parts = queryset.model, name.split('__')
+        for part in parts[:-1]:
+            model = model._meta.get_field(part).related_model
+        field = model._meta.get_field(parts[-1])
+        fields.append(field.target_field if field.is_relation else field)
+    return fields
+
+
+def keyset_filter(ordering, values):
+    """Builds the Q for rows strictly after ``values`` in ``ordering`` (a row-value comparison)."""
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f"{name}__{lookup}": values[index]})
+        for previous, value in zip(ordering[:index], values[:index]):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def _field_value(obj, field):
+    value = obj
+    for part in field.lstrip('-').split('__'):
+        value = getattr(value, part)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over an ordering that ends in a unique field."""
+
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    paginate_query_param = 'paginate'
+    ordering = ('id',)
+
+    def __init__(self):
+        self.enabled = False
+        self.next_cursor = None
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'pagination_ordering', None) or self.ordering)
+
+    def get_page_size(self, params):
+        try:
+            size = int(params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None, ordering=None):
+        """Returns one page as a list, or None when the client opted out with ``paginate=false``."""
+        return self.paginate(queryset, request.query_params, ordering or self.get_ordering(view))
+
+    def paginate(self, queryset, params, ordering):
+        """``paginate_queryset()`` over a mapping of query params, for listings built without a request."""
+        if params.get(self.paginate_query_param, '').lower() in ('false', '0', 'no'):
+            return None
+        self.enabled = True
+        ordering = tuple(ordering)
+        page_size = self.get_page_size(params)
+
+        queryset = queryset.order_by(*ordering)
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            values = decode_cursor(cursor, ordering_fields(queryset, ordering))
+            queryset = queryset.filter(keyset_filter(ordering, values))
+
+        # One extra row tells whether there is a next page without a COUNT
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+        if len(rows) > page_size:
+            self.next_cursor = encode_cursor([_field_value(page[-1], field) for field in ordering])
+        return page
+
+    def get_envelope(self):
+        """Extra top-level response keys: ``next`` when paginating, nothing when opted out."""
+        return {'next': self.next_cursor} if self.enabled else {}
+
+    def get_paginated_response(self, data):
+        return Response({'data': data, **self.get_envelope()})
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': name, 'required': False, 'in': 'query', 'description': description, 'schema': {'type': kind}}
+            for name, kind, description in PARAMETER_DESCRIPTIONS
+        ]
+
+
+PARAMETER_DESCRIPTIONS = (
+    (KeysetPagination.cursor_query_param, 'string', "Cursor from the previous page's `next`."),
+    (KeysetPagination.page_size_query_param, 'integer',
+     f"Rows per page (default {KeysetPagination.page_size}, max {KeysetPagination.max_page_size})."),
+    (KeysetPagination.paginate_query_param, 'boolean', "Set to false to return the whole list."),
+)
+
+# For swagger_auto_schema(manual_parameters=...) on views that paginate by hand
+PAGINATION_PARAMETERS = [
+    openapi.Parameter(
+        name, openapi.IN_QUERY, description=description,
+        type={'string': openapi.TYPE_STRING, 'integer': openapi.TYPE_INTEGER, 'boolean': openapi.TYPE_BOOLEAN}[kind],
+    )
+    for name, kind, description in PARAMETER_DESCRIPTIONS
+]
@@ -1,8 +1,15 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as SimpleJWTTokenRefreshSerializer
 from django.contrib.auth import authenticate, get_user_model
 from django.db.models import Q
 from edu_platform.models import User, TeacherProfile, OTP, StudentProfile, Course, ClassSchedule, ClassSession
 from edu_platform.serializers.course_serializers import CourseSerializer
+from edu_platform.token_blacklist import RefreshToken
+from edu_platform.utility.schedule_summary import deferred_schedule_summaries
+from edu_platform.utility.session_generator import SessionConflictError, create_sessions
+from edu_platform.serializers.class_serializers import session_conflict_error
+from edu_platform.utility.image_variants import VariantImageField
+from edu_platform.serializers.sparse_fieldsets import SparseFieldsetMixin
 import re, os
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -60,15 +67,24 @@ def check_user_existence_utility(email=None, phone_number=None):
             'message_type': 'error'
         })
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializes student profile data."""
     is_trial = serializers.SerializerMethodField()
+    profile_picture = VariantImageField(default_size='medium', required=False, allow_null=True)
 
     class Meta:
         model = StudentProfile
         fields = ['profile_picture', 'is_trial']
         read_only_fields = ['is_trial']
 
+    field_sources = {'profile_picture': ('profile_picture', 'profile_picture_variants')}
+    # The flat (non-nested) output always reads the user
+    required_sources = ('user',)
+    representation_fields = (
+        'id', 'username', 'email', 'phone_number', 'first_name', 'last_name', 'role',
+        'email_verified', 'phone_verified', 'date_joined', 'has_purchased',
+    )
+
     def validate_profile_picture(self, value):
         """Validates profile picture file."""
         if value:
@@ -128,10 +144,11 @@ class StudentProfileSerializer(serializers.ModelSerializer):
             'profile_picture': profile_data.get('profile_picture'),
             'has_purchased': self.get_has_purchased(instance)
         }
-        return data
+        return self.prune_representation(data)
 
-class TeacherProfileSerializer(serializers.ModelSerializer):
+class TeacherProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializes teacher profile data."""
+    profile_picture = VariantImageField(default_size='medium', required=False, allow_null=True)
 
     class Meta:
         model = TeacherProfile
@@ -140,6 +157,14 @@ class TeacherProfileSerializer(serializers.ModelSerializer):
                   'teaching_languages']
         read_only_fields = ['is_verified']
 
+    field_sources = {'profile_picture': ('profile_picture', 'profile_picture_variants')}
+    # The flat (non-nested) output always reads the user
+    required_sources = ('user',)
+    representation_fields = (
+        'id', 'username', 'email', 'phone_number', 'first_name', 'last_name', 'role',
+        'email_verified', 'phone_verified', 'date_joined',
+    )
+
     def validate_experience_years(self, value):
         """Ensures experience years are within valid range."""
         if value < 0 or value > 50:
@@ -219,7 +244,7 @@ class TeacherProfileSerializer(serializers.ModelSerializer):
             'is_verified': profile_data.get('is_verified'),
             'teaching_languages': profile_data.get('teaching_languages')
         }
-        return data
+        return self.prune_representation(data)
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializes basic user data for retrieval and updates."""
@@ -810,6 +835,7 @@ class TeacherCreateSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    @deferred_schedule_summaries()
     def create(self, validated_data):
         """Creates a teacher with course assignments and schedules."""
         course_assignments = validated_data.pop('course_assignments')
@@ -924,26 +950,14 @@ class TeacherCreateSerializer(serializers.ModelSerializer):
                         batch_start_date=assignment['weekdays_start_date'],
                         batch_end_date=assignment['weekdays_end_date']
                     )
-                    start_date = assignment['weekdays_start_date']
-                    end_date = assignment['weekdays_end_date']
                     days = assignment['weekdays_days'] or ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-                    start_time = datetime.strptime(assignment['weekdays_start'], '%I:%M %p').time()
-                    end_time = datetime.strptime(assignment['weekdays_end'], '%I:%M %p').time()
-
-                    current_date = start_date
-                    while current_date <= end_date:
-                        day_name = current_date.strftime('%A')
-                        if day_name in days:
-                            session_start = timezone.make_aware(datetime.combine(current_date, start_time))
-                            session_end = timezone.make_aware(datetime.combine(current_date, end_time))
-                            ClassSession.objects.create(
-                                class_id=uuid.uuid4(),
-                                schedule=class_schedule,
-                                session_date=current_date,
-                                start_time=session_start,
-                                end_time=session_end
-                            )
-                        current_date += timedelta(days=1)
+                    create_sessions(class_schedule, [{
+                        'start_date': assignment['weekdays_start_date'],
+                        'end_date': assignment['weekdays_end_date'],
+                        'days': days,
+                        'start_time': datetime.strptime(assignment['weekdays_start'], '%I:%M %p').time(),
+                        'end_time': datetime.strptime(assignment['weekdays_end'], '%I:%M %p').time()
+                    }])
 
                 if 'weekends' in batches:
                     class_schedule = ClassSchedule.objects.create(
@@ -953,50 +967,29 @@ class TeacherCreateSerializer(serializers.ModelSerializer):
                         batch_start_date=assignment['weekend_start_date'],
                         batch_end_date=assignment['weekend_end_date']
                     )
-                    start_date = assignment['weekend_start_date']
-                    end_date = assignment['weekend_end_date']
-
-                    # Saturday sessions
-                    if assignment.get('saturday_start') and assignment.get('saturday_end'):
-                        sat_start_time = datetime.strptime(assignment['saturday_start'], '%I:%M %p').time()
-                        sat_end_time = datetime.strptime(assignment['saturday_end'], '%I:%M %p').time()
-                        current_date = start_date
-                        while current_date <= end_date:
-                            if current_date.strftime('%A') == 'Saturday':
-                                session_start = timezone.make_aware(datetime.combine(current_date, sat_start_time))
-                                session_end = timezone.make_aware(datetime.combine(current_date, sat_end_time))
-                                ClassSession.objects.create(
-                                    class_id=uuid.uuid4(),
-                                    schedule=class_schedule,
-                                    session_date=current_date,
-                                    start_time=session_start,
-                                    end_time=session_end
-                                )
-                            current_date += timedelta(days=1)
-
-                    # Sunday sessions
-                    if assignment.get('sunday_start') and assignment.get('sunday_end'):
-                        sun_start_time = datetime.strptime(assignment['sunday_start'], '%I:%M %p').time()
-                        sun_end_time = datetime.strptime(assignment['sunday_end'], '%I:%M %p').time()
-                        current_date = start_date
-                        while current_date <= end_date:
-                            if current_date.strftime('%A') == 'Sunday':
-                                session_start = timezone.make_aware(datetime.combine(current_date, sun_start_time))
-                                session_end = timezone.make_aware(datetime.combine(current_date, sun_end_time))
-                                ClassSession.objects.create(
-                                    class_id=uuid.uuid4(),
-                                    schedule=class_schedule,
-                                    session_date=current_date,
-                                    start_time=session_start,
-                                    end_time=session_end
-                                )
-                            current_date += timedelta(days=1)
+                    # Saturday and Sunday sessions, each with its own timing
+                    weekend_rules = []
+                    for day, prefix in (('Saturday', 'saturday'), ('Sunday', 'sunday')):
+                        if assignment.get(f'{prefix}_start') and assignment.get(f'{prefix}_end'):
+                            weekend_rules.append({
+                                'start_date': assignment['weekend_start_date'],
+                                'end_date': assignment['weekend_end_date'],
+                                'days': [day],
+                                'start_time': datetime.strptime(assignment[f'{prefix}_start'], '%I:%M %p').time(),
+                                'end_time': datetime.strptime(assignment[f'{prefix}_end'], '%I:%M %p').time()
+                            })
+                    create_sessions(class_schedule, weekend_rules)
 
             return user
         except serializers.ValidationError as e:
             if 'user' in locals():
                 user.delete()
             raise
+        except SessionConflictError as e:
+            # Batches of two assigned courses overlap each other
+            if 'user' in locals():
+                user.delete()
+            raise session_conflict_error(e.conflicts)
         except Exception as e:
             # Handle unexpected errors with a generic message
             logger.error(f"Error creating teacher: {str(e)}")
@@ -1351,3 +1344,8 @@ class ForgotPasswordSerializer(serializers.Serializer):
             purpose='password_reset'
         ).delete()
         return user
+
+
+class TokenRefreshSerializer(SimpleJWTTokenRefreshSerializer):
+    """Rotates refresh tokens against the configured token blacklist backend."""
+    token_class = RefreshToken
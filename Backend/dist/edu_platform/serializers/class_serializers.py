@@ -1,7 +1,13 @@
 from rest_framework import serializers
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime
 from edu_platform.models import User, ClassSchedule, Course, ClassSession, CourseEnrollment
+from edu_platform.utility.schedule_summary import deferred_schedule_summaries, format_time_range
+from edu_platform.utility.session_generator import (
+    SessionConflictError, create_sessions, find_conflicts, rule_intervals, schedule_occurrences
+)
+from edu_platform.serializers.sparse_fieldsets import SparseFieldsetMixin
+from django.db import transaction
 from django.db.models import Q, F, Count
 import logging
 import uuid
@@ -19,7 +25,51 @@ def parse_time_string(value):
             'message_type': 'error'
         })
 
-class ClassSessionSerializer(serializers.ModelSerializer):
+def session_rule(schedule):
+    """Turns a prepared schedule dict with 12-hour time strings into a session generator rule."""
+    return {
+        'start_date': schedule['start_date'],
+        'end_date': schedule['end_date'],
+        'days': schedule['days'],
+        'start_time': parse_time_string(schedule['start_time']),
+        'end_time': parse_time_string(schedule['end_time'])
+    }
+
+def session_conflict_error(conflicts):
+    """Builds the error for planned sessions overlapping the teacher's classes, listing every conflict."""
+    if not conflicts:
+        return serializers.ValidationError({
+            'message': "Sessions of this schedule overlap each other. Timing must differ on the same date.",
+            'message_type': 'error'
+        })
+    start, end, existing = conflicts[0]
+    message = (
+        f"Teacher has a conflicting session on {existing.session_date.strftime('%Y-%m-%d')} "
+        f"from {format_time_range(timezone.localtime(start), timezone.localtime(end))} "
+        f"(existing: {existing.start_time} to {existing.end_time})."
+    )
+    if len(conflicts) > 1:
+        message += f" {len(conflicts) - 1} more planned sessions conflict as well."
+    error = serializers.ValidationError({
+        'message': f"{message} Timing must differ on the same date.",
+        'message_type': 'error'
+    })
+    # Kept outside ``detail``, which would turn every value (None included) into an ErrorDetail string
+    error.conflicts = [
+        {
+            'session_date': str(existing.session_date),
+            'time': format_time_range(timezone.localtime(start), timezone.localtime(end)),
+            # Occurrences not materialized yet have no class_id
+            'existing_class_id': str(existing.class_id) if existing.class_id else None,
+            'existing_time': format_time_range(
+                timezone.localtime(existing.start_time), timezone.localtime(existing.end_time)
+            )
+        }
+        for start, end, existing in conflicts
+    ]
+    return error
+
+class ClassSessionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     recording = serializers.SerializerMethodField()
     class Meta:
         model = ClassSession
@@ -39,12 +89,16 @@ class BatchDetailSerializer(serializers.ModelSerializer):
     batch_name = serializers.CharField(source='batch', read_only=True)
     batch_start_date = serializers.DateField(read_only=True)
     batch_end_date = serializers.DateField(read_only=True)
-    classes = ClassSessionSerializer(source='sessions', many=True, read_only=True)
+    classes = serializers.SerializerMethodField()
 
     class Meta:
         model = ClassSchedule
         fields = ['batch_name', 'batch_start_date', 'batch_end_date', 'classes']
 
+    def get_classes(self, obj):
+        """Sessions of the batch, including occurrences that have no row yet (their id is null)."""
+        return ClassSessionSerializer(schedule_occurrences(obj), many=True, context=self.context).data
+
 
 class CourseSessionSerializer(serializers.ModelSerializer):
     """Serializer for courses with nested batches and sessions."""
@@ -260,17 +314,14 @@ class ClassScheduleAssignmentSerializer(serializers.Serializer):
 
         return attrs
 
-    def validate_session_conflicts(self, teacher, course_id, schedules):
-        """Checks for overlapping sessions with existing teacher schedules."""
+    def validate_session_conflicts(self, teacher, course_id, schedules, exception_dates=()):
+        """Checks every planned session against the teacher's existing ones and reports all overlaps."""
+        exception_dates = set(exception_dates)
+        intervals = []
         for schedule in schedules:
-            start_date = schedule['start_date']
-            end_date = schedule['end_date']
-            days = schedule['days']
-            start_time_str = schedule['start_time']
-            end_time_str = schedule['end_time']
             try:
-                start_time = parse_time_string(start_time_str)
-                end_time = parse_time_string(end_time_str)
+                start_time = parse_time_string(schedule['start_time'])
+                end_time = parse_time_string(schedule['end_time'])
                 if start_time >= end_time:
                     raise ValueError("End time must be after start time.")
             except ValueError as e:
@@ -278,26 +329,17 @@ class ClassScheduleAssignmentSerializer(serializers.Serializer):
                     'message': f"Invalid time format or logic for {schedule['type']}: {str(e)}.",
                     'message_type': 'error'
                 })
+            intervals.extend(rule_intervals({
+                'start_date': schedule['start_date'],
+                'end_date': schedule['end_date'],
+                'days': schedule['days'],
+                'start_time': start_time,
+                'end_time': end_time
+            }, exception_dates))
 
-            current_date = start_date
-            while current_date <= end_date:
-                day_name = current_date.strftime('%A')
-                if day_name in days:
-                    session_start = timezone.make_aware(datetime.combine(current_date, start_time))
-                    session_end = timezone.make_aware(datetime.combine(current_date, end_time))
-                    overlapping_sessions = ClassSession.objects.filter(
-                        schedule__teacher=teacher,
-                        session_date=current_date,
-                        start_time__lt=session_end,
-                        end_time__gt=session_start
-                    )
-                    if overlapping_sessions.exists():
-                        conflict_session = overlapping_sessions.first()
-                        raise serializers.ValidationError({
-                            'message': f"Teacher has a conflicting session on {current_date.strftime('%Y-%m-%d')} from {start_time_str} to {end_time_str} (existing: {conflict_session.start_time} to {conflict_session.end_time}). Timing must differ on the same date.",
-                            'message_type': 'error'
-                        })
-                current_date += timedelta(days=1)
+        conflicts = find_conflicts(teacher.id, intervals)
+        if conflicts:
+            raise session_conflict_error(conflicts)
 
 
 class ClassScheduleSerializer(serializers.ModelSerializer):
@@ -313,7 +355,7 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
         required=True,
         error_messages={'required': 'Batch field is required (e.g., "weekdays" or "weekends").'}
     )
-    sessions = ClassSessionSerializer(many=True, read_only=True)
+    sessions = serializers.SerializerMethodField()
     # For single batch creation (date/time fields)
     weekdays_start_date = serializers.DateField(required=False)
     weekdays_end_date = serializers.DateField(required=False)
@@ -333,6 +375,8 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
         error_messages={'required': 'Teacher ID is required for batch assignment.'}
     )
     batch_assignment = ClassScheduleAssignmentSerializer(required=False)
+    # Dates within the batch that have no class (holidays)
+    exception_dates = serializers.ListField(child=serializers.DateField(), write_only=True, required=False)
 
     class Meta:
         model = ClassSchedule
@@ -340,8 +384,14 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
             'id', 'course', 'course_id', 'teacher', 'teacher_id', 'batch',
             'sessions', 'weekdays_start_date', 'weekdays_end_date', 'weekdays_days',
             'weekdays_start', 'weekdays_end', 'weekend_start_date', 'weekend_end_date',
-            'saturday_start', 'saturday_end', 'sunday_start', 'sunday_end', 'batch_assignment'
+            'saturday_start', 'saturday_end', 'sunday_start', 'sunday_end', 'batch_assignment',
+            'exception_dates', 'recurrence'
         ]
+        read_only_fields = ['recurrence']
+
+    def get_sessions(self, obj):
+        """Sessions of the schedule, including occurrences that have no row yet (their id is null)."""
+        return ClassSessionSerializer(schedule_occurrences(obj), many=True, context=self.context).data
 
     def validate_course_id(self, value):
         """Ensures the course exists and is active."""
@@ -371,6 +421,17 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
         course_id = attrs.get('course_id')
         errors = {}
 
+        # Later sessions of a lazily materialized schedule are expanded from its stored
+        # recurrence, which an update does not rewrite; new dates would never take effect
+        if self.instance is not None and self.instance.sessions_materialized_until is not None:
+            date_fields = ('weekdays_start_date', 'weekdays_end_date', 'weekend_start_date', 'weekend_end_date')
+            if any(field in attrs for field in date_fields):
+                raise serializers.ValidationError({
+                    'message': "The dates of this schedule cannot be changed because its later sessions are generated from "
+                               "its recurrence. Create a new schedule for the new dates instead.",
+                    'message_type': 'error'
+                })
+
         # For single batch creation, validate teacher and course constraints
         if not attrs.get('batch_assignment'):
             if teacher_id:
@@ -424,6 +485,8 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    @deferred_schedule_summaries()
+    @transaction.atomic
     def create(self, validated_data):
         """Creates a ClassSchedule and associated ClassSession instances."""
         batch_assignment = validated_data.pop('batch_assignment', None)
@@ -431,6 +494,7 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
         course_id = validated_data.pop('course_id')
         course = Course.objects.get(id=course_id)
         batch = validated_data.pop('batch', None)
+        exception_dates = validated_data.pop('exception_dates', [])
 
         try:
             if batch_assignment:
@@ -493,7 +557,7 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
                     })
                 
                 # Check for session conflicts
-                assignment_serializer.validate_session_conflicts(teacher, course_id, schedules)
+                assignment_serializer.validate_session_conflicts(teacher, course_id, schedules, exception_dates)
 
                 # Create schedules and sessions
                 created_schedules = []
@@ -513,21 +577,7 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
                     created_schedules.append(class_schedule)
 
                     # Create sessions (recurring for all matching days)
-                    current_date = schedule['start_date']
-                    start_time = parse_time_string(schedule['start_time'])
-                    end_time = parse_time_string(schedule['end_time'])
-                    while current_date <= schedule['end_date']:
-                        day_name = current_date.strftime('%A')
-                        if day_name in schedule['days']:
-                            session_start = timezone.make_aware(datetime.combine(current_date, start_time))
-                            session_end = timezone.make_aware(datetime.combine(current_date, end_time))
-                            ClassSession.objects.create(
-                                schedule=class_schedule,
-                                session_date=current_date,
-                                start_time=session_start,
-                                end_time=session_end
-                            )
-                        current_date += timedelta(days=1)
+                    create_sessions(class_schedule, [session_rule(schedule)], exception_dates)
 
                 return {'schedules': created_schedules}
             else:
@@ -603,7 +653,7 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
                     })
                 
                 # Check for session conflicts
-                assignment_serializer.validate_session_conflicts(teacher, course_id, schedules)
+                assignment_serializer.validate_session_conflicts(teacher, course_id, schedules, exception_dates)
 
                 # Create ClassSchedule
                 class_schedule = ClassSchedule.objects.create(
@@ -615,27 +665,15 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
                 )
 
                 # Create sessions (recurring for all matching days)
-                for schedule in schedules:
-                    current_date = schedule['start_date']
-                    start_time = parse_time_string(schedule['start_time'])
-                    end_time = parse_time_string(schedule['end_time'])
-                    while current_date <= schedule['end_date']:
-                        day_name = current_date.strftime('%A')
-                        if day_name in schedule['days']:
-                            session_start = timezone.make_aware(datetime.combine(current_date, start_time))
-                            session_end = timezone.make_aware(datetime.combine(current_date, end_time))
-                            ClassSession.objects.create(
-                                schedule=class_schedule,
-                                session_date=current_date,
-                                start_time=session_start,
-                                end_time=session_end
-                            )
-                        current_date += timedelta(days=1)
+                create_sessions(class_schedule, [session_rule(schedule) for schedule in schedules], exception_dates)
 
                 return class_schedule
         except serializers.ValidationError as e:
             # Re-raise ValidationError without wrapping to preserve the original message
             raise
+        except SessionConflictError as e:
+            # The overlap constraint caught a slot booked after validate_session_conflicts ran
+            raise session_conflict_error(e.conflicts)
         except Exception as e:
             # Handle unexpected errors with a generic message
             logger.error(f"Error creating schedule: {str(e)}")
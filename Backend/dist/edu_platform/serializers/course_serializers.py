@@ -1,16 +1,20 @@
 from rest_framework import serializers
+from django.db.models import Prefetch
 from edu_platform.models import Course, CourseSubscription, ClassSchedule, ClassSession, CourseEnrollment
+from edu_platform.utility.image_variants import VariantImageField
+from edu_platform.serializers.sparse_fieldsets import SparseFieldsetMixin
 from django.utils.dateformat import format as date_format
 from django.utils import timezone
 from datetime import date
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializes course data for retrieval and updates."""
     batches = serializers.SerializerMethodField()
     schedule = serializers.SerializerMethodField()
     original_price = serializers.SerializerMethodField()
     discount_percent = serializers.SerializerMethodField()
     final_price = serializers.SerializerMethodField()
+    thumbnail = VariantImageField(default_size='medium', required=False, allow_null=True)
 
 
     class Meta:
@@ -21,8 +25,18 @@ class CourseSerializer(serializers.ModelSerializer):
             'is_active', 'created_at', 'updated_at', 'original_price', 'discount_percent', 'final_price'
         ]
 
+    field_sources = {
+        'thumbnail': ('thumbnail', 'thumbnail_variants'),
+        'batches': ('class_schedules',),
+        'schedule': ('class_schedules',),
+        'original_price': ('current_pricing',),
+        'discount_percent': ('current_pricing',),
+        'final_price': ('current_pricing',),
+    }
+
     def get_pricing_obj(self, obj):
-        return obj.pricings.first()
+        # Views select_related('current_pricing'), so this is free for listings
+        return obj.current_pricing
 
     def get_original_price(self, obj):
         pricing = self.get_pricing_obj(obj)
@@ -36,232 +50,178 @@ class CourseSerializer(serializers.ModelSerializer):
         pricing = self.get_pricing_obj(obj)
         return str(pricing.final_price) if pricing else None
 
+    def get_class_schedules(self, obj):
+        """Returns the course's schedules with their summaries, reusing a view's prefetch when present."""
+        if 'class_schedules' in getattr(obj, '_prefetched_objects_cache', {}):
+            return list(obj.class_schedules.all())
+        return list(obj.class_schedules.select_related('summary').order_by('batch_start_date'))
+
+    def get_viewer(self):
+        """``(role, user id)`` the data is for: the context's ``audience`` (see course_listing) or the request's user."""
+        audience = self.context.get('audience')
+        if audience is not None:
+            return audience.role, audience.user_id
+        request = self.context.get('request')
+        if request is not None:
+            return request.user.role, request.user.id
+        return None, None
+
+    def get_visible_schedules(self, obj):
+        """Filters the course's schedules to those the requesting role may see."""
+        schedules = self.get_class_schedules(obj)
+        role, user_id = self.get_viewer()
+        if role == 'teacher':
+            return [cs for cs in schedules if cs.teacher_id == user_id]
+        elif role == 'student':
+            # For CourseListView, include only upcoming batches (exclude ongoing)
+            today = date.today()
+            return [cs for cs in schedules if cs.batch_start_date > today]
+        return schedules
+
+    def get_student_enrollment(self, obj, request):
+        # MyCoursesView loads every enrollment of the page up front (see student_enrollment_maps)
+        enrollments = self.context.get('enrollments_by_course')
+        if enrollments is not None:
+            return enrollments.get(obj.id)
+        return CourseEnrollment.objects.filter(
+            student=request.user,
+            course=obj,
+            subscription__payment_status='completed'
+        ).first()
+
+    def is_my_courses_view(self):
+        return 'view' in self.context and self.context['view'].__class__.__name__ == 'MyCoursesView'
+
     def get_batches(self, obj):
         request = self.context.get('request')
-        today = date.today()
-        if request and request.user.role == 'teacher':
-            return list(obj.class_schedules.filter(teacher=request.user).values_list('batch', flat=True).distinct())
-        elif request and request.user.role == 'student':
+        if request and request.user.role == 'student' and self.is_my_courses_view():
             # For MyCoursesView, only include the enrolled batch
-            if 'view' in self.context and self.context['view'].__class__.__name__ == 'MyCoursesView':
-                enrollment = CourseEnrollment.objects.filter(
-                    student=request.user,
-                    course=obj,
-                    subscription__payment_status='completed'
-                ).first()
-                if enrollment:
-                    return [enrollment.batch]
-                return []
-            # For CourseListView, include only upcoming batches (exclude ongoing)
-            return list(obj.class_schedules.filter(batch_start_date__gt=today).values_list('batch', flat=True).distinct())
-        # For admins or others, return all batches
-        return list(obj.class_schedules.values_list('batch', flat=True).distinct())
+            enrollment = self.get_student_enrollment(obj, request)
+            return [enrollment.batch] if enrollment else []
+        # Teachers see their own batches, students upcoming ones, admins all
+        return list(dict.fromkeys(cs.batch for cs in self.get_visible_schedules(obj)))
+
+    def schedule_entry(self, cs):
+        """Builds one schedule entry from a ClassSchedule's summary (None if it has no sessions)."""
+        summary = getattr(cs, 'summary', None)
+        if summary is None:
+            return None
+
+        if cs.batch == 'weekdays':
+            return {
+                'days': summary.days,
+                'time': summary.time,
+                'type': cs.batch,
+                'batchStartDate': cs.batch_start_date.isoformat(),
+                'batchEndDate': cs.batch_end_date.isoformat()
+            }
+        elif cs.batch == 'weekends':
+            if not (summary.saturday_time or summary.sunday_time):
+                return None
+            schedule_entry = {
+                'days': [],
+                'type': cs.batch,
+                'batchStartDate': cs.batch_start_date.isoformat(),
+                'batchEndDate': cs.batch_end_date.isoformat()
+            }
+            if summary.saturday_time:
+                schedule_entry['days'].append('saturday')
+                schedule_entry['saturday_time'] = summary.saturday_time
+            if summary.sunday_time:
+                schedule_entry['days'].append('sunday')
+                schedule_entry['sunday_time'] = summary.sunday_time
+            return schedule_entry
+        return None
 
     def get_schedule(self, obj):
         request = self.context.get('request')
-        today = date.today()
         schedules = []
 
-        if request and request.user.role == 'teacher':
-            # For teachers, return all assigned batches' schedules from ClassSchedule
-            class_schedules = obj.class_schedules.filter(teacher=request.user).order_by('batch_start_date')
-            if not class_schedules.exists():
-                return schedules  # Empty list if no schedules assigned
-            for cs in class_schedules:
-                sessions = cs.sessions.order_by('session_date', 'start_time')
-                if not sessions.exists():
-                    continue
-
-                if cs.batch == 'weekdays':
-                    first_session = sessions[0]
-                    start_str = first_session.start_time.strftime('%I:%M %p')
-                    end_str = first_session.end_time.strftime('%I:%M %p')
-                    days = sorted(set(s.session_date.strftime('%A') for s in sessions))
-                    schedules.append({
-                        'days': days,
-                        'time': f"{start_str} to {end_str}",
-                        'type': cs.batch,
-                        'batchStartDate': cs.batch_start_date.isoformat(),
-                        'batchEndDate': cs.batch_end_date.isoformat()
-                    })
-                elif cs.batch == 'weekends':
-                    saturday_sessions = [s for s in sessions if s.session_date.strftime('%A').lower() == 'saturday']
-                    sunday_sessions = [s for s in sessions if s.session_date.strftime('%A').lower() == 'sunday']
-                    
-                    saturday_time = None
-                    sunday_time = None
-                    
-                    if saturday_sessions:
-                        first_saturday = saturday_sessions[0]
-                        saturday_time = f"{first_saturday.start_time.strftime('%I:%M %p')} to {first_saturday.end_time.strftime('%I:%M %p')}"
-                    
-                    if sunday_sessions:
-                        first_sunday = sunday_sessions[0]
-                        sunday_time = f"{first_sunday.start_time.strftime('%I:%M %p')} to {first_sunday.end_time.strftime('%I:%M %p')}"
-                    
-                    if saturday_time or sunday_time:
-                        schedule_entry = {
-                            'days': [],
-                            'type': cs.batch,
-                            'batchStartDate': cs.batch_start_date.isoformat(),
-                            'batchEndDate': cs.batch_end_date.isoformat()
-                        }
-                        if saturday_time:
-                            schedule_entry['days'].append('saturday')
-                            schedule_entry['saturday_time'] = saturday_time
-                        if sunday_time:
-                            schedule_entry['days'].append('sunday')
-                            schedule_entry['sunday_time'] = sunday_time
-                        schedules.append(schedule_entry)
-
-        elif request and request.user.role == 'student':
+        if request and request.user.role == 'student' and self.is_my_courses_view():
             # For MyCoursesView, use enrollment data for the specific batch schedule
-            if 'view' in self.context and self.context['view'].__class__.__name__ == 'MyCoursesView':
-                enrollment = CourseEnrollment.objects.filter(
-                    student=request.user,
-                    course=obj,
-                    subscription__payment_status='completed'
-                ).first()
-                if enrollment:
-                    schedule_entry = {
-                        'type': enrollment.batch,
-                        'batchStartDate': enrollment.start_date.isoformat() if enrollment.start_date else None,
-                        'batchEndDate': enrollment.end_date.isoformat() if enrollment.end_date else None
-                    }
-                    if enrollment.batch == 'weekdays':
-                        if enrollment.start_time and enrollment.end_time:
-                            start_str = enrollment.start_time.strftime('%I:%M %p')
-                            end_str = enrollment.end_time.strftime('%I:%M %p')
-                            # Assuming weekdays are standard (Mon-Fri), adjust if specific days are stored elsewhere
-                            schedule_entry['days'] = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-                            schedule_entry['time'] = f"{start_str} to {end_str}"
-                        else:
-                            return schedules  # Empty list if schedule data is incomplete
-                    elif enrollment.batch == 'weekends':
-                        schedule_entry['days'] = []
-                        if enrollment.saturday_start_time and enrollment.saturday_end_time:
-                            schedule_entry['days'].append('saturday')
-                            schedule_entry['saturday_time'] = f"{enrollment.saturday_start_time.strftime('%I:%M %p')} to {enrollment.saturday_end_time.strftime('%I:%M %p')}"
-                        if enrollment.sunday_start_time and enrollment.sunday_end_time:
-                            schedule_entry['days'].append('sunday')
-                            schedule_entry['sunday_time'] = f"{enrollment.sunday_start_time.strftime('%I:%M %p')} to {enrollment.sunday_end_time.strftime('%I:%M %p')}"
-                        if not schedule_entry['days']:
-                            return schedules  # Empty list if no valid weekend schedule
-                    if schedule_entry['days']:
-                        schedules.append(schedule_entry)
-            else:
-                # For CourseListView, include only upcoming batches (exclude ongoing)
-                class_schedules = obj.class_schedules.filter(batch_start_date__gt=today).order_by('batch_start_date')
-                for cs in class_schedules:
-                    sessions = cs.sessions.order_by('session_date', 'start_time')
-                    if not sessions.exists():
-                        continue
-
-                    if cs.batch == 'weekdays':
-                        first_session = sessions[0]
-                        start_str = first_session.start_time.strftime('%I:%M %p')
-                        end_str = first_session.end_time.strftime('%I:%M %p')
-                        days = sorted(set(s.session_date.strftime('%A') for s in sessions))
-                        schedules.append({
-                            'days': days,
-                            'time': f"{start_str} to {end_str}",
-                            'type': cs.batch,
-                            'batchStartDate': cs.batch_start_date.isoformat(),
-                            'batchEndDate': cs.batch_end_date.isoformat()
-                        })
-                    elif cs.batch == 'weekends':
-                        saturday_sessions = [s for s in sessions if s.session_date.strftime('%A').lower() == 'saturday']
-                        sunday_sessions = [s for s in sessions if s.session_date.strftime('%A').lower() == 'sunday']
-                        
-                        saturday_time = None
-                        sunday_time = None
-                        
-                        if saturday_sessions:
-                            first_saturday = saturday_sessions[0]
-                            saturday_time = f"{first_saturday.start_time.strftime('%I:%M %p')} to {first_saturday.end_time.strftime('%I:%M %p')}"
-                        
-                        if sunday_sessions:
-                            first_sunday = sunday_sessions[0]
-                            sunday_time = f"{first_sunday.start_time.strftime('%I:%M %p')} to {first_sunday.end_time.strftime('%I:%M %p')}"
-                        
-                        if saturday_time or sunday_time:
-                            schedule_entry = {
-                                'days': [],
-                                'type': cs.batch,
-                                'batchStartDate': cs.batch_start_date.isoformat(),
-                                'batchEndDate': cs.batch_end_date.isoformat()
-                            }
-                            if saturday_time:
-                                schedule_entry['days'].append('saturday')
-                                schedule_entry['saturday_time'] = saturday_time
-                            if sunday_time:
-                                schedule_entry['days'].append('sunday')
-                                schedule_entry['sunday_time'] = sunday_time
-                            schedules.append(schedule_entry)
-        else:
-            # For admins or others, return all schedules
-            class_schedules = obj.class_schedules.all().order_by('batch_start_date')
-            for cs in class_schedules:
-                sessions = cs.sessions.order_by('session_date', 'start_time')
-                if not sessions.exists():
-                    continue
-
-                if cs.batch == 'weekdays':
-                    first_session = sessions[0]
-                    start_str = first_session.start_time.strftime('%I:%M %p')
-                    end_str = first_session.end_time.strftime('%I:%M %p')
-                    days = sorted(set(s.session_date.strftime('%A') for s in sessions))
-                    schedules.append({
-                        'days': days,
-                        'time': f"{start_str} to {end_str}",
-                        'type': cs.batch,
-                        'batchStartDate': cs.batch_start_date.isoformat(),
-                        'batchEndDate': cs.batch_end_date.isoformat()
-                    })
-                elif cs.batch == 'weekends':
-                    saturday_sessions = [s for s in sessions if s.session_date.strftime('%A').lower() == 'saturday']
-                    sunday_sessions = [s for s in sessions if s.session_date.strftime('%A').lower() == 'sunday']
-                    
-                    saturday_time = None
-                    sunday_time = None
-                    
-                    if saturday_sessions:
-                        first_saturday = saturday_sessions[0]
-                        saturday_time = f"{first_saturday.start_time.strftime('%I:%M %p')} to {first_saturday.end_time.strftime('%I:%M %p')}"
-                    
-                    if sunday_sessions:
-                        first_sunday = sunday_sessions[0]
-                        sunday_time = f"{first_sunday.start_time.strftime('%I:%M %p')} to {first_sunday.end_time.strftime('%I:%M %p')}"
-                    
-                    if saturday_time or sunday_time:
-                        schedule_entry = {
-                            'days': [],
-                            'type': cs.batch,
-                            'batchStartDate': cs.batch_start_date.isoformat(),
-                            'batchEndDate': cs.batch_end_date.isoformat()
-                        }
-                        if saturday_time:
-                            schedule_entry['days'].append('saturday')
-                            schedule_entry['saturday_time'] = saturday_time
-                        if sunday_time:
-                            schedule_entry['days'].append('sunday')
-                            schedule_entry['sunday_time'] = sunday_time
-                        schedules.append(schedule_entry)
+            enrollment = self.get_student_enrollment(obj, request)
+            if enrollment:
+                schedule_entry = {
+                    'type': enrollment.batch,
+                    'batchStartDate': enrollment.start_date.isoformat() if enrollment.start_date else None,
+                    'batchEndDate': enrollment.end_date.isoformat() if enrollment.end_date else None
+                }
+                if enrollment.batch == 'weekdays':
+                    if enrollment.start_time and enrollment.end_time:
+                        start_str = enrollment.start_time.strftime('%I:%M %p')
+                        end_str = enrollment.end_time.strftime('%I:%M %p')
+                        # Assuming weekdays are standard (Mon-Fri), adjust if specific days are stored elsewhere
+                        schedule_entry['days'] = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+                        schedule_entry['time'] = f"{start_str} to {end_str}"
+                    else:
+                        return schedules  # Empty list if schedule data is incomplete
+                elif enrollment.batch == 'weekends':
+                    schedule_entry['days'] = []
+                    if enrollment.saturday_start_time and enrollment.saturday_end_time:
+                        schedule_entry['days'].append('saturday')
+                        schedule_entry['saturday_time'] = f"{enrollment.saturday_start_time.strftime('%I:%M %p')} to {enrollment.saturday_end_time.strftime('%I:%M %p')}"
+                    if enrollment.sunday_start_time and enrollment.sunday_end_time:
+                        schedule_entry['days'].append('sunday')
+                        schedule_entry['sunday_time'] = f"{enrollment.sunday_start_time.strftime('%I:%M %p')} to {enrollment.sunday_end_time.strftime('%I:%M %p')}"
+                    if not schedule_entry['days']:
+                        return schedules  # Empty list if no valid weekend schedule
+                if schedule_entry['days']:
+                    schedules.append(schedule_entry)
+            return schedules
 
+        # Teachers: their assigned batches; students (course list): upcoming batches; admins: all
+        for cs in self.get_visible_schedules(obj):
+            schedule_entry = self.schedule_entry(cs)
+            if schedule_entry:
+                schedules.append(schedule_entry)
         return schedules
 
+
+def schedule_summary_prefetch():
+    """Prefetch for course querysets serialized with CourseSerializer (schedules plus summaries)."""
+    return Prefetch(
+        'class_schedules',
+        queryset=ClassSchedule.objects.select_related('summary').order_by('batch_start_date')
+    )
+
+
+def student_enrollment_maps(student, subscriptions):
+    """
+    Serializer context for MyCoursesSerializer over ``subscriptions``: their
+    completed enrollments by (subscription, course, batch) and by course, from
+    one query.
+    """
+    enrollments = CourseEnrollment.objects.filter(
+        student=student,
+        course_id__in={subscription.course_id for subscription in subscriptions},
+        subscription__payment_status='completed'
+    ).order_by('pk')
+    by_subscription, by_course = {}, {}
+    for enrollment in enrollments:
+        # First by pk wins, as with .first() on the unordered querysets these replace
+        by_subscription.setdefault((enrollment.subscription_id, enrollment.course_id, enrollment.batch), enrollment)
+        by_course.setdefault(enrollment.course_id, enrollment)
+    return {'enrollments_by_subscription': by_subscription, 'enrollments_by_course': by_course}
+
+
 class MyCoursesSerializer(serializers.Serializer):
+    def get_enrollment(self, subscription):
+        enrollments = self.context.get('enrollments_by_subscription')
+        if enrollments is not None:
+            return enrollments.get((subscription.id, subscription.course_id, subscription.batch))
+        return CourseEnrollment.objects.filter(
+            subscription=subscription,
+            student_id=subscription.student_id,
+            course_id=subscription.course_id,
+            batch=subscription.batch
+        ).first()
+
     def to_representation(self, instance):
         user = self.context['request'].user
 
         # Handle CourseSubscription instance (student purchased courses)
         if isinstance(instance, CourseSubscription):
-            enrollment = CourseEnrollment.objects.filter(
-                subscription=instance,
-                student=instance.student,
-                course=instance.course,
-                batch=instance.batch
-            ).first()
+            enrollment = self.get_enrollment(instance)
 
             if not enrollment:
                 return {
@@ -269,7 +229,7 @@ class MyCoursesSerializer(serializers.Serializer):
                     'message_type': 'error'
                 }
 
-            course_data = CourseSerializer(instance.course, context=self.context).data
+            course_data = CourseSerializer(instance.course, context={**self.context, 'is_nested': True}).data
 
             # Error handling: missing schedule
             if not course_data.get('schedule'):
@@ -299,7 +259,7 @@ class MyCoursesSerializer(serializers.Serializer):
 
         # Handle Course instance (assigned courses for teacher)
         elif isinstance(instance, Course):
-            course_data = CourseSerializer(instance, context=self.context).data
+            course_data = CourseSerializer(instance, context={**self.context, 'is_nested': True}).data
 
             # Error handling: missing schedule
             if not course_data.get('schedule'):
@@ -0,0 +1,147 @@
+"""
+Sparse fieldsets: ``?fields=id,name,final_price`` / ``?exclude=batches,schedule``.
+
+``SparseFieldsetMixin`` drops unrequested fields in ``get_fields()``, so
+their SerializerMethodFields never run. It only acts on GET/HEAD requests
+and only for the top-level serializer of a response: nested serializers
+(and ones built with ``is_nested`` in their context) keep every field.
+Serializers that assemble their own output dict pass it through
+``prune_representation()``.
+
+``fieldset_queryset()`` adapts the view's queryset to the same fieldset. It
+drops the prefetches and select_related joins that no requested field reads
+and loads only the columns needed with ``.only()``, and raises
+``InvalidFieldset`` (which views answer with a 400) for names the serializer
+does not output. A serializer describes
+what each field reads in ``field_sources``; fields not listed there read the
+model field of the same name.
+"""
+
+from django.db.models import Prefetch
+from drf_yasg import openapi
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _names(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def fieldset_params(request):
+    """The request's query params, or None for requests that do not read (fieldsets apply to GET/HEAD only)."""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    return getattr(request, 'query_params', request.GET)
+
+
+def parse_fieldset(params):
+    """Returns ``(requested, excluded)`` field name sets; ``requested`` is None when not restricted."""
+    if params is None:
+        return None, set()
+    return _names(params.get(FIELDS_PARAM)) or None, _names(params.get(EXCLUDE_PARAM))
+
+
+class InvalidFieldset(ValueError):
+    """Raised for ``fields``/``exclude`` names the serializer does not output."""
+
+
+def fieldset_names(serializer_class):
+    """Names a client may pass in ``fields``/``exclude`` for ``serializer_class``."""
+    return set(serializer_class.Meta.fields) | set(serializer_class.representation_fields)
+
+
+def is_selected(name, requested, excluded):
+    return (requested is None or name in requested) and name not in excluded
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin honouring the ``fields``/``exclude`` query params."""
+
+    # Serializer field -> model fields/relations it reads (default: the field of the same name)
+    field_sources = {}
+    # Model fields/relations read for every row whatever the fieldset
+    required_sources = ()
+    # Output keys a hand-built representation adds beyond Meta.fields
+    representation_fields = ()
+
+    @property
+    def fieldset_active(self):
+        if self.context.get('is_nested'):
+            return False
+        root = self.root
+        return root is self or (isinstance(root, serializers.ListSerializer) and root.child is self)
+
+    def fieldset_params(self):
+        # Listings built without a request pass their query params in the context
+        if 'query_params' in self.context:
+            return self.context['query_params']
+        return fieldset_params(self.context.get('request'))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.fieldset_active:
+            return fields
+        requested, excluded = parse_fieldset(self.fieldset_params())
+        return {name: field for name, field in fields.items() if is_selected(name, requested, excluded)}
+
+    def prune_representation(self, data):
+        """Applies the fieldset to an output dict built by hand."""
+        if not self.fieldset_active:
+            return data
+        requested, excluded = parse_fieldset(self.fieldset_params())
+        return {name: value for name, value in data.items() if is_selected(name, requested, excluded)}
+
+
+def _select_related_paths(tree, prefix=''):
+    for name, subtree in tree.items():
+        yield from _select_related_paths(subtree, f"{prefix}{name}__") if subtree else [f"{prefix}{name}"]
+
+
+def fieldset_queryset(queryset, serializer_class, params, extra=()):
+    """
+    Trims ``queryset`` to what the fieldset in ``params`` (see
+    ``fieldset_params()``) of ``serializer_class`` reads. ``extra`` names more
+    model fields to load, e.g. the pagination ordering.
+    """
+    requested, excluded = parse_fieldset(params)
+    if requested is None and not excluded:
+        return queryset
+    unknown = ((requested or set()) | excluded) - fieldset_names(serializer_class)
+    if unknown:
+        raise InvalidFieldset(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    names = set(serializer_class.Meta.fields) & requested if requested is not None else set(serializer_class.Meta.fields)
+    sources = set(serializer_class.required_sources)
+    for name in names - excluded:
+        sources.update(serializer_class.field_sources.get(name, (name,)))
+
+    model = queryset.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    roots = {source.split('__')[0] for source in sources}
+
+    prefetches = [
+        lookup for lookup in queryset._prefetch_related_lookups
+        if (lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup).split('__')[0] in roots
+    ]
+    queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+    if isinstance(queryset.query.select_related, dict):
+        joins = [path for path in _select_related_paths(queryset.query.select_related) if path.split('__')[0] in roots]
+        queryset = queryset.select_related(None).select_related(*joins)
+
+    columns = {model._meta.pk.name}
+    columns.update(root for root in roots if root in concrete)
+    columns.update(name.lstrip('-') for name in extra if name.lstrip('-') in concrete)
+    return queryset.only(*columns)
+
+
+SPARSE_FIELDSET_PARAMETERS = [
+    openapi.Parameter(
+        FIELDS_PARAM, openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Comma-separated fields to return (default: all). Unrequested computed fields are skipped.",
+    ),
+    openapi.Parameter(
+        EXCLUDE_PARAM, openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Comma-separated fields to leave out.",
+    ),
+]
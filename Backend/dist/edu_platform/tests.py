@@ -1,3 +1,1741 @@
-from django.test import TestCase
+from django.db import connection
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from unittest import skipUnless
+from django.utils import timezone
+from datetime import date, datetime, time, timedelta
+from rest_framework.test import APIClient
+from edu_platform.models import (
+    User, Course, CoursePricing, CourseSubscription, CourseEnrollment, ClassSchedule, ClassSession
+)
+from edu_platform.utility.session_generator import (
+    create_sessions, find_conflicts, materialize_sessions, recurrence_dates, rule_intervals, schedule_occurrences
+)
 
-# Create your tests here.
+
+class MyCoursesQueryCountTests(TestCase):
+    """MyCoursesView must not issue queries per purchased or assigned course."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(
+            email='student@example.com', username='student', password='pass', role='student',
+            has_purchased_courses=True
+        )
+        cls.teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='pass', role='teacher'
+        )
+
+    def add_course(self, index):
+        course = Course.objects.create(
+            name=f'Course {index}', description='Test course', category='testing', base_price=100
+        )
+        CoursePricing.objects.create(course=course, original_price=100, discount_percent=10, final_price=90)
+        start = date.today() + timedelta(days=7)
+        schedule = ClassSchedule.objects.create(
+            course=course, teacher=self.teacher, batch='weekdays',
+            batch_start_date=start, batch_end_date=start + timedelta(days=30)
+        )
+        ClassSession.objects.create(
+            schedule=schedule, session_date=start,
+            start_time=timezone.make_aware(datetime.combine(start, time(9))),
+            end_time=timezone.make_aware(datetime.combine(start, time(10))),
+        )
+        subscription = CourseSubscription.objects.create(
+            student=self.student, course=course, amount_paid=90, batch='weekdays',
+            start_date=start, end_date=start + timedelta(days=30), start_time=time(9), end_time=time(10),
+            payment_status='completed'
+        )
+        CourseEnrollment.objects.create(
+            student=self.student, course=course, subscription=subscription, batch='weekdays',
+            start_date=start, end_date=start + timedelta(days=30), start_time=time(9), end_time=time(10), price=90
+        )
+
+    def count_queries(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('my_courses'), {'paginate': 'false'})
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data['data']
+
+    def assert_constant_queries(self, user):
+        self.add_course(0)
+        one, data = self.count_queries(user)
+        self.assertEqual(len(data), 1)
+        for index in range(1, 6):
+            self.add_course(index)
+        many, data = self.count_queries(user)
+        self.assertEqual(len(data), 6)
+        self.assertTrue(all('course' in row for row in data))
+        self.assertEqual(one, many)
+
+    def test_student_query_count_is_constant(self):
+        self.assert_constant_queries(self.student)
+
+    def test_teacher_query_count_is_constant(self):
+        self.assert_constant_queries(self.teacher)
+
+
+class SessionGeneratorTests(TestCase):
+    """create_sessions() must produce the sessions the day-by-day loop did, in one insert."""
+
+    def test_recurrence_dates_match_day_by_day(self):
+        start = date(2025, 1, 1)
+        for days in (['Monday', 'Wednesday', 'Friday'], ['Saturday'], ['Sunday', 'Monday'], []):
+            for span in (0, 1, 6, 7, 30, 365):
+                end = start + timedelta(days=span)
+                expected = [
+                    start + timedelta(days=offset) for offset in range(span + 1)
+                    if (start + timedelta(days=offset)).strftime('%A') in days
+                ]
+                self.assertEqual(recurrence_dates(start, end, days), expected)
+
+    def test_create_sessions_uses_one_insert(self):
+        teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='pass', role='teacher'
+        )
+        course = Course.objects.create(name='Course', description='Test course', category='testing', base_price=100)
+        start, end = date(2025, 1, 6), date(2025, 3, 30)
+        schedule = ClassSchedule.objects.create(
+            course=course, teacher=teacher, batch='weekends', batch_start_date=start, batch_end_date=end
+        )
+        rules = [
+            {'start_date': start, 'end_date': end, 'days': ['Saturday'], 'start_time': time(10), 'end_time': time(12)},
+            {'start_date': start, 'end_date': end, 'days': ['Sunday'], 'start_time': time(14), 'end_time': time(16)},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            created = create_sessions(schedule, rules)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "class_sessions"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(len(created), 24)
+        self.assertEqual(schedule.summary.session_count, 24)
+        self.assertEqual(schedule.summary.days, ['Saturday', 'Sunday'])
+
+    def test_find_conflicts_reports_every_overlap(self):
+        teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='pass', role='teacher'
+        )
+        course = Course.objects.create(name='Course', description='Test course', category='testing', base_price=100)
+        start, end = date(2025, 1, 6), date(2025, 3, 30)
+        schedule = ClassSchedule.objects.create(
+            course=course, teacher=teacher, batch='weekdays', batch_start_date=start, batch_end_date=end
+        )
+        weekly = {'start_date': start, 'end_date': end, 'days': ['Monday', 'Wednesday'], 'start_time': time(9), 'end_time': time(10)}
+        create_sessions(schedule, [weekly])
+
+        # Overlaps Monday sessions only; Tuesday and back-to-back sessions do not conflict
+        planned = rule_intervals(dict(weekly, days=['Monday', 'Tuesday'], start_time=time(9, 30), end_time=time(11)))
+        planned += rule_intervals(dict(weekly, days=['Wednesday'], start_time=time(10), end_time=time(11)))
+        # The teacher's sessions in the window, and schedules with occurrences not materialized
+        with self.assertNumQueries(2):
+            conflicts = find_conflicts(teacher.id, planned)
+        mondays = recurrence_dates(start, end, ['Monday'])
+        self.assertEqual([existing.session_date for _, _, existing in conflicts], mondays)
+        self.assertEqual([start_time for start_time, _, _ in conflicts], sorted(start_time for start_time, _, _ in conflicts))
+
+        session = ClassSession.objects.filter(schedule=schedule).first()
+        self.assertEqual(find_conflicts(teacher.id, [(session.start_time, session.end_time)], exclude=[session.pk]), [])
+
+    def test_sessions_follow_schedule_teacher(self):
+        teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='pass', role='teacher'
+        )
+        other = User.objects.create_user(
+            email='other@example.com', username='other', password='pass', role='teacher'
+        )
+        course = Course.objects.create(name='Course', description='Test course', category='testing', base_price=100)
+        start = date(2025, 1, 6)
+        schedule = ClassSchedule.objects.create(
+            course=course, teacher=teacher, batch='weekdays', batch_start_date=start, batch_end_date=start + timedelta(days=13)
+        )
+        create_sessions(schedule, [
+            {'start_date': start, 'end_date': start + timedelta(days=13), 'days': ['Monday'], 'start_time': time(9), 'end_time': time(10)},
+        ])
+        ClassSession.objects.create(
+            schedule=schedule, session_date=start,
+            start_time=timezone.make_aware(datetime.combine(start, time(11))),
+            end_time=timezone.make_aware(datetime.combine(start, time(12))),
+        )
+        self.assertEqual(set(ClassSession.objects.values_list('teacher_id', flat=True)), {teacher.id})
+
+        schedule.teacher = other
+        schedule.save()
+        self.assertEqual(set(ClassSession.objects.values_list('teacher_id', flat=True)), {other.id})
+
+
+class OverlapConstraintTests(TestCase):
+    """Violations of the teacher overlap constraint are recognised by constraint name, not message text."""
+
+    def test_matches_constraint_name_only(self):
+        from types import SimpleNamespace
+        from django.db import IntegrityError
+        from edu_platform.utility.session_generator import OVERLAP_CONSTRAINT, is_overlap_violation
+
+        def integrity_error(message, constraint_name):
+            # Stands in for the psycopg2 error Django chains as __cause__
+            cause = Exception(message)
+            cause.diag = SimpleNamespace(constraint_name=constraint_name)
+            error = IntegrityError(message)
+            error.__cause__ = cause
+            return error
+
+        self.assertTrue(is_overlap_violation(integrity_error('conflicting key value', OVERLAP_CONSTRAINT)))
+        self.assertFalse(is_overlap_violation(integrity_error(f'{OVERLAP_CONSTRAINT} mentioned', 'class_sessions_pkey')))
+        self.assertFalse(is_overlap_violation(IntegrityError(OVERLAP_CONSTRAINT)))
+
+    @skipUnless(connection.vendor == 'postgresql', "the overlap constraint exists only on PostgreSQL")
+    def test_database_rejects_overlapping_sessions(self):
+        from django.core.exceptions import ValidationError
+        teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='pass', role='teacher'
+        )
+        courses = [
+            Course.objects.create(name=f'Course {i}', description='Test course', category='testing', base_price=100)
+            for i in range(2)
+        ]
+        day = date(2025, 1, 6)
+        schedules = [
+            ClassSchedule.objects.create(
+                course=course, teacher=teacher, batch='weekdays', batch_start_date=day, batch_end_date=day
+            )
+            for course in courses
+        ]
+        ClassSession.objects.create(
+            schedule=schedules[0], session_date=day,
+            start_time=timezone.make_aware(datetime.combine(day, time(9))),
+            end_time=timezone.make_aware(datetime.combine(day, time(10))),
+        )
+        # save() skips clean(), so only the constraint can catch this one
+        with self.assertRaises(ValidationError) as raised:
+            ClassSession.objects.create(
+                schedule=schedules[1], session_date=day,
+                start_time=timezone.make_aware(datetime.combine(day, time(9, 30))),
+                end_time=timezone.make_aware(datetime.combine(day, time(10, 30))),
+            )
+        self.assertIn('already has a class', str(raised.exception))
+        self.assertEqual(raised.exception.__cause__.__cause__.diag.constraint_name, 'class_sessions_teacher_no_overlap')
+        self.assertEqual(ClassSession.objects.filter(teacher=teacher).count(), 1)
+
+class CurrentPricingTests(TestCase):
+    """Course.current_pricing follows pricing writes and is never clobbered by a course save."""
+
+    def setUp(self):
+        self.course = Course.objects.create(name='Priced', description='Test course', category='testing', base_price=100)
+
+    def price(self, final_price):
+        return CoursePricing.objects.create(
+            course=self.course, original_price=100, discount_percent=100 - final_price, final_price=final_price
+        )
+
+    def current(self):
+        return Course.objects.get(pk=self.course.pk).current_pricing_id
+
+    def test_pointer_follows_the_latest_pricing(self):
+        first = self.price(90)
+        self.assertEqual(self.current(), first.pk)
+        second = self.price(80)
+        self.assertEqual(self.current(), second.pk)
+        # Saving an older pricing again keeps the newest one current
+        first.save()
+        self.assertEqual(self.current(), second.pk)
+
+    def test_delete_falls_back_to_the_previous_pricing(self):
+        first = self.price(90)
+        second = self.price(80)
+        second.delete()
+        self.assertEqual(self.current(), first.pk)
+        first.delete()
+        self.assertIsNone(self.current())
+
+    def test_course_save_does_not_write_back_a_stale_pointer(self):
+        stale = Course.objects.get(pk=self.course.pk)
+        pricing = self.price(90)
+        stale.name = 'Renamed'
+        stale.save()
+        self.assertEqual(self.current(), pricing.pk)
+        self.assertEqual(Course.objects.get(pk=self.course.pk).name, 'Renamed')
+
+    def test_course_save_skips_deferred_fields(self):
+        course = Course.objects.defer('description', 'search_vector').get(pk=self.course.pk)
+        Course.objects.filter(pk=self.course.pk).update(description='Changed elsewhere')
+        course.name = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            course.save()
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT')])
+        self.assertEqual(Course.objects.get(pk=self.course.pk).description, 'Changed elsewhere')
+
+
+class ScheduleSummaryTests(TestCase):
+    """ClassScheduleSummary follows session writes; deferred blocks refresh each schedule once."""
+
+    def setUp(self):
+        teacher = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass', role='teacher')
+        course = Course.objects.create(name='Course', description='Test course', category='testing', base_price=100)
+        self.monday = date.today() + timedelta(days=7 - date.today().weekday())
+        self.schedules = [
+            ClassSchedule.objects.create(
+                course=course, teacher=teacher, batch=batch,
+                batch_start_date=self.monday, batch_end_date=self.monday + timedelta(days=30)
+            )
+            for batch in ('weekdays', 'weekends')
+        ]
+
+    def session(self, schedule, day, hour):
+        return ClassSession.objects.create(
+            schedule=schedule, session_date=day,
+            start_time=timezone.make_aware(datetime.combine(day, time(hour))),
+            end_time=timezone.make_aware(datetime.combine(day, time(hour + 1))),
+        )
+
+    def summary(self, schedule):
+        from edu_platform.models import ClassScheduleSummary
+        return ClassScheduleSummary.objects.filter(schedule=schedule).first()
+
+    def test_rebuilt_on_save_and_delete(self):
+        from edu_platform.utility.schedule_summary import format_time_range
+        schedule = self.schedules[0]
+        monday = self.session(schedule, self.monday, 9)
+        self.assertEqual(self.summary(schedule).days, ['Monday'])
+        self.assertEqual(self.summary(schedule).time, format_time_range(monday.start_time, monday.end_time))
+
+        saturday = self.session(schedule, self.monday + timedelta(days=5), 14)
+        summary = self.summary(schedule)
+        self.assertEqual((summary.days, summary.session_count), (['Monday', 'Saturday'], 2))
+        self.assertEqual(summary.saturday_time, format_time_range(saturday.start_time, saturday.end_time))
+        self.assertIsNone(summary.sunday_time)
+
+        saturday.start_time += timedelta(hours=1)
+        saturday.end_time += timedelta(hours=1)
+        saturday.save()
+        self.assertEqual(self.summary(schedule).saturday_time, format_time_range(saturday.start_time, saturday.end_time))
+
+        monday.delete()
+        summary = self.summary(schedule)
+        self.assertEqual((summary.days, summary.session_count), (['Saturday'], 1))
+        self.assertEqual(summary.time, summary.saturday_time)
+        saturday.delete()
+        self.assertIsNone(self.summary(schedule))
+
+    def test_deferred_block_refreshes_each_schedule_once(self):
+        from unittest import mock
+        from edu_platform.utility import schedule_summary
+        with mock.patch.object(schedule_summary, 'refresh_schedule_summary') as refresh:
+            with schedule_summary.deferred_schedule_summaries():
+                for schedule in self.schedules:
+                    with schedule_summary.deferred_schedule_summaries():
+                        for offset in range(3):
+                            self.session(schedule, self.monday + timedelta(days=offset), 9)
+                self.session(self.schedules[0], self.monday + timedelta(days=3), 9).delete()
+                refresh.assert_not_called()
+        self.assertEqual(sorted(call.args[0] for call in refresh.call_args_list), sorted(s.pk for s in self.schedules))
+
+    def test_migration_copy_matches_live_code(self):
+        import importlib
+        from edu_platform.utility.schedule_summary import summarize_occurrences, summarize_sessions
+        frozen = importlib.import_module('edu_platform.migrations.0002_class_schedule_summary')
+        for offset, hour in [(0, 9), (2, 11), (5, 14), (6, 10), (7, 8), (12, 16), (13, 7)]:
+            self.session(self.schedules[offset % 2], self.monday + timedelta(days=offset), hour)
+        for schedule in self.schedules:
+            sessions = ClassSession.objects.filter(schedule=schedule)
+            live = summarize_sessions(sessions)
+            self.assertEqual(frozen.summarize_sessions(sessions), live)
+            self.assertEqual(summarize_occurrences(list(sessions.order_by('start_time'))), live)
+
+
+class LazySessionTests(TestCase):
+    """With SESSION_MATERIALIZE_DAYS, only near occurrences get rows; the rest expand from the recurrence."""
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='pass', role='teacher'
+        )
+        course = Course.objects.create(name='Course', description='Test course', category='testing', base_price=100)
+        self.start = timezone.localdate() + timedelta(days=7)
+        self.end = self.start + timedelta(days=364)
+        self.schedule = ClassSchedule.objects.create(
+            course=course, teacher=self.teacher, batch='weekdays', batch_start_date=self.start, batch_end_date=self.end
+        )
+        self.rule = {
+            'start_date': self.start, 'end_date': self.end, 'days': ['Monday', 'Wednesday', 'Friday'],
+            'start_time': time(9), 'end_time': time(10),
+        }
+        self.holiday = recurrence_dates(self.start, self.end, self.rule['days'])[-1]
+
+    @override_settings(SESSION_MATERIALIZE_DAYS=14)
+    def test_rows_only_inside_window(self):
+        create_sessions(self.schedule, [self.rule], [self.holiday])
+        expected = [day for day in recurrence_dates(self.start, self.end, self.rule['days']) if day != self.holiday]
+
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.sessions_materialized_until, self.start + timedelta(days=14))
+        rows = ClassSession.objects.filter(schedule=self.schedule)
+        self.assertTrue(rows.exists())
+        self.assertFalse(rows.filter(session_date__gt=self.schedule.sessions_materialized_until).exists())
+
+        occurrences = schedule_occurrences(self.schedule)
+        self.assertEqual([session.session_date for session in occurrences], expected)
+        self.assertEqual(self.schedule.summary.session_count, len(expected))
+        self.assertEqual(self.schedule.summary.days, ['Friday', 'Monday', 'Wednesday'])
+
+        # Occurrences without rows still count as conflicts
+        late = occurrences[-1]
+        conflicts = find_conflicts(self.teacher.id, [(late.start_time, late.end_time)])
+        self.assertEqual(len(conflicts), 1)
+        self.assertIsNone(conflicts[0][2].pk)
+
+        self.assertEqual(materialize_sessions(self.schedule.id), [])
+        with self.settings(SESSION_MATERIALIZE_DAYS=400):
+            materialize_sessions(self.schedule.id)
+        self.schedule.refresh_from_db()
+        self.assertIsNone(self.schedule.sessions_materialized_until)
+        self.assertEqual(list(ClassSession.objects.filter(schedule=self.schedule).order_by('session_date').values_list('session_date', flat=True)), expected)
+
+    @override_settings(SESSION_MATERIALIZE_DAYS=14)
+    def test_schedule_api_with_lazy_occurrences(self):
+        create_sessions(self.schedule, [self.rule])
+        admin = User.objects.create_user(email='admin@example.com', username='admin', password='pass', role='admin')
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        # A clash with an occurrence that has no row yet reports a null class id
+        late = schedule_occurrences(self.schedule)[-1].session_date
+        response = client.post(reverse('class-schedule-list'), {
+            'course_id': self.schedule.course_id, 'teacher_id': self.teacher.id, 'batch': 'weekdays',
+            'weekdays_start_date': str(late), 'weekdays_end_date': str(late),
+            'weekdays_days': [late.strftime('%A')], 'weekdays_start': '9:30 AM', 'weekdays_end': '10:30 AM',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(response.data['data'][0]['existing_class_id'])
+
+        response = client.put(
+            reverse('class-schedule-detail', args=[self.schedule.id]),
+            {'weekdays_end_date': str(self.end + timedelta(days=30))}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cannot be changed', str(response.data['message']))
+
+    @override_settings(SESSION_MATERIALIZE_DAYS=14)
+    def test_daily_run_writes_rows_that_entered_the_window(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from edu_platform.utility.session_generator import materialize_due_sessions
+        create_sessions(self.schedule, [self.rule])
+        self.assertEqual(materialize_due_sessions(), (0, []))
+        rows = ClassSession.objects.filter(schedule=self.schedule).count()
+        with self.settings(SESSION_MATERIALIZE_DAYS=28):
+            created, skipped = materialize_due_sessions()
+        self.assertGreater(created, 0)
+        self.assertEqual(skipped, [])
+        self.assertEqual(ClassSession.objects.filter(schedule=self.schedule).count(), rows + created)
+        out = StringIO()
+        call_command('materialize_sessions', stdout=out)
+        self.assertIn('Created 0 class sessions', out.getvalue())
+
+    def test_everything_materialized_by_default(self):
+        create_sessions(self.schedule, [self.rule])
+        self.schedule.refresh_from_db()
+        self.assertIsNone(self.schedule.sessions_materialized_until)
+        self.assertEqual(self.schedule.recurrence['rules'][0]['start_time'], '09:00')
+        self.assertEqual(ClassSession.objects.filter(schedule=self.schedule).count(), len(schedule_occurrences(self.schedule)))
+
+
+class ScheduleImportTests(TestCase):
+    """The schedule import validates every row before writing any, then creates them in bulk."""
+
+    HEADER = ['course_id', 'teacher_email', 'batch', 'start_date', 'end_date', 'days', 'start_time', 'end_time']
+
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', password='pass', role='admin')
+        self.teachers = [
+            User.objects.create_user(email=f'teacher{i}@example.com', username=f'teacher{i}', password='pass', role='teacher')
+            for i in range(3)
+        ]
+        self.courses = [
+            Course.objects.create(name=f'Course {i}', description='Test course', category='testing', base_price=100)
+            for i in range(3)
+        ]
+        self.start = timezone.localdate() + timedelta(days=7)
+        self.end = self.start + timedelta(days=27)
+
+    def workbook(self, rows):
+        from io import BytesIO
+        from openpyxl import Workbook
+
+        book = Workbook()
+        book.active.append(self.HEADER)
+        for row in rows:
+            book.active.append(row)
+        data = BytesIO()
+        book.save(data)
+        data.seek(0)
+        data.name = 'schedules.xlsx'
+        return data
+
+    def row(self, index, days='Monday, Wednesday', start_time='9:00 AM', end_time='10:00 AM'):
+        return [self.courses[index].id, self.teachers[index].email, 'weekdays', self.start, self.end, days, start_time, end_time]
+
+    def csv_file(self, rows, encoding='utf-8'):
+        import csv
+        from io import BytesIO, StringIO
+
+        text = StringIO()
+        writer = csv.writer(text)
+        writer.writerow(self.HEADER)
+        writer.writerows(rows)
+        data = BytesIO(text.getvalue().encode(encoding))
+        data.name = 'schedules.csv'
+        return data
+
+    def post(self, rows, file=None):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        return client.post(reverse('class-schedule-import'), {'file': file or self.workbook(rows)}, format='multipart')
+
+    def test_import_creates_schedules_and_sessions(self):
+        response = self.post([self.row(0), self.row(1, days='Tuesday')])
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['data']['created'], 2)
+        schedule = ClassSchedule.objects.get(course=self.courses[0])
+        expected = recurrence_dates(self.start, self.end, ['Monday', 'Wednesday'])
+        self.assertEqual(list(schedule.sessions.order_by('session_date').values_list('session_date', flat=True)), expected)
+        self.assertEqual(schedule.summary.session_count, len(expected))
+        self.assertEqual(schedule.recurrence['rules'][0]['days'], ['Monday', 'Wednesday'])
+
+    def test_import_from_csv(self):
+        rows = [self.row(0), self.row(1, days='Tuesday')]
+        response = self.post(rows, file=self.csv_file(rows))
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['data']['created'], 2)
+        self.assertEqual(ClassSchedule.objects.get(course=self.courses[1]).recurrence['rules'][0]['days'], ['Tuesday'])
+
+    def test_unreadable_files_are_rejected(self):
+        latin = self.row(0)
+        latin[2] = 'weekdays \xe9t\xe9'
+        response = self.post([], file=self.csv_file([latin], encoding='latin-1'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Could not read the file', str(response.data['message']))
+
+        huge = self.row(0)
+        huge[0] = '1e400'
+        response = self.post([huge, self.row(1)])
+        self.assertEqual(response.status_code, 400)
+        errors = {report['row']: report['errors'] for report in response.data['data']['errors']}
+        self.assertEqual(errors, {2: ['Course ID must be a number.']})
+
+    def test_errors_reported_per_row_and_nothing_created(self):
+        # Teacher 2 already teaches Mondays 9:30; row 3 clashes with it, row 4 with row 2
+        existing = ClassSchedule.objects.create(
+            course=self.courses[2], teacher=self.teachers[2], batch='weekdays', batch_start_date=self.start, batch_end_date=self.end
+        )
+        create_sessions(existing, [{
+            'start_date': self.start, 'end_date': self.end, 'days': ['Monday'], 'start_time': time(9, 30), 'end_time': time(10, 30)
+        }])
+        clash = self.row(2)
+        second = self.row(0, days='Monday', start_time='9:30 AM', end_time='11:00 AM')
+        bad_time = self.row(1, start_time='25:00')
+
+        response = self.post([self.row(0), clash, second, bad_time])
+
+        self.assertEqual(response.status_code, 400)
+        errors = {report['row']: report['errors'] for report in response.data['data']['errors']}
+        self.assertEqual(set(errors), {2, 3, 4, 5})
+        self.assertIn('overlaps the session of row 4', errors[2][0])
+        self.assertIn('conflicting session', errors[3][0])
+        self.assertIn("Invalid time format", errors[5][0])
+        self.assertEqual(ClassSchedule.objects.count(), 1)
+
+
+class CalendarFeedTests(TestCase):
+    """ICS feeds list the user's sessions and answer unchanged polls with 304."""
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass', role='teacher')
+        self.student = User.objects.create_user(email='student@example.com', username='student', password='pass', role='student')
+        course = Course.objects.create(name='Algebra, part 1', description='Test course', category='testing', base_price=100)
+        self.start = timezone.localdate() + timedelta(days=7)
+        end = self.start + timedelta(days=13)
+        self.schedule = ClassSchedule.objects.create(
+            course=course, teacher=self.teacher, batch='weekdays', batch_start_date=self.start, batch_end_date=end
+        )
+        create_sessions(self.schedule, [
+            {'start_date': self.start, 'end_date': end, 'days': ['Monday', 'Thursday'], 'start_time': time(9), 'end_time': time(10)}
+        ])
+        subscription = CourseSubscription.objects.create(
+            student=self.student, course=course, amount_paid=90, batch='weekdays',
+            start_date=self.start, end_date=end, start_time=time(9), end_time=time(10), payment_status='completed'
+        )
+        CourseEnrollment.objects.create(
+            student=self.student, course=course, subscription=subscription, batch='weekdays',
+            start_date=self.start, end_date=end, start_time=time(9), end_time=time(10), price=90
+        )
+
+    def feed_url(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(reverse('calendar-feed-link'))
+        self.assertEqual(response.status_code, 200)
+        return response.data['data']['url']
+
+    def test_feed_lists_sessions_and_revalidates(self):
+        url = self.feed_url(self.teacher)
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/calendar'))
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.count('BEGIN:VEVENT'), self.schedule.sessions.count())
+        self.assertIn('SUMMARY:Algebra\\, part 1 (weekdays)', body)
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+
+        self.assertEqual(APIClient().get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.schedule.sessions.first().delete()
+        changed = APIClient().get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(b''.join(changed.streaming_content).decode().count('BEGIN:VEVENT'), self.schedule.sessions.count())
+
+    def test_student_feed_and_bad_token(self):
+        url = self.feed_url(self.student)
+        body = b''.join(APIClient().get(url).streaming_content).decode()
+        self.assertEqual(body.count('BEGIN:VEVENT'), self.schedule.sessions.count())
+
+        tampered = url.replace(f'/{self.student.pk}.', f'/{self.teacher.pk}.')
+        self.assertNotEqual(tampered, url)
+        self.assertEqual(APIClient().get(tampered).status_code, 404)
+        self.assertEqual(APIClient().get(tampered, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+    def test_rotating_revokes_old_url(self):
+        old_url = self.feed_url(self.teacher)
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        new_url = client.post(reverse('calendar-feed-link')).data['data']['url']
+        self.assertNotEqual(new_url, old_url)
+        self.assertEqual(APIClient().get(old_url).status_code, 404)
+        self.assertEqual(APIClient().get(new_url).status_code, 200)
+
+    def test_async_stream_matches_sync(self):
+        from asgiref.sync import async_to_sync
+        from edu_platform.utility.calendar_feed import astream_feed, stream_feed
+
+        async def collect(chunks):
+            return [chunk async for chunk in chunks]
+
+        self.assertEqual(''.join(async_to_sync(collect)(astream_feed(self.teacher))), ''.join(stream_feed(self.teacher)))
+
+
+class FakeWhiteboardRedis:
+    """The few Redis commands the whiteboard uses, with MULTI/EXEC pipelines applied as one step."""
+
+    def __init__(self):
+        self.data = {}
+        self.pipelines = []
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    async def lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        return list(items[start:] if end == -1 else items[start:end + 1])
+
+    async def ltrim(self, key, start, end):
+        self.data[key] = self.data.get(key, [])[start:] if end == -1 else self.data.get(key, [])[start:end + 1]
+
+    async def eval(self, script, numkeys, *args):
+        from edustream import whiteboard
+        keys, argv = args[:numkeys], args[numkeys:]
+        if script == whiteboard._RELEASE_SCRIPT:
+            if self.data.get(keys[0]) == argv[0]:
+                del self.data[keys[0]]
+                return 1
+            return 0
+        seq = int(self.data.get(keys[0], 0))
+        for payload in argv[1:]:
+            seq += 1
+            self.data.setdefault(keys[1], []).append(f"{seq}|{payload}")
+        self.data[keys[0]] = str(seq)
+        return seq
+
+    def pipeline(self, transaction=True):
+        self.pipelines.append(transaction)
+        fake = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+            async def execute(self):
+                return [await getattr(fake, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+        return Pipeline()
+
+
+class WhiteboardTests(TestCase):
+    """Op compaction and the snapshot + tail handed to late joiners."""
+
+    def test_compact_ops(self):
+        from edustream.whiteboard import compact_ops
+        ops = [
+            {'type': 'stroke', 'id': 1, 'points': [1]},
+            {'type': 'append', 'id': 1, 'points': [2]},
+            {'type': 'stroke', 'id': 2, 'points': [5]},
+            {'type': 'delete', 'id': 2},
+            {'type': 'append', 'id': 9, 'points': [7]},
+        ]
+        self.assertEqual(compact_ops(ops), [
+            {'type': 'stroke', 'id': 1, 'points': [1, 2]},
+            {'type': 'append', 'id': 9, 'points': [7]},
+        ])
+        self.assertEqual(compact_ops(ops + [{'type': 'clear'}]), [{'type': 'clear'}])
+        # The input ops are not modified
+        self.assertEqual(ops[0]['points'], [1])
+
+    def test_apply_ops(self):
+        from edustream.whiteboard import apply_ops
+        strokes = apply_ops({}, [
+            {'type': 'stroke', 'id': 1, 'points': [1]},
+            {'type': 'append', 'id': 1, 'points': [2]},
+            {'type': 'stroke', 'id': 2, 'points': [3]},
+            {'type': 'delete', 'id': 2},
+            {'type': 'append', 'id': 3, 'points': [4]},
+        ])
+        self.assertEqual(strokes, {'1': {'type': 'stroke', 'id': 1, 'points': [1, 2]}})
+        self.assertEqual(apply_ops(strokes, [{'type': 'clear'}]), {})
+
+    def test_load_state_after_compaction(self):
+        import asyncio
+        from edustream.whiteboard import append_ops, compact_snapshot, load_state
+        redis = FakeWhiteboardRedis()
+
+        async def scenario():
+            await append_ops(redis, 'room', [{'type': 'stroke', 'id': 1, 'points': [1]}, {'type': 'append', 'id': 1, 'points': [2]}])
+            await compact_snapshot(redis, 'room')
+            await append_ops(redis, 'room', [{'type': 'stroke', 'id': 2, 'points': [3]}])
+            return await load_state(redis, 'room')
+
+        state = asyncio.run(scenario())
+        self.assertEqual(state['snapshot']['seq'], 2)
+        self.assertEqual(state['snapshot']['strokes'], [{'type': 'stroke', 'id': 1, 'points': [1, 2]}])
+        self.assertEqual(state['ops'], [{'seq': 3, 'op': {'type': 'stroke', 'id': 2, 'points': [3]}}])
+        # Both keys are read in one MULTI/EXEC
+        self.assertTrue(redis.pipelines[-1])
+        self.assertNotIn('whiteboard:room:compact_lock', redis.data)
+
+    def test_compaction_keeps_lock_taken_by_another_worker(self):
+        import asyncio
+        from edustream import whiteboard
+
+        class ExpiringLockRedis(FakeWhiteboardRedis):
+            async def lrange(self, key, start, end):
+                # The lock expires mid-compaction and another worker takes it
+                self.data['whiteboard:room:compact_lock'] = 'other-worker'
+                return await super().lrange(key, start, end)
+
+        redis = ExpiringLockRedis()
+
+        async def scenario():
+            await whiteboard.append_ops(redis, 'room', [{'type': 'clear'}])
+            await whiteboard.compact_snapshot(redis, 'room')
+
+        asyncio.run(scenario())
+        self.assertEqual(redis.data['whiteboard:room:compact_lock'], 'other-worker')
+
+
+class FakeBlacklistRedis:
+    """The Redis commands RedisBlacklistBackend uses, shared between two backends as two workers would."""
+
+    def __init__(self):
+        self.keys = set()
+        self.log = {}
+        self.clock = 1000.0
+        self.reads = []
+        self.locks = []
+
+    def eval(self, script, numkeys, key, log_key, jti, ttl, retention):
+        # _REVOKE_SCRIPT: scores come from the server clock
+        self.clock += 0.000001
+        self.keys.add(key)
+        self.log[jti] = self.clock
+        return str(self.clock)
+
+    def zrangebyscore(self, key, low, high, withscores=False):
+        self.reads.append(low)
+        self.locks.extend(backend._lock.locked() for backend in getattr(self, 'backends', ()))
+        low = float(low)
+        return sorted(((jti, score) for jti, score in self.log.items() if score >= low), key=lambda entry: entry[1])
+
+    def exists(self, key):
+        return int(key in self.keys)
+
+
+class TokenBlacklistTests(TestCase):
+    """Revocations reach other workers within SYNC_INTERVAL; misses never wait on Redis."""
+
+    def workers(self, sync_interval):
+        from edu_platform.token_blacklist import RedisBlacklistBackend
+        shared = FakeBlacklistRedis()
+        shared.backends = []
+        for _ in range(2):
+            backend = RedisBlacklistBackend({'REDIS_URL': 'redis://localhost:6379/1', 'SYNC_INTERVAL': sync_interval})
+            backend.redis = shared
+            shared.backends.append(backend)
+        return shared, shared.backends
+
+    def test_revocation_seen_by_other_worker_after_sync_interval(self):
+        from unittest import mock
+        shared, (first, second) = self.workers(sync_interval=1.0)
+        with mock.patch('edu_platform.token_blacklist.time.monotonic', return_value=100.0):
+            self.assertFalse(second.is_blacklisted('jti-1'))
+            first.blacklist_jti('jti-1', expires_at=datetime.now().timestamp() + 60)
+            # Seen at once where it was revoked; within the window on the other worker
+            self.assertTrue(first.is_blacklisted('jti-1'))
+            self.assertFalse(second.is_blacklisted('jti-1'))
+        with mock.patch('edu_platform.token_blacklist.time.monotonic', return_value=101.0):
+            self.assertTrue(second.is_blacklisted('jti-1'))
+            self.assertFalse(second.is_blacklisted('jti-2'))
+        self.assertEqual(shared.locks, [False] * len(shared.locks))
+
+    def test_misses_between_syncs_skip_redis(self):
+        shared, (first, second) = self.workers(sync_interval=3600)
+        self.assertFalse(second.is_blacklisted('jti-1'))
+        shared.exists = None  # any EXISTS would now fail
+        for index in range(100):
+            self.assertFalse(second.is_blacklisted(f'clean-{index}'))
+        self.assertEqual(shared.reads, ['-inf'])
+
+    def test_incremental_sync_reads_from_last_score(self):
+        shared, (first, second) = self.workers(sync_interval=0)
+        self.assertFalse(second.is_blacklisted('jti-1'))
+        first.blacklist_jti('jti-1', expires_at=datetime.now().timestamp() + 60)
+        self.assertTrue(second.is_blacklisted('jti-1'))
+        self.assertEqual(shared.reads[-1], 0)
+        self.assertTrue(second.is_blacklisted('jti-1'))
+        self.assertEqual(shared.reads[-1], shared.log['jti-1'])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    COURSE_LIST_CACHE_WAIT=0.1,
+)
+class CourseListCacheTests(TestCase):
+    """Requests that lose the race for a cold listing do not sleep for long on a DB connection."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        from edu_platform.utility.course_listing import CourseAudience
+        self.audience = CourseAudience(role='admin')
+
+    def test_lock_loser_serves_previous_listing(self):
+        from django.core.cache import cache
+        from edu_platform.utility import course_list_cache
+        self.assertEqual(course_list_cache.get_course_list(self.audience, {}, lambda: ['old']), ['old'])
+        course_list_cache.bump_version()
+        key = course_list_cache.LIST_KEY.format(
+            version=course_list_cache.get_version(), audience='admin', params=course_list_cache.params_key({})
+        )
+        cache.add(f"{key}:lock", 1)
+        started = datetime.now()
+        self.assertEqual(course_list_cache.get_course_list(self.audience, {}, lambda: ['new']), ['old'])
+        self.assertLess((datetime.now() - started).total_seconds(), 0.05)
+
+    def test_startup_warms_the_key_students_read(self):
+        from unittest import mock
+        from edustream.lifespan import warm_course_list
+        Course.objects.create(name='Warm', description='Test course', category='testing', base_price=100)
+        self.assertEqual(warm_course_list(), 2)
+        student = User.objects.create_user(email='warm@example.com', username='warm', password='pass', role='student')
+        client = APIClient()
+        client.force_authenticate(student)
+        with mock.patch('edu_platform.views.course_views.list_courses') as list_courses:
+            response = client.get(reverse('course_list'))
+        self.assertEqual(response.status_code, 200)
+        list_courses.assert_not_called()
+        self.assertEqual([course['name'] for course in response.data['data']], ['Warm'])
+
+    def test_listing_is_built_from_the_audience_alone(self):
+        from edu_platform.utility.course_listing import CourseAudience, list_courses
+        course = Course.objects.create(name='Shared', description='Test course', category='testing', base_price=100)
+        start = date.today() + timedelta(days=7)
+        teachers = {}
+        for batch in ('weekdays', 'weekends'):
+            teachers[batch] = User.objects.create_user(email=f'{batch}@example.com', username=batch, password='pass', role='teacher')
+            ClassSchedule.objects.create(
+                course=course, teacher=teachers[batch], batch=batch, batch_start_date=start, batch_end_date=start + timedelta(days=30)
+            )
+        for batch, teacher in teachers.items():
+            listing = list_courses(CourseAudience(role='teacher', user_id=teacher.id), {'fields': 'name,batches'})
+            self.assertEqual(listing['data'], [{'name': 'Shared', 'batches': [batch]}])
+        listing = list_courses(CourseAudience(role='student', purchased_course_ids=(course.id,)), {})
+        self.assertEqual(listing['data'], [])
+
+    def test_lock_loser_computes_after_short_wait(self):
+        from django.core.cache import cache
+        from edu_platform.utility import course_list_cache
+        key = course_list_cache.LIST_KEY.format(
+            version=course_list_cache.get_version(), audience='admin', params=course_list_cache.params_key({})
+        )
+        cache.add(f"{key}:lock", 1)
+        started = datetime.now()
+        self.assertEqual(course_list_cache.get_course_list(self.audience, {}, lambda: ['new']), ['new'])
+        self.assertLess((datetime.now() - started).total_seconds(), 1)
+
+
+class RecordingSpoolTests(TestCase):
+    """Only a wrong offset is a conflict the client can resume from."""
+
+    def test_offset_conflict_is_distinct_from_bad_chunk(self):
+        import hashlib
+        import io
+        import tempfile
+        from edu_platform.utility import recording_spool
+        body = b'chunk'
+        with tempfile.TemporaryDirectory() as root, self.settings(RECORDING_SPOOL_ROOT=root):
+            size = recording_spool.append_chunk(1, 0, io.BytesIO(body), len(body), hashlib.sha256(body).hexdigest())
+            with self.assertRaises(recording_spool.OffsetConflict) as raised:
+                recording_spool.append_chunk(1, 0, io.BytesIO(body), len(body), hashlib.sha256(body).hexdigest())
+            self.assertEqual(raised.exception.current_size, size)
+            with self.assertRaises(recording_spool.ChunkError) as raised:
+                recording_spool.append_chunk(1, size, io.BytesIO(body), len(body), '0' * 64)
+            self.assertNotIsInstance(raised.exception, recording_spool.OffsetConflict)
+            self.assertEqual(recording_spool.spool_size(1), size)
+
+
+
+    def test_appends_wait_for_the_spool_lock(self):
+        import hashlib
+        import io
+        import tempfile
+        import threading
+        from edu_platform.utility import recording_spool
+        body = b'chunk'
+        with tempfile.TemporaryDirectory() as root, self.settings(RECORDING_SPOOL_ROOT=root):
+            results = []
+            append = threading.Thread(target=lambda: results.append(
+                recording_spool.append_chunk(1, 0, io.BytesIO(body), len(body), hashlib.sha256(body).hexdigest())
+            ))
+            with recording_spool.spool_lock(1):
+                append.start()
+                append.join(0.2)
+                self.assertTrue(append.is_alive())
+                self.assertEqual(recording_spool.spool_size(1), 0)
+            append.join(5)
+            self.assertEqual(results, [len(body)])
+
+class RecordingChunkViewTests(TestCase):
+    """Chunks are appended at byte offsets; clients resume from the offset the server reports."""
+
+    def setUp(self):
+        import tempfile
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        override = self.settings(RECORDING_SPOOL_ROOT=f'{root.name}/spool', MEDIA_ROOT=f'{root.name}/media')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.teacher = User.objects.create_user(email='rec@example.com', username='rec', password='pass', role='teacher')
+        course = Course.objects.create(name='Course', description='Test course', category='testing', base_price=100)
+        day = date(2025, 1, 6)
+        schedule = ClassSchedule.objects.create(
+            course=course, teacher=self.teacher, batch='weekdays', batch_start_date=day, batch_end_date=day
+        )
+        self.session = ClassSession.objects.create(
+            schedule=schedule, session_date=day,
+            start_time=timezone.make_aware(datetime.combine(day, time(9))),
+            end_time=timezone.make_aware(datetime.combine(day, time(10))),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+        self.url = reverse('recording_chunks', args=[self.session.id])
+
+    def put(self, offset, body, checksum=None):
+        import hashlib
+        return self.client.put(
+            f'{self.url}?offset={offset}', data=body, content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(body).hexdigest(),
+        )
+
+    def test_resume_and_finalize(self):
+        import hashlib
+        response = self.put(0, b'first-')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['data']['offset'], 6)
+        # After a dropped connection the client asks where to continue
+        self.assertEqual(self.client.get(self.url).data['data']['offset'], 6)
+        self.assertEqual(self.put(6, b'second').data['data']['offset'], 12)
+
+        response = self.client.post(
+            reverse('recording_finalize', args=[self.session.id]),
+            {'size': 12, 'sha256': hashlib.sha256(b'first-second').hexdigest()}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.session.refresh_from_db()
+        with self.session.recording.open('rb') as recording:
+            self.assertEqual(recording.read(), b'first-second')
+        self.assertEqual(self.put(12, b'late').status_code, 409)
+
+    def test_offset_conflict_reports_current_offset(self):
+        self.put(0, b'first-')
+        response = self.put(0, b'first-')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['data']['offset'], 6)
+
+    def test_checksum_mismatch_leaves_spool_unchanged(self):
+        self.put(0, b'first-')
+        response = self.put(6, b'second', checksum='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['data']['offset'], 6)
+        self.assertEqual(self.client.get(self.url).data['data']['offset'], 6)
+
+    def test_other_teacher_forbidden(self):
+        other = User.objects.create_user(email='other@example.com', username='other', password='pass', role='teacher')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.put(0, b'first-').status_code, 403)
+
+class MetricsEndpointTests(TestCase):
+    """/metrics answers only allowed networks or the bearer token."""
+
+    def scrape(self, client_ip, headers=()):
+        import asyncio
+        from edustream.metrics import metrics_app
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/metrics', 'query_string': b'',
+            'headers': list(headers), 'client': (client_ip, 50000),
+        }
+        asyncio.run(metrics_app(scope, receive, send))
+        return sent[0]['status']
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.0/8'], METRICS_TOKEN='')
+    def test_allowlist(self):
+        self.assertEqual(self.scrape('10.1.2.3'), 200)
+        self.assertEqual(self.scrape('203.0.113.5'), 403)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN='s3cret')
+    def test_bearer_token(self):
+        self.assertEqual(self.scrape('203.0.113.5', [(b'authorization', b'Bearer s3cret')]), 200)
+        self.assertEqual(self.scrape('203.0.113.5', [(b'authorization', b'Bearer wrong')]), 403)
+        self.assertEqual(self.scrape('203.0.113.5'), 403)
+
+
+@skipUnless(connection.vendor == 'postgresql', "ranked search needs the PostgreSQL search_vector trigger and pg_trgm")
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CourseSearchTests(TestCase):
+    """Search ranks name matches first, tolerates typos, and pages by (relevance, id) without gaps."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', password='pass', role='admin')
+        self.named = Course.objects.create(
+            name='Python Programming', description='Learn to code', category='software', base_price=100
+        )
+        self.described = [
+            Course.objects.create(
+                name=f'Course {i}', description='Scripting with Python and friends', category='software', base_price=100
+            )
+            for i in range(4)
+        ]
+        Course.objects.create(name='Watercolour', description='Painting basics', category='art', base_price=100)
+
+    def search(self, search, **params):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get(reverse('course_list'), {'search': search, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def test_ranking(self):
+        from edu_platform.utility.course_search import search_courses
+        ranked = list(search_courses(Course.objects.all(), 'pyth'))
+        self.assertEqual(ranked[0], self.named)
+        self.assertEqual(set(ranked[1:]), set(self.described))
+        self.assertEqual([course.relevance for course in ranked], sorted((course.relevance for course in ranked), reverse=True))
+        # Typo: no prefix match, found through name trigram similarity
+        self.assertIn(self.named, search_courses(Course.objects.all(), 'Pyhton Programing'))
+
+    def test_keyset_pages_cover_every_match_once(self):
+        names, cursor = [], None
+        while True:
+            params = {'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            response = self.search('python', **params)
+            names += [course['name'] for course in response.data['data']]
+            cursor = response.data.get('next')
+            if not cursor:
+                break
+        self.assertEqual(names[0], 'Python Programming')
+        self.assertEqual(sorted(names[1:]), [f'Course {i}' for i in range(4)])
+        self.assertEqual(len(names), len(set(names)))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class KeysetPaginationTests(TestCase):
+    """Cursors walk every row once, ``paginate=false`` opts out, and malformed cursors are a 400."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', password='pass', role='admin')
+        self.teacher = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass', role='teacher')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        start = date.today() + timedelta(days=7)
+        for index in range(5):
+            course = Course.objects.create(
+                name=f'Course {index}', description='Test course', category=('art', 'science')[index % 2], base_price=100
+            )
+            ClassSchedule.objects.create(
+                course=course, teacher=self.teacher, batch='weekdays',
+                batch_start_date=start + timedelta(days=index), batch_end_date=start + timedelta(days=30)
+            )
+
+    def walk(self, url):
+        names, cursor, pages = [], None, 0
+        while True:
+            response = self.client.get(url, {'page_size': 2, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200, response.data)
+            names += [row['name'] if 'name' in row else row['id'] for row in response.data['data']]
+            pages += 1
+            cursor = response.data['next']
+            if not cursor:
+                return names, pages
+
+    def test_next_cursors_cover_every_row_once(self):
+        names, pages = self.walk(reverse('course_list'))
+        self.assertEqual(pages, 3)
+        self.assertEqual(names, ['Course 0', 'Course 2', 'Course 4', 'Course 1', 'Course 3'])
+
+    def test_paginate_false_returns_everything_without_next(self):
+        response = self.client.get(reverse('course_list'), {'paginate': 'false', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 5)
+        self.assertNotIn('next', response.data)
+
+    def assert_rejected(self, url, cursors):
+        from edu_platform.pagination import encode_cursor
+        for values in cursors:
+            cursor = values if isinstance(values, str) else encode_cursor(values)
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, (values, response.data))
+
+    def test_invalid_course_cursor(self):
+        self.assert_rejected(reverse('course_list'), [
+            'not base64!', ['art', 'Course 0'], ['cat', 'C0', 'abc'], ['cat', 'C0', None], ['cat', 'C0', {'id': 1}],
+        ])
+
+    def test_invalid_schedule_cursor(self):
+        self.assert_rejected(reverse('class-schedule-list'), [['soon', 1], [None, 1], [str(date.today()), 'abc']])
+
+    def test_invalid_my_courses_cursor(self):
+        student = User.objects.create_user(email='student@example.com', username='student', password='pass', role='student')
+        self.client.force_authenticate(student)
+        self.assert_rejected(reverse('my_courses'), [['yesterday', 1], [timezone.now().isoformat(), 'abc']])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SparseFieldsetTests(TestCase):
+    """``fields``/``exclude`` trim the output and the queries; unknown names are a 400."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from edu_platform.models import TeacherProfile
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', password='pass', role='admin')
+        self.teacher = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass', role='teacher')
+        TeacherProfile.objects.create(user=self.teacher, qualification='MSc', specialization=['Maths'])
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        start = date.today() + timedelta(days=7)
+        for index in range(3):
+            course = Course.objects.create(name=f'Course {index}', description='Test course', category='testing', base_price=100)
+            CoursePricing.objects.create(course=course, original_price=100, discount_percent=10, final_price=90 - index)
+            ClassSchedule.objects.create(
+                course=course, teacher=self.teacher, batch='weekdays', batch_start_date=start, batch_end_date=start + timedelta(days=30)
+            )
+
+    def get(self, name, params):
+        from django.core.cache import cache
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), params)
+        return response, [query['sql'] for query in queries]
+
+    def test_fields_select_output_and_price_comes_from_current_pricing(self):
+        response, queries = self.get('course_list', {'fields': 'id,name,final_price'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row for row in response.data['data']],
+            [{'id': course.id, 'name': course.name, 'final_price': str(course.current_pricing.final_price)}
+             for course in Course.objects.select_related('current_pricing').order_by('name')]
+        )
+        # Pricing is joined, schedules are not loaded at all (only counted for the ETag)
+        self.assertFalse([sql for sql in queries if sql.startswith('SELECT "class_schedules"')])
+        self.assertTrue([sql for sql in queries if 'course_pricings' in sql and 'courses' in sql])
+
+    def test_exclude_skips_the_schedule_queries(self):
+        full, full_queries = self.get('course_list', {})
+        response, queries = self.get('course_list', {'exclude': 'batches,schedule'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['data'][0]), set(full.data['data'][0]) - {'batches', 'schedule'})
+        self.assertLess(len(queries), len(full_queries))
+        self.assertTrue([sql for sql in full_queries if sql.startswith('SELECT "class_schedules"')])
+        self.assertFalse([sql for sql in queries if sql.startswith('SELECT "class_schedules"')])
+
+    def test_hand_built_representation_is_pruned(self):
+        response, _ = self.get('list_teachers', {'fields': 'email,qualification'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data'], [{'email': 'teacher@example.com', 'qualification': 'MSc'}])
+
+    def test_nested_serializers_keep_every_field(self):
+        from edu_platform.serializers.class_serializers import ClassSessionSerializer
+        schedule = ClassSchedule.objects.first()
+        ClassSession.objects.create(
+            schedule=schedule, session_date=schedule.batch_start_date,
+            start_time=timezone.make_aware(datetime.combine(schedule.batch_start_date, time(9))),
+            end_time=timezone.make_aware(datetime.combine(schedule.batch_start_date, time(10))),
+        )
+        response, _ = self.get('class-schedule-list', {'fields': 'id'})
+        self.assertEqual(response.status_code, 200)
+        sessions = [session for row in response.data['data'] for session in row['sessions']]
+        self.assertEqual(len(sessions), 1)
+        self.assertEqual(set(sessions[0]), set(ClassSessionSerializer.Meta.fields))
+
+    def test_unknown_fields_are_rejected(self):
+        for name, params in [
+            ('course_list', {'fields': 'bogus'}), ('course_list', {'fields': 'id,bogus'}), ('course_list', {'exclude': 'bogus'}),
+            ('list_teachers', {'fields': 'bogus'}),
+        ]:
+            response, _ = self.get(name, params)
+            self.assertEqual(response.status_code, 400, (name, params))
+            self.assertIn('bogus', response.data['message'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ConditionalGetTests(TestCase):
+    """List ETags: 304 while nothing changed, a new tag after any write to the listing's rows, one tag per user."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', password='pass', role='admin')
+        self.teachers = [
+            User.objects.create_user(email=f'teacher{i}@example.com', username=f'teacher{i}', password='pass', role='teacher')
+            for i in range(2)
+        ]
+        start = date.today() + timedelta(days=7)
+        self.courses, self.sessions = [], []
+        for index, teacher in enumerate(self.teachers):
+            course = Course.objects.create(name=f'Course {index}', description='Test course', category='testing', base_price=100)
+            CoursePricing.objects.create(course=course, original_price=100, discount_percent=10, final_price=90)
+            schedule = ClassSchedule.objects.create(
+                course=course, teacher=teacher, batch='weekdays', batch_start_date=start, batch_end_date=start + timedelta(days=30)
+            )
+            self.sessions.append(ClassSession.objects.create(
+                schedule=schedule, session_date=start,
+                start_time=timezone.make_aware(datetime.combine(start, time(9))),
+                end_time=timezone.make_aware(datetime.combine(start, time(10))),
+            ))
+            self.courses.append(course)
+
+    def get(self, name, user, etag=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(reverse(name), **({'HTTP_IF_NONE_MATCH': etag} if etag else {}))
+
+    def assert_changes(self, name, user, write):
+        """``write`` invalidates the tag: the old one gets a 200 and a new ETag, which then gets a 304."""
+        etag = self.get(name, user)['ETag']
+        self.assertEqual(self.get(name, user, etag).status_code, 304)
+        write()
+        response = self.get(name, user, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.get(name, user, response['ETag']).status_code, 304)
+
+    def test_course_list(self):
+        course = self.courses[0]
+        self.assert_changes('course_list', self.admin, lambda: Course.objects.filter(pk=course.pk).update(
+            name='Renamed', updated_at=timezone.now()))
+        self.assert_changes('course_list', self.admin, lambda: CoursePricing.objects.create(
+            course=course, original_price=100, discount_percent=20, final_price=80))
+        self.assert_changes('course_list', self.admin, lambda: self.courses[1].delete())
+
+    def test_session_list(self):
+        session = self.sessions[0]
+        self.assert_changes('session-list', self.admin, lambda: ClassSession.objects.filter(pk=session.pk).update(
+            is_active=False, updated_at=timezone.now()))
+        self.assert_changes('session-list', self.admin, lambda: session.delete())
+
+    def test_etags_are_per_user(self):
+        for name in ('course_list', 'session-list'):
+            first, second = (self.get(name, teacher)['ETag'] for teacher in self.teachers)
+            self.assertNotEqual(first, second)
+            self.assertEqual(self.get(name, self.teachers[1], first).status_code, 200)
+
+        # A write to another teacher's sessions leaves this teacher's tag alone
+        etag = self.get('session-list', self.teachers[0])['ETag']
+        ClassSession.objects.filter(pk=self.sessions[1].pk).update(is_active=False, updated_at=timezone.now())
+        self.assertEqual(self.get('session-list', self.teachers[0], etag).status_code, 304)
+
+
+@override_settings(IMAGE_VARIANT_WORKERS=0)
+class ImageVariantTests(TestCase):
+    """Content-addressed variants are written on upload, replaced on re-upload and picked by query params."""
+
+    def setUp(self):
+        import tempfile
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        patcher = override_settings(MEDIA_ROOT=media.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.course = Course.objects.create(name='Pictured', description='Test course', category='testing', base_price=100)
+
+    def image(self, color, name='thumb.png'):
+        import io
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGB', (1600, 900), color).save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def upload(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.thumbnail = upload
+            self.course.save()
+        self.course.refresh_from_db()
+        return self.course.thumbnail_variants
+
+    def representation(self, **params):
+        from edu_platform.serializers.course_serializers import CourseSerializer
+        return CourseSerializer(self.course, context={'query_params': {'fields': 'thumbnail', **params}}).data['thumbnail']
+
+    def test_variant_names_and_sizes(self):
+        import hashlib
+        from PIL import Image
+        from edu_platform.utility.image_variants import COURSE_THUMBNAIL_SIZES, FORMATS
+        variants = self.upload(self.image('red'))
+        storage = self.course.thumbnail.storage
+        self.assertEqual(variants['source'], self.course.thumbnail.name)
+        with self.course.thumbnail.open('rb') as source:
+            digest = hashlib.sha256(source.read()).hexdigest()[:12]
+        stem = self.course.thumbnail.name.split('/')[-1].rsplit('.', 1)[0]
+        for size_name, size in COURSE_THUMBNAIL_SIZES.items():
+            for fmt in FORMATS:
+                name = variants[size_name][fmt]
+                extension = 'jpg' if fmt == 'jpeg' else fmt
+                self.assertEqual(name, f"variants/course_thumbnails/{stem}-{digest}-{size_name}.{extension}")
+                with storage.open(name) as file, Image.open(file) as image:
+                    self.assertEqual(image.size, size)
+
+    def test_existing_variants_are_reused(self):
+        from unittest import mock
+        from edu_platform.utility.image_variants import COURSE_THUMBNAIL_SIZES, build_variants
+        variants = self.upload(self.image('red'))
+        with mock.patch('edu_platform.utility.image_variants.render') as render:
+            self.assertEqual(build_variants(self.course.thumbnail, COURSE_THUMBNAIL_SIZES), variants)
+        render.assert_not_called()
+
+    def test_reupload_deletes_stale_variants(self):
+        from edu_platform.utility.image_variants import variant_names
+        storage = self.course.thumbnail.storage
+        old = variant_names(self.upload(self.image('red')))
+        new = variant_names(self.upload(self.image('blue')))
+        self.assertFalse(old & new)
+        self.assertFalse([name for name in old if storage.exists(name)])
+        self.assertTrue(all(storage.exists(name) for name in new))
+
+    def test_original_until_variants_exist(self):
+        # No on_commit here: the variants are not rendered yet
+        self.course.thumbnail = self.image('red')
+        self.course.save()
+        self.assertEqual(self.course.thumbnail_variants, {})
+        self.assertEqual(self.representation(), self.course.thumbnail.url)
+
+    def test_size_and_format_selection(self):
+        variants = self.upload(self.image('red'))
+        url = self.course.thumbnail.storage.url
+        self.assertEqual(self.representation(), url(variants['medium']['webp']))
+        self.assertEqual(self.representation(image_size='small', image_format='jpeg'), url(variants['small']['jpeg']))
+        self.assertEqual(self.representation(image_size='large', image_format='gif'), url(variants['large']['webp']))
+        self.assertEqual(self.representation(image_size='original'), self.course.thumbnail.url)
+        self.assertEqual(self.representation(image_size='huge'), self.course.thumbnail.url)
+
+
+class ServeCommandTests(SimpleTestCase):
+    """The pure parts of ``manage.py serve``: worker environment and command lines."""
+
+    def make_command(self, **options):
+        from types import SimpleNamespace
+        from edu_platform.management.commands.serve import Command
+        command = Command()
+        command.options = {
+            'workers': 2, 'server': 'uvicorn', 'max_requests': 10000, 'max_requests_jitter': 1000,
+            'graceful_timeout': 30, **options,
+        }
+        command.sock = SimpleNamespace(fileno=lambda: 7)
+        return command
+
+    def worker_env(self, environ=None, **options):
+        import shutil
+        from unittest import mock
+        command = self.make_command(**options)
+        with mock.patch.dict('os.environ', environ or {}, clear=True):
+            env = command.worker_env()
+        if command.own_metrics_dir:
+            self.addCleanup(shutil.rmtree, env['PROMETHEUS_MULTIPROC_DIR'], True)
+        return env
+
+    def test_several_workers_force_websocket_transport(self):
+        self.assertEqual(self.worker_env(workers=2)['SOCKETIO_TRANSPORTS'], 'websocket')
+        self.assertEqual(self.worker_env({'SOCKETIO_TRANSPORTS': 'polling,websocket'}, workers=4)['SOCKETIO_TRANSPORTS'], 'websocket')
+        self.assertNotIn('SOCKETIO_TRANSPORTS', self.worker_env(workers=1))
+        self.assertEqual(self.worker_env({'SOCKETIO_TRANSPORTS': 'polling'}, workers=1)['SOCKETIO_TRANSPORTS'], 'polling')
+
+    def test_metrics_directory_is_shared_and_cleared(self):
+        import os
+        import shutil
+        import tempfile
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        open(os.path.join(directory, 'counter_123.db'), 'w').close()
+        env = self.worker_env({'PROMETHEUS_MULTIPROC_DIR': directory})
+        self.assertEqual(env['PROMETHEUS_MULTIPROC_DIR'], directory)
+        self.assertEqual(os.listdir(directory), [])
+        self.assertTrue(os.path.isdir(self.worker_env()['PROMETHEUS_MULTIPROC_DIR']))
+
+    def test_uvicorn_command_and_max_requests_jitter(self):
+        from unittest import mock
+        command = self.make_command(graceful_timeout=12)
+        for jitter in (0, 1000):
+            with mock.patch('edu_platform.management.commands.serve.random.randint', return_value=jitter) as randint:
+                cmd = command.command()
+            randint.assert_called_once_with(0, 1000)
+            self.assertEqual(cmd[-2:], ['--limit-max-requests', str(10000 + jitter)])
+        self.assertEqual(cmd[cmd.index('--fd') + 1], '7')
+        self.assertEqual(cmd[cmd.index('--timeout-graceful-shutdown') + 1], '12')
+        self.assertIn('edustream.asgi:application', cmd)
+
+        limits = {self.make_command(max_requests_jitter=50).command()[-1] for _ in range(50)}
+        self.assertTrue(all(10000 <= int(limit) <= 10050 for limit in limits))
+        self.assertNotIn('--limit-max-requests', self.make_command(max_requests=0).command())
+
+    def test_daphne_command(self):
+        cmd = self.make_command(server='daphne').command()
+        self.assertEqual(cmd[1:], ['-m', 'daphne', '--fd', '7', 'edustream.asgi:application'])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePgConnection:
+    """Just enough of a psycopg2 connection for ConnectionPool."""
+
+    def __init__(self):
+        from psycopg2 import extensions
+        self.closed = 0
+        self.healthy = True
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.checks = 0
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        from psycopg2 import OperationalError
+        self.checks += 1
+        if not self.healthy:
+            raise OperationalError("server closed the connection unexpectedly")
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        from psycopg2 import extensions
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Checkout limits, reuse order and the reasons pooled connections get closed."""
+
+    def setUp(self):
+        from unittest import mock
+        from edustream.db.postgresql_pool import pool
+        self.clock = FakeClock()
+        patcher = mock.patch.object(pool, 'time', mock.Mock(monotonic=self.clock))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.created = []
+
+    def connect(self):
+        connection = FakePgConnection()
+        self.created.append(connection)
+        return connection
+
+    def pool(self, **options):
+        from edustream.db.postgresql_pool.pool import ConnectionPool
+        return ConnectionPool('test', **options)
+
+    def test_acquire_times_out_when_exhausted(self):
+        from unittest import mock
+        from edustream.db.postgresql_pool import pool as pool_module
+        pool = self.pool(max_size=1, timeout=5)
+        first = pool.acquire(self.connect)
+        # Every wait on the condition moves the clock past the timeout
+        with mock.patch.object(pool._cond, 'wait', lambda remaining: setattr(self.clock, 'now', self.clock.now + remaining)):
+            with self.assertRaises(pool_module.PoolTimeout):
+                pool.acquire(self.connect)
+        self.assertEqual(pool.size, 1)
+        pool.release(first)
+        self.assertIs(pool.acquire(self.connect), first)
+        self.assertEqual(len(self.created), 1)
+
+    def test_reuses_the_most_recently_returned_connection(self):
+        pool = self.pool(max_size=3)
+        first, second = pool.acquire(self.connect), pool.acquire(self.connect)
+        pool.release(first)
+        pool.release(second)
+        self.assertIs(pool.acquire(self.connect), second)
+        self.assertIs(pool.acquire(self.connect), first)
+        self.assertEqual(pool.in_use, 2)
+
+    def test_dead_idle_connection_is_replaced(self):
+        pool = self.pool(max_size=1, check_interval=30)
+        connection = pool.acquire(self.connect)
+        pool.release(connection)
+        self.clock.now += 10
+        self.assertIs(pool.acquire(self.connect), connection)
+        self.assertEqual(connection.checks, 0)
+
+        pool.release(connection)
+        connection.healthy = False
+        self.clock.now += 31
+        replacement = pool.acquire(self.connect)
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.size, 1)
+
+    def test_connection_past_max_lifetime_is_closed_on_release(self):
+        pool = self.pool(max_size=2, max_lifetime=100, max_idle=1000)
+        old = pool.acquire(self.connect)
+        self.clock.now += 101
+        pool.release(old)
+        self.assertTrue(old.closed)
+        self.assertEqual(pool.size, 0)
+        self.assertIsNot(pool.acquire(self.connect), old)
+
+    def test_idle_connections_above_min_size_are_pruned(self):
+        pool = self.pool(max_size=3, min_size=1, max_idle=10)
+        first, second = pool.acquire(self.connect), pool.acquire(self.connect)
+        pool.release(first)
+        self.clock.now += 5
+        pool.release(second)
+        self.clock.now += 6
+        # first idled past max_idle and goes; second is newer and is handed out
+        self.assertIs(pool.acquire(self.connect), second)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.size, 1)
+
+
+class TTLCacheTests(TestCase):
+    """Entries expire after the TTL and the least recently used one is evicted first."""
+
+    def test_expiry_and_eviction(self):
+        from edu_platform.utility.ttl_cache import TTLCache
+        clock = FakeClock()
+        cache = TTLCache(maxsize=2, ttl=10, timer=clock)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        # 'b' was least recently used
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+
+        clock.now = 10
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c', 'missing'), 'missing')
+        self.assertEqual(len(cache), 0)
+
+        cache.set(('user', 1), 'x')
+        cache.set(('user', 2), 'y')
+        self.assertEqual(cache.discard_where(lambda key: key[1] == 1), 1)
+        self.assertEqual(cache.get(('user', 2)), 'y')
+
+
+class JwtMiddlewareTests(TransactionTestCase):
+    """Cached WebSocket users never outlive the cache TTL, and expired tokens never reach the cache."""
+
+    def setUp(self):
+        from unittest import mock
+        from edu_platform import jwt_middleware
+        self.user = User.objects.create_user(
+            email='ws@example.com', username='ws', password='pass', role='student'
+        )
+        self.clock = FakeClock()
+        patcher = mock.patch.object(jwt_middleware.user_cache, 'timer', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        jwt_middleware.user_cache.clear()
+        self.addCleanup(jwt_middleware.user_cache.clear)
+
+    def connect(self, token):
+        import asyncio
+        from edu_platform.jwt_middleware import JwtAuthMiddleware
+        scopes = []
+
+        async def inner(scope, receive, send):
+            scopes.append(scope)
+
+        scope = {'type': 'websocket', 'path': '/ws/class/1/', 'query_string': f'token=Bearer {token}'.encode()}
+        asyncio.run(JwtAuthMiddleware(inner)(scope, None, None))
+        return scopes[0]['user']
+
+    def test_deactivated_user_rejected_once_entry_expires(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = str(AccessToken.for_user(self.user))
+        self.assertEqual(self.connect(token), self.user)
+
+        # A write that sends no signal (raw SQL, another service) is only seen once the entry expires
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE users SET is_active = %s WHERE id = %s", [False, self.user.pk])
+        self.assertEqual(self.connect(token), self.user)
+        self.clock.now = settings.WEBSOCKET_USER_CACHE_TTL
+        self.assertFalse(self.connect(token).is_authenticated)
+
+    def test_queryset_update_evicts_immediately(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = str(AccessToken.for_user(self.user))
+        self.assertEqual(self.connect(token), self.user)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertFalse(self.connect(token).is_authenticated)
+
+    def test_update_without_pk_filter_evicts_immediately(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = str(AccessToken.for_user(self.user))
+        self.assertEqual(self.connect(token), self.user)
+        User.objects.filter(email='ws@example.com').update(is_active=False)
+        self.assertFalse(self.connect(token).is_authenticated)
+
+    def test_deactivation_through_save_evicts_immediately(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = str(AccessToken.for_user(self.user))
+        self.assertEqual(self.connect(token), self.user)
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.connect(token).is_authenticated)
+
+    def test_success_logged_only_for_real_users(self):
+        import logging
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = str(AccessToken.for_user(self.user))
+        with self.assertLogs('edu_platform.jwt_middleware', level='DEBUG') as logs:
+            self.connect(token)
+        self.assertIn(f"JWT Auth successful: user_id={self.user.pk}, email=ws@example.com", logs.output[-1])
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertLogs('edu_platform.jwt_middleware', level='DEBUG') as logs:
+            self.assertFalse(self.connect(token).is_authenticated)
+        self.assertFalse([record for record in logs.records if 'successful' in record.getMessage()])
+        self.assertEqual(
+            [record.levelno for record in logs.records if 'anonymous' in record.getMessage()], [logging.DEBUG]
+        )
+
+    def test_expired_token_not_served_from_cache(self):
+        from rest_framework_simplejwt.settings import api_settings
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(self.connect(str(token)), self.user)
+
+        # Same user and iat, so the same cache key, but already expired
+        token.set_exp(from_time=token.current_time - 2 * api_settings.ACCESS_TOKEN_LIFETIME)
+        self.assertFalse(self.connect(str(token)).is_authenticated)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CachedJWTAuthenticationTests(TestCase):
+    """API requests see user changes made through save() and queryset update() right away."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from edu_platform.authentication import local_user_cache
+        cache.clear()
+        local_user_cache.clear()
+        self.addCleanup(local_user_cache.clear)
+        self.user = User.objects.create_user(
+            email='api@example.com', username='api', password='pass', role='teacher'
+        )
+
+    def get(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        return client.get(reverse('my_courses'))
+
+    def test_update_evicts_cached_user(self):
+        from django.core.cache import cache
+        from edu_platform.authentication import CACHE_KEY, local_user_cache
+        self.assertEqual(self.get().status_code, 200)
+        self.assertIsNotNone(local_user_cache.get(self.user.pk))
+        self.assertIsNotNone(cache.get(CACHE_KEY.format(self.user.pk)))
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(local_user_cache.get(self.user.pk))
+        self.assertIsNone(cache.get(CACHE_KEY.format(self.user.pk)))
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_bulk_update_evicts_cached_user(self):
+        from edu_platform.authentication import get_cached_user_data
+        self.assertEqual(self.get().status_code, 200)
+        self.user.role = 'student'
+        # bulk_update() goes through the queryset's update()
+        User.objects.bulk_update([self.user], ['role'])
+        self.assertEqual(get_cached_user_data(self.user.pk)['role'], 'student')
+
+    def test_update_by_pk_runs_only_the_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual([q['sql'].split()[0] for q in queries.captured_queries], ['UPDATE'])
+
+    def test_update_by_other_filter_evicts_every_cached_user(self):
+        from django.core.cache import cache
+        from edu_platform.authentication import CACHE_KEY, local_user_cache
+        self.assertEqual(self.get().status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            User.objects.filter(role='teacher').update(is_active=False)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertIsNone(local_user_cache.get(self.user.pk))
+        # The Redis entry is left behind but belongs to an older generation
+        self.assertIsNotNone(cache.get(CACHE_KEY.format(self.user.pk)))
+        self.assertEqual(self.get().status_code, 401)
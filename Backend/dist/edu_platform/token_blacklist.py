@@ -0,0 +1,229 @@
+"""
+Pluggable refresh-token blacklist.
+
+``RefreshToken`` keeps simplejwt's interface (``blacklist()``, verification on
+construction, ``for_user``) but delegates storage to the backend named in
+``settings.TOKEN_BLACKLIST['BACKEND']``:
+
+* ``DatabaseBlacklistBackend`` - simplejwt's OutstandingToken/BlacklistedToken
+  tables (the previous behaviour).
+* ``RedisBlacklistBackend`` - one Redis key per revoked JTI, expiring with the
+  token, plus an in-process Bloom filter of the revocation log (a Redis
+  sorted set scored by Redis server time). A Bloom miss - the common "not
+  revoked" case - is answered without touching Redis; a hit is confirmed with
+  one EXISTS. At most every ``SYNC_INTERVAL`` seconds one thread pulls the
+  log entries added since its last pull, and the filter is rebuilt hourly.
+
+  Staleness is bounded, not zero: a worker sees its own revocations at once,
+  but one made on another worker only after up to ``SYNC_INTERVAL`` seconds
+  (plus one round trip). A rotated-away refresh token replayed against a
+  different worker within that window is accepted once more.
+
+Existing rows are copied into Redis with ``manage.py migrate_token_blacklist``.
+"""
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken as SimpleJWTRefreshToken, BlacklistMixin
+from rest_framework_simplejwt.utils import datetime_from_epoch
+import hashlib
+import logging
+import math
+import threading
+import time
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives, tunable false positives)."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class DatabaseBlacklistBackend:
+    """Stores revocations in simplejwt's token_blacklist tables."""
+
+    def __init__(self, options=None):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+        self.blacklisted = BlacklistedToken
+        self.outstanding = OutstandingToken
+
+    def is_blacklisted(self, jti):
+        return self.blacklisted.objects.filter(token__jti=jti).exists()
+
+    def blacklist(self, token):
+        outstanding, _ = self.outstanding.objects.get_or_create(
+            jti=token[api_settings.JTI_CLAIM],
+            defaults={'token': str(token), 'expires_at': datetime_from_epoch(token['exp'])},
+        )
+        self.blacklisted.objects.get_or_create(token=outstanding)
+
+    def outstand(self, token, user):
+        self.outstanding.objects.create(
+            user=user,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=datetime_from_epoch(token['exp']),
+        )
+
+
+# Revokes ARGV[1] for ARGV[2] seconds and logs it scored by the server clock, so every
+# worker reads the log against one clock and a sync needs no overlap for skew.
+# Scores are passed as strings: Lua would print large numbers with only 14 digits.
+_REVOKE_SCRIPT = """
+local now = redis.call('TIME')
+local score = now[1] .. '.' .. string.format('%06d', tonumber(now[2]))
+redis.call('SET', KEYS[1], 1, 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], score, ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', tostring(tonumber(now[1]) - tonumber(ARGV[3])))
+return score
+"""
+
+
+class RedisBlacklistBackend:
+    """Stores revoked JTIs in Redis with per-token TTLs, fronted by a Bloom filter."""
+
+    KEY_PREFIX = 'jwt:blacklist:'
+    LOG_KEY = 'jwt:blacklist:log'
+
+    def __init__(self, options):
+        self.redis = redis.Redis.from_url(options['REDIS_URL'], decode_responses=True)
+        self.capacity = options.get('BLOOM_CAPACITY', 100000)
+        self.error_rate = options.get('BLOOM_ERROR_RATE', 0.001)
+        self.sync_interval = options.get('SYNC_INTERVAL', 1.0)
+        self.rebuild_interval = options.get('REBUILD_INTERVAL', 3600)
+        self.retention = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+        self.bloom = BloomFilter(self.capacity, self.error_rate)
+        self._lock = threading.Lock()
+        self._syncing = False
+        # Revoked here while a rebuild was reading the log; carried into the new filter
+        self._revoked_during_sync = []
+        self._synced_at = None
+        self._rebuilt_at = None
+        self._last_score = 0
+
+    def blacklist_jti(self, jti, expires_at):
+        """Revokes ``jti`` until ``expires_at`` (epoch seconds)."""
+        ttl = max(int(expires_at - time.time()), 1)
+        self.redis.eval(_REVOKE_SCRIPT, 2, self.KEY_PREFIX + jti, self.LOG_KEY, jti, ttl, int(self.retention))
+        with self._lock:
+            self.bloom.add(jti)
+            if self._syncing:
+                self._revoked_during_sync.append(jti)
+
+    def blacklist(self, token):
+        self.blacklist_jti(token[api_settings.JTI_CLAIM], token['exp'])
+
+    def outstand(self, token, user):
+        # Only revocations are stored; issuing a token writes nothing
+        pass
+
+    def is_blacklisted(self, jti):
+        self._sync()
+        if self._rebuilt_at is None:
+            # No filter loaded yet (first requests, or the load runs in another thread)
+            return bool(self.redis.exists(self.KEY_PREFIX + jti))
+        if jti not in self.bloom:
+            return False
+        return bool(self.redis.exists(self.KEY_PREFIX + jti))
+
+    def _sync(self):
+        """Folds revocations made by other workers into the local Bloom filter."""
+        monotonic = time.monotonic()
+        with self._lock:
+            if self._syncing or (self._synced_at is not None and monotonic - self._synced_at < self.sync_interval):
+                return
+            self._syncing = True
+            # Bloom filters cannot forget; rebuild periodically so expired JTIs drop out
+            rebuild = self._rebuilt_at is None or monotonic - self._rebuilt_at >= self.rebuild_interval
+            since = '-inf' if rebuild else self._last_score
+        try:
+            # Outside the lock: other threads keep answering from the current filter meanwhile
+            entries = self.redis.zrangebyscore(self.LOG_KEY, since, '+inf', withscores=True)
+            if rebuild:
+                bloom = BloomFilter(self.capacity, self.error_rate)
+                for jti, score in entries:
+                    bloom.add(jti)
+            with self._lock:
+                if rebuild:
+                    for jti in self._revoked_during_sync:
+                        bloom.add(jti)
+                    self.bloom = bloom
+                    self._rebuilt_at = monotonic
+                else:
+                    for jti, score in entries:
+                        self.bloom.add(jti)
+                self._last_score = max([self._last_score] + [score for _, score in entries])
+                self._synced_at = monotonic
+            if rebuild:
+                logger.info(f"Token blacklist Bloom filter rebuilt: entries={len(entries)}")
+        finally:
+            with self._lock:
+                self._syncing = False
+                self._revoked_during_sync = []
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_blacklist_backend():
+    """Returns the process-wide backend configured in ``settings.TOKEN_BLACKLIST``."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                options = getattr(settings, 'TOKEN_BLACKLIST', {})
+                backend_class = import_string(
+                    options.get('BACKEND', 'edu_platform.token_blacklist.DatabaseBlacklistBackend')
+                )
+                _backend = backend_class(options)
+    return _backend
+
+
+class RefreshToken(SimpleJWTRefreshToken):
+    """Refresh token whose blacklist lives in the configured backend."""
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        try:
+            blacklisted = get_blacklist_backend().is_blacklisted(jti)
+        except redis.RedisError as e:
+            # Fail closed: an unverifiable refresh token is rejected, not trusted
+            logger.error(f"Token blacklist unavailable: {e}")
+            raise TokenError(_("Token blacklist unavailable"))
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        get_blacklist_backend().blacklist(self)
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user; the backend decides whether issuing writes anything
+        token = super(BlacklistMixin, cls).for_user(user)
+        get_blacklist_backend().outstand(token, user)
+        return token
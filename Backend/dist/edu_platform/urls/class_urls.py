@@ -1,12 +1,16 @@
 from django.urls import path
 from asgiref.sync import sync_to_async
-from edu_platform.views.class_views import ClassScheduleView, ClassSessionListView, ClassSessionUpdateView, upload_class_recording, get_recordings
+from edu_platform.views.class_views import (
+    ClassScheduleView, ClassScheduleImportView, ClassSessionListView, ClassSessionUpdateView, upload_class_recording, get_recordings,
+    ClassRecordingChunkView, ClassRecordingFinalizeView, CalendarFeedLinkView, CalendarFeedView
+)
 from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
     path('schedules/', ClassScheduleView.as_view(), name='class-schedule-list'),
+    path('schedules/import/', ClassScheduleImportView.as_view(), name='class-schedule-import'),
     path('schedules/<int:schedule_id>/', ClassScheduleView.as_view(), name='class-schedule-detail'),
 
     path('classroom/test/', TemplateView.as_view(template_name='classroom.html'), name='classroom_test'),
@@ -15,6 +19,11 @@ urlpatterns = [
     path('sessions/<int:class_id>/', ClassSessionUpdateView.as_view(), name='session-update'),
 
     path("sessions/<int:class_id>/upload-recording/", upload_class_recording, name="upload_class_recording"),
+    path("sessions/<int:class_id>/recording/chunks/", ClassRecordingChunkView.as_view(), name="recording_chunks"),
+    path("sessions/<int:class_id>/recording/finalize/", ClassRecordingFinalizeView.as_view(), name="recording_finalize"),
     path("recordings/", get_recordings, name="get_recordings"),
+
+    path('calendar/', CalendarFeedLinkView.as_view(), name='calendar-feed-link'),
+    path('calendar/<str:token>.ics', CalendarFeedView.as_view(), name='calendar-feed'),
 ]
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
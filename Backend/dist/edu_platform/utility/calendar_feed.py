@@ -0,0 +1,205 @@
+"""
+iCalendar (ICS) feeds of a user's class timetable.
+
+Calendar apps cannot send our JWTs, so each teacher and student gets a feed
+URL carrying a signed token of their user id and ``calendar_feed_key``
+(``feed_token()``); the feed view checks it with ``feed_user()``.
+``rotate_feed_key()`` gives the user a new key, which revokes every URL
+issued before. Teachers get the sessions of their
+schedules, students those of the batches they paid for, matched to schedules
+the way CourseSessionSerializer does.
+
+The view uses conditional GET with ``feed_scope()``, so a poll with a
+current ETag costs a few aggregate queries and a 304. Otherwise the feed is
+streamed from ``stream_feed()`` (``astream_feed()`` under ASGI): the text of a feed is cached under its
+ETag, and any change to the user's sessions, schedules, courses or
+enrollments gives a new ETag and therefore a new key. Events are built from
+``schedule_occurrences()``, so occurrences without rows yet are included; a
+session's UID depends only on its schedule and date so it stays the same
+when the occurrence gets its row.
+"""
+
+from asgiref.sync import sync_to_async
+from datetime import timezone as dt_timezone
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare, get_random_string
+from django.core.cache import cache
+from django.db.models import Prefetch, Q
+from edu_platform.models import ClassSchedule, ClassSession, Course, CourseEnrollment, User
+from edu_platform.utility.session_generator import schedule_occurrences
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'edu_platform.calendar_feed'
+FEED_KEY = 'calendar:feed:{etag}'
+UID_DOMAIN = 'classes.edustream'
+
+
+def rotate_feed_key(user):
+    """Gives ``user`` a new feed key; URLs issued with the old one stop working."""
+    user.calendar_feed_key = get_random_string(32)
+    user.save(update_fields=['calendar_feed_key', 'updated_at'])
+
+
+def feed_token(user):
+    """Signed token identifying ``user`` (and their current feed key) in their feed URL."""
+    if not user.calendar_feed_key:
+        rotate_feed_key(user)
+    return signing.Signer(salt=TOKEN_SALT).sign(f"{user.pk}.{user.calendar_feed_key}")
+
+
+def feed_user(token):
+    """The active user ``token`` was issued to, or None for a bad or revoked token."""
+    try:
+        user_id, key = signing.Signer(salt=TOKEN_SALT).unsign(token).split('.', 1)
+    except (signing.BadSignature, ValueError):
+        return None
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None or not user.calendar_feed_key or not constant_time_compare(user.calendar_feed_key, key):
+        return None
+    return user
+
+
+def paid_enrollments(user):
+    return CourseEnrollment.objects.filter(student=user, subscription__payment_status='completed')
+
+
+def feed_schedules(user):
+    """ClassSchedules in ``user``'s feed."""
+    if user.is_teacher:
+        return ClassSchedule.objects.filter(teacher=user)
+    if user.is_student:
+        batches = Q()
+        for course_id, batch, start_date, end_date in paid_enrollments(user).values_list(
+            'course_id', 'batch', 'start_date', 'end_date'
+        ):
+            batches |= Q(course_id=course_id, batch=batch, batch_start_date=start_date, batch_end_date=end_date)
+        if batches:
+            return ClassSchedule.objects.filter(batches)
+    return ClassSchedule.objects.none()
+
+
+def feed_scope(user):
+    """Rows the feed of ``user`` is built from, for conditional GET."""
+    if user.is_teacher:
+        return [
+            Course.objects.filter(class_schedules__teacher=user),
+            ClassSchedule.objects.filter(teacher=user),
+            ClassSession.objects.filter(teacher=user),
+        ]
+    schedules = feed_schedules(user)
+    return [
+        paid_enrollments(user),
+        Course.objects.filter(class_schedules__in=schedules),
+        schedules,
+        ClassSession.objects.filter(schedule__in=schedules),
+    ]
+
+
+def escape_text(value):
+    """Escapes a TEXT property value (RFC 5545 3.3.11)."""
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def content_line(name, value):
+    """Returns the CRLF-terminated line, folded at 75 octets (RFC 5545 3.1)."""
+    line = f"{name}:{value}".encode('utf-8')
+    parts = []
+    while len(line) > 75:
+        cut = 75 if not parts else 74
+        # Do not split a multi-byte character
+        while cut and (line[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(line[:cut])
+        line = line[cut:]
+    parts.append(line)
+    return '\r\n '.join(part.decode('utf-8') for part in parts) + '\r\n'
+
+
+def utc_stamp(value):
+    """Formats an aware datetime as a UTC DATE-TIME value."""
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def feed_lines(user):
+    """Yields the lines of ``user``'s feed."""
+    schedules = feed_schedules(user).select_related('course', 'teacher').prefetch_related(
+        Prefetch('sessions', queryset=ClassSession.objects.order_by('start_time'))
+    ).order_by('batch_start_date', 'pk')
+    yield content_line('BEGIN', 'VCALENDAR')
+    yield content_line('VERSION', '2.0')
+    yield content_line('PRODID', '-//EduStream//Class timetable//EN')
+    yield content_line('CALSCALE', 'GREGORIAN')
+    yield content_line('METHOD', 'PUBLISH')
+    yield content_line('X-WR-CALNAME', escape_text('EduStream classes'))
+    for schedule in schedules.iterator(chunk_size=100):
+        summary = escape_text(f"{schedule.course.name} ({schedule.batch})")
+        description = escape_text(f"Teacher: {schedule.teacher.username}")
+        # The schedule's last change, so an unchanged feed is byte-for-byte the same
+        stamp = utc_stamp(schedule.updated_at)
+        for session in schedule_occurrences(schedule):
+            yield content_line('BEGIN', 'VEVENT')
+            yield content_line('UID', f"{schedule.pk}-{session.session_date.strftime('%Y%m%d')}@{UID_DOMAIN}")
+            yield content_line('DTSTAMP', stamp)
+            yield content_line('DTSTART', utc_stamp(session.start_time))
+            yield content_line('DTEND', utc_stamp(session.end_time))
+            yield content_line('SUMMARY', summary)
+            yield content_line('DESCRIPTION', description)
+            yield content_line('END', 'VEVENT')
+    yield content_line('END', 'VCALENDAR')
+
+
+def stream_feed(user, etag=None):
+    """
+    Yields ``user``'s feed in chunks: from the cache when a feed with this
+    ``etag`` is stored, otherwise generated and stored once fully sent.
+    """
+    key = FEED_KEY.format(etag=etag.removeprefix('W/').strip('"')) if etag else None
+    if key:
+        try:
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Calendar feed cache unavailable: {e}")
+            key = cached = None
+        if cached is not None:
+            yield cached
+            return
+
+    chunks, lines = [], []
+    for line in feed_lines(user):
+        lines.append(line)
+        if len(lines) == 200:
+            chunks.append(''.join(lines))
+            lines = []
+            yield chunks[-1]
+    chunks.append(''.join(lines))
+    yield chunks[-1]
+
+    if key:
+        try:
+            cache.set(key, ''.join(chunks), getattr(settings, 'CALENDAR_FEED_CACHE_TTL', 86400))
+        except Exception as e:
+            logger.warning(f"Calendar feed cache write failed: {e}")
+
+
+_END = object()
+
+
+async def astream_feed(user, etag=None):
+    """
+    stream_feed() as an async iterator, for ASGI servers: each chunk is made in
+    the sync thread, so the feed is sent as it is generated rather than
+    collected whole first.
+    """
+    chunks = stream_feed(user, etag)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(chunks, _END)) is not _END:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
@@ -0,0 +1,90 @@
+"""
+Conditional GET for polled list endpoints.
+
+A view method decorated with ``conditional_get(scope)`` computes a validator
+before doing any serialization: for each queryset returned by
+``scope(view, request)`` one aggregate query reads the row count and the
+latest ``updated_at``. The ETag hashes those together with the user, the
+query string and any extra key parts, so an edit changes the latest
+timestamp and a deletion changes the count. When the client's
+``If-None-Match`` matches, the response is ``304 Not Modified`` and the
+serializers never run.
+
+The ETag is also left on ``request.etag`` for views that cache their
+output by it.
+
+Responses also carry ``Last-Modified`` (the latest timestamp) for
+information. 304s are decided on the ETag only, because a deleted row or a
+date-dependent filter changes a listing without moving ``updated_at``.
+"""
+
+from django.db.models import Count, Max
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags
+from functools import wraps
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def compute_validators(request, querysets, extra=()):
+    """Returns ``(etag, last_modified)`` for the given querysets; ``last_modified`` may be None."""
+    parts = [str(request.user.pk), request.META.get('QUERY_STRING', ''), *map(str, extra)]
+    last_modified = None
+    for queryset in querysets:
+        # Scopes that follow multi-valued relations join duplicate rows, hence distinct
+        stats = queryset.order_by().aggregate(count=Count('pk', distinct=True), last=Max('updated_at'))
+        parts.append(f"{queryset.model._meta.label}:{stats['count']}:{stats['last'].isoformat() if stats['last'] else ''}")
+        if stats['last'] and (last_modified is None or stats['last'] > last_modified):
+            last_modified = stats['last']
+    digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    return f'W/"{digest}"', last_modified
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    # Weak comparison (RFC 9110 13.1.2)
+    tags = {tag.removeprefix('W/') for tag in parse_etags(header)}
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+def conditional_get(scope):
+    """
+    Method decorator for a view's ``get``: ``scope(view, request)`` returns the
+    querysets (and optionally extra key parts as a second item) the response is
+    built from, or None when the request is going to fail anyway (so that it
+    never gets a 304).
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            try:
+                result = scope(view, request)
+                if result is None:
+                    return method(view, request, *args, **kwargs)
+                querysets, extra = result if isinstance(result, tuple) else (result, ())
+                etag, last_modified = compute_validators(request, querysets, extra)
+                request.etag = etag
+            except Exception as e:
+                logger.warning(f"Conditional GET validator failed for {request.path}: {e}")
+                return method(view, request, *args, **kwargs)
+
+            if _etag_matches(request, etag):
+                response = HttpResponseNotModified()
+            else:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response.headers['ETag'] = etag
+            if last_modified:
+                response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+            # Per-user payloads: shared caches must not store them, browsers must revalidate
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,129 @@
+"""
+Cached CourseListView responses.
+
+The course list depends only on its ``CourseAudience`` (see course_listing),
+the ``search``/``category`` and pagination params and the date (students see
+only upcoming batches). Serialized pages are stored in the default cache
+under a key built from those plus a version number. Saving or
+deleting a Course, CoursePricing, ClassSchedule, ClassSession or
+ClassScheduleSummary bumps the version, so every cached listing goes stale at
+once.
+
+A cold key is computed by one request at a time: the first takes a lock with
+``cache.add``. The others do not sleep on a pooled DB connection: they serve
+the last listing computed for the same audience and params (kept under a
+version-less key) if there is one. Otherwise they hand their connection back
+to the pool and poll for at most ``COURSE_LIST_CACHE_WAIT`` seconds before
+computing it themselves. If the cache is unreachable the listing is computed
+directly.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from datetime import date
+from edustream.db import release_connections
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'courses:list:version'
+LIST_KEY = 'courses:list:{version}:{audience}:{params}'
+STALE_KEY = 'courses:list:stale:{audience}:{params}'
+LOCK_POLL_SECONDS = 0.05
+
+
+def audience_key(audience):
+    """Identifies everyone who gets the same listing as ``audience`` (a CourseAudience)."""
+    if audience.role == 'student':
+        purchased = ','.join(str(pk) for pk in sorted(audience.purchased_course_ids))
+        digest = hashlib.sha1(purchased.encode()).hexdigest()[:16]
+        return f"student:{digest}:{date.today().isoformat()}"
+    if audience.role == 'teacher':
+        return f"teacher:{audience.user_id}"
+    return audience.role
+
+
+def params_key(params):
+    names = ('search', 'category', 'cursor', 'page_size', 'paginate', 'image_size', 'image_format', 'fields', 'exclude')
+    normalized = json.dumps({name: (params.get(name) or '').strip() for name in names}, sort_keys=True)
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost version key never revives old entries
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version(**kwargs):
+    """Signal receiver: makes every cached course listing stale."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), timeout=None)
+    except Exception as e:
+        logger.warning(f"Course list cache invalidation failed: {e}")
+
+
+for model in ('Course', 'CoursePricing', 'ClassSchedule', 'ClassSession', 'ClassScheduleSummary'):
+    post_save.connect(bump_version, sender=f'edu_platform.{model}', dispatch_uid=f'course_list_cache_{model}_save')
+    post_delete.connect(bump_version, sender=f'edu_platform.{model}', dispatch_uid=f'course_list_cache_{model}_delete')
+
+
+def _wait_for(key, deadline):
+    """Polls for a listing another request is computing; None if it does not show up in time."""
+    release_connections()
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_SECONDS)
+        data = cache.get(key)
+        if data is not None:
+            return data
+    return None
+
+
+def get_course_list(audience, params, compute):
+    """Returns the cached listing for this audience and params, computing it with ``compute`` on a miss."""
+    ttl = getattr(settings, 'COURSE_LIST_CACHE_TTL', 600)
+    lock_timeout = getattr(settings, 'COURSE_LIST_CACHE_LOCK_TIMEOUT', 5)
+    wait = getattr(settings, 'COURSE_LIST_CACHE_WAIT', 0.5)
+    try:
+        audience, query = audience_key(audience), params_key(params)
+        key = LIST_KEY.format(version=get_version(), audience=audience, params=query)
+        stale_key = STALE_KEY.format(audience=audience, params=query)
+        data = cache.get(key)
+        if data is not None:
+            return data
+        lock_key = f"{key}:lock"
+        locked = cache.add(lock_key, 1, timeout=lock_timeout)
+        if not locked:
+            # Someone is computing it; the previous version is good enough meanwhile
+            data = cache.get(stale_key)
+            if data is None:
+                data = _wait_for(key, time.monotonic() + wait)
+            if data is not None:
+                return data
+    except Exception as e:
+        logger.warning(f"Course list cache unavailable: {e}")
+        return compute()
+
+    # Lock holder, or the lock holder took too long: compute it here
+    try:
+        data = compute()
+        try:
+            cache.set_many({key: data, stale_key: data}, ttl)
+        except Exception as e:
+            logger.warning(f"Course list cache write failed: {e}")
+        return data
+    finally:
+        if locked:
+            try:
+                cache.delete(lock_key)
+            except Exception:
+                pass
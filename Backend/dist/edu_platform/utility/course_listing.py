@@ -0,0 +1,77 @@
+"""
+The course catalog listing behind CourseListView, built without a request.
+
+A listing depends only on a ``CourseAudience`` (the caller's role, a
+teacher's id and a student's purchased courses) and the query params, so the
+view and the startup cache warm-up both call ``list_courses()``.
+
+Thumbnail URLs in a listing are root-relative, which keeps cached listings
+independent of the host they were requested on; the view makes them absolute
+with ``absolute_thumbnails()``.
+"""
+
+from typing import NamedTuple, Optional
+from edu_platform.models import Course, CourseSubscription
+from edu_platform.pagination import KeysetPagination
+from edu_platform.serializers.course_serializers import CourseSerializer, schedule_summary_prefetch
+from edu_platform.serializers.sparse_fieldsets import fieldset_queryset
+from edu_platform.utility.course_search import search_courses, RANKED_ORDERING
+
+DEFAULT_ORDERING = ('category', 'name', 'id')
+
+
+class CourseAudience(NamedTuple):
+    """Everything about the caller a course listing depends on."""
+    role: str
+    # Set for teachers only, who see just their own batches
+    user_id: Optional[int] = None
+    # Students do not see courses they have paid for
+    purchased_course_ids: tuple = ()
+
+    @classmethod
+    def for_user(cls, user):
+        if user.role == 'student':
+            purchased = CourseSubscription.objects.filter(
+                student=user, payment_status='completed'
+            ).values_list('course__id', flat=True)
+            return cls(role=user.role, purchased_course_ids=tuple(sorted(set(purchased))))
+        if user.role == 'teacher':
+            return cls(role=user.role, user_id=user.id)
+        return cls(role=user.role)
+
+
+def course_list_queryset(audience, query_params):
+    """Active courses for ``audience`` filtered by ``search``/``category``, with the keyset ordering to page them by."""
+    queryset = Course.objects.filter(is_active=True).defer('search_vector').select_related(
+        'current_pricing'
+    ).prefetch_related(schedule_summary_prefetch())
+    if audience.purchased_course_ids:
+        queryset = queryset.exclude(id__in=audience.purchased_course_ids)
+    ordering = DEFAULT_ORDERING
+    search = query_params.get('search', None)
+    category = query_params.get('category', None)
+    if category:
+        queryset = queryset.filter(category__iexact=category)
+    if search:
+        queryset = search_courses(queryset, search)
+        if 'relevance' in queryset.query.annotations:
+            ordering = RANKED_ORDERING
+    return fieldset_queryset(queryset, CourseSerializer, query_params, extra=ordering), ordering
+
+
+def list_courses(audience, query_params):
+    """Serializes one page of courses (or all of them with ``paginate=false``) as ``{'data', 'pagination'}``."""
+    queryset, ordering = course_list_queryset(audience, query_params)
+    paginator = KeysetPagination()
+    page = paginator.paginate(queryset, query_params, ordering)
+    context = {'audience': audience, 'query_params': query_params}
+    data = CourseSerializer(page if page is not None else queryset, many=True, context=context).data
+    return {'data': data, 'pagination': paginator.get_envelope()}
+
+
+def absolute_thumbnails(rows, request):
+    """Copies of listing rows with their thumbnail URLs made absolute for ``request``'s host."""
+    return [
+        {**row, 'thumbnail': request.build_absolute_uri(row['thumbnail'])} if row.get('thumbnail') else row
+        for row in rows
+    ]
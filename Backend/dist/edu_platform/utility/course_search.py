@@ -0,0 +1,50 @@
+"""
+Course search.
+
+On PostgreSQL a search matches the trigger-maintained ``Course.search_vector``
+(name weighted A, category B, description C) with every word of the query
+treated as a prefix, or course names that are trigram-similar to the query,
+which catches typos. Both conditions are served by GIN indexes. Results are
+ordered by ``SearchRank`` plus name similarity.
+
+Other databases fall back to case-insensitive substring matching.
+"""
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import BigIntegerField, F, Q
+from django.db.models.functions import Cast
+import re
+
+SEARCH_CONFIG = 'english'
+# Ordering of search_courses() results on PostgreSQL (unique, for keyset pagination)
+RANKED_ORDERING = ('-relevance', 'id')
+
+
+def prefix_query(search):
+    """Builds a tsquery matching every word of ``search`` as a prefix, or None if it has no words."""
+    words = re.findall(r'\w+', search)
+    if not words:
+        return None
+    # Only word characters reach the raw tsquery, so user input cannot inject operators
+    return SearchQuery(' & '.join(f"{word}:*" for word in words), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_courses(queryset, search):
+    """Filters a Course queryset by ``search``, best matches first."""
+    query = prefix_query(search) if connection.vendor == 'postgresql' else None
+    if query is None:
+        return queryset.filter(
+            Q(name__icontains=search) |
+            Q(description__icontains=search) |
+            Q(category__icontains=search)
+        )
+    return queryset.filter(
+        Q(search_vector=query) | Q(name__trigram_word_similar=search)
+    ).annotate(
+        # Rank plus name similarity as an integer, so keyset pagination can compare it exactly
+        relevance=Cast(
+            (SearchRank(F('search_vector'), query) + TrigramWordSimilarity(search, 'name')) * 1000000,
+            BigIntegerField(),
+        ),
+    ).order_by(*RANKED_ORDERING)
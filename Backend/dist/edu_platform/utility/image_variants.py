@@ -0,0 +1,203 @@
+"""
+Fixed-size WebP/JPEG variants of uploaded images.
+
+Listings used to send the original upload (up to 5 MB) for every course
+thumbnail and profile picture. When one of the image fields below is saved
+with a new file, a background thread decodes it once and writes a small,
+medium and large variant in both WebP and JPEG next to MEDIA_ROOT/variants/.
+It then records their storage names in the model's ``<field>_variants`` JSON
+(``{'source': ..., 'small': {'webp': ..., 'jpeg': ...}, ...}``).
+
+Variant names contain a hash of the source bytes, so a URL never changes
+meaning and ``serve_variant`` can send them with an immutable, one-year
+``Cache-Control``. Serializers use ``VariantImageField``. It returns the
+variant for ``?image_size=small|medium|large|original`` (and
+``?image_format=webp|jpeg``), falling back to the original until the
+variants exist.
+
+``IMAGE_VARIANT_WORKERS = 0`` renders synchronously, for example in
+``manage.py generate_image_variants``.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.views.static import serve
+from PIL import Image, ImageOps
+from rest_framework import serializers
+import hashlib
+import io
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIR = 'variants'
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DEFAULT_FORMAT = 'webp'
+# (width, height) per size; images are cropped to fill
+COURSE_THUMBNAIL_SIZES = {'small': (320, 180), 'medium': (640, 360), 'large': (1280, 720)}
+PROFILE_PICTURE_SIZES = {'small': (64, 64), 'medium': (160, 160), 'large': (400, 400)}
+IMAGE_FIELDS = {
+    'edu_platform.Course': {'thumbnail': COURSE_THUMBNAIL_SIZES},
+    'edu_platform.TeacherProfile': {'profile_picture': PROFILE_PICTURE_SIZES},
+    'edu_platform.StudentProfile': {'profile_picture': PROFILE_PICTURE_SIZES},
+}
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variants_attname(field_name):
+    return f"{field_name}_variants"
+
+
+def render(image, size, fmt):
+    """Crops/scales a decoded image to ``size`` and encodes it as ``fmt``; returns the bytes."""
+    fitted = ImageOps.fit(image, size, method=Image.Resampling.LANCZOS)
+    if fmt == 'jpeg' or fitted.mode not in ('RGB', 'RGBA'):
+        fitted = fitted.convert('RGB')
+    pil_format, options = FORMATS[fmt]
+    buffer = io.BytesIO()
+    fitted.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(fieldfile, sizes):
+    """Writes every size/format of ``fieldfile`` to its storage and returns the variants dict."""
+    storage = fieldfile.storage
+    with fieldfile.open('rb') as source:
+        data = source.read()
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    directory, filename = os.path.split(fieldfile.name)
+    stem = os.path.splitext(filename)[0]
+
+    image = Image.open(io.BytesIO(data))
+    # Lets the JPEG decoder skip detail the largest variant does not need
+    longest = max(max(size) for size in sizes.values())
+    image.draft('RGB', (longest, longest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    variants = {'source': fieldfile.name}
+    for size_name, size in sizes.items():
+        variants[size_name] = {}
+        for fmt in FORMATS:
+            name = os.path.join(VARIANT_DIR, directory, f"{stem}-{digest}-{size_name}.{'jpg' if fmt == 'jpeg' else fmt}")
+            # Names are content-addressed, so an existing file is already correct
+            if not storage.exists(name):
+                name = storage.save(name, io.BytesIO(render(image, size, fmt)))
+            variants[size_name][fmt] = name
+    return variants
+
+
+def variant_names(variants):
+    return {name for size_name, formats in variants.items() if size_name != 'source' for name in formats.values()}
+
+
+def generate_variants(model_label, pk, field_name):
+    """Brings ``<field>_variants`` of one row up to date with its image field."""
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    fieldfile = getattr(instance, field_name)
+    attname = variants_attname(field_name)
+    old = getattr(instance, attname) or {}
+    if (fieldfile.name or None) == old.get('source'):
+        return
+    try:
+        new = build_variants(fieldfile, IMAGE_FIELDS[model_label][field_name]) if fieldfile else {}
+    except Exception as e:
+        logger.error(f"Image variants failed for {model_label} {pk} {field_name}: {e}")
+        return
+    setattr(instance, attname, new)
+    # A regular save, so cached listings and ETags see the new URLs
+    instance.save(update_fields=[attname, 'updated_at'])
+    for name in variant_names(old) - variant_names(new):
+        try:
+            fieldfile.storage.delete(name)
+        except Exception as e:
+            logger.warning(f"Could not delete stale image variant {name}: {e}")
+    logger.info(f"Image variants ready for {model_label} {pk} {field_name}")
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2), thread_name_prefix='ImageVariants'
+            )
+        return _executor
+
+
+def schedule(model_label, pk, field_name):
+    if getattr(settings, 'IMAGE_VARIANT_WORKERS', 2) <= 0:
+        generate_variants(model_label, pk, field_name)
+    else:
+        get_executor().submit(generate_variants, model_label, pk, field_name)
+
+
+def _image_saved(sender, instance, update_fields=None, **kwargs):
+    label = sender._meta.label
+    for field_name in IMAGE_FIELDS[label]:
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        fieldfile = getattr(instance, field_name)
+        variants = getattr(instance, variants_attname(field_name)) or {}
+        if (fieldfile.name or None) != variants.get('source'):
+            # After commit, so the worker reads the new file name
+            transaction.on_commit(lambda pk=instance.pk, field_name=field_name: schedule(label, pk, field_name))
+
+
+for model_label in IMAGE_FIELDS:
+    post_save.connect(_image_saved, sender=model_label, dispatch_uid=f'image_variants_{model_label}')
+
+
+def pick_variant(fieldfile, size, fmt=DEFAULT_FORMAT):
+    """Storage name of the ``size``/``fmt`` variant of ``fieldfile``, or of the original if there is none."""
+    variants = getattr(fieldfile.instance, variants_attname(fieldfile.field.name), None) or {}
+    if variants.get('source') == fieldfile.name and size in variants:
+        return variants[size].get(fmt) or variants[size][DEFAULT_FORMAT]
+    return fieldfile.name
+
+
+def variant_url(request, fieldfile, size, fmt=DEFAULT_FORMAT):
+    """URL of a variant (see ``pick_variant``), absolute when there is a request; None without an image."""
+    if not fieldfile:
+        return None
+    url = fieldfile.storage.url(pick_variant(fieldfile, size, fmt))
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class VariantImageField(serializers.ImageField):
+    """ImageField that represents the upload by its variant for the request's ``image_size``/``image_format``."""
+
+    def __init__(self, default_size='medium', **kwargs):
+        self.default_size = default_size
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        params = self.context.get('query_params', getattr(request, 'query_params', {}))
+        size = params.get('image_size') or self.default_size
+        fmt = params.get('image_format') if params.get('image_format') in FORMATS else DEFAULT_FORMAT
+        if not value or size == 'original':
+            return super().to_representation(value)
+        return variant_url(request, value, size, fmt)
+
+
+def serve_variant(request, path):
+    """Serves a variant from MEDIA_ROOT with far-future caching (its name changes with its content)."""
+    response = serve(request, path, document_root=os.path.join(settings.MEDIA_ROOT, VARIANT_DIR))
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -0,0 +1,178 @@
+"""
+Spool files for live class recordings.
+
+The teacher's browser streams MediaRecorder chunks while the class runs; each
+chunk is written at its byte offset into one spool file per ClassSession and
+its SHA-256 is recorded in a manifest next to it. Finalizing moves the spool
+into media storage and attaches it to ``ClassSession.recording``.
+
+Appends and finalizing for one session are serialized with ``spool_lock()``,
+an flock on a lock file beside the spool (the spool itself is replaced on
+finalize), so no database lock is held while a chunk streams in.
+"""
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import hmac
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class ChunkError(Exception):
+    """Raised when a chunk cannot be appended; carries the current spool size."""
+
+    def __init__(self, message, current_size):
+        super().__init__(message)
+        self.current_size = current_size
+
+
+class OffsetConflict(ChunkError):
+    """Raised when a chunk's offset is not the spool's current size; the client resumes from there."""
+
+
+def _spool_root():
+    root = settings.RECORDING_SPOOL_ROOT
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def spool_path(session_id):
+    """Returns the spool file path for a ClassSession id."""
+    return os.path.join(_spool_root(), f"session_{int(session_id)}.webm.part")
+
+
+def manifest_path(session_id):
+    """Returns the checksum manifest path for a ClassSession id."""
+    return os.path.join(_spool_root(), f"session_{int(session_id)}.sha256")
+
+
+def lock_path(session_id):
+    """Returns the lock file path for a ClassSession id."""
+    return os.path.join(_spool_root(), f"session_{int(session_id)}.lock")
+
+
+@contextmanager
+def spool_lock(session_id):
+    """Holds an exclusive lock on the session's spool, across worker processes."""
+    with open(lock_path(session_id), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def spool_size(session_id):
+    """Returns the number of bytes received so far (the next expected offset)."""
+    try:
+        return os.path.getsize(spool_path(session_id))
+    except FileNotFoundError:
+        return 0
+
+
+def append_chunk(session_id, offset, stream, length, expected_sha256):
+    """Streams ``length`` bytes from ``stream`` into the spool at ``offset``.
+
+    The chunk must start exactly at the current end of the spool. If the
+    checksum does not match, the spool is truncated back to ``offset``.
+    Holds ``spool_lock()`` throughout. Returns the new spool size.
+    """
+    with spool_lock(session_id):
+        return _append_chunk(session_id, offset, stream, length, expected_sha256)
+
+
+def _append_chunk(session_id, offset, stream, length, expected_sha256):
+    current = spool_size(session_id)
+    if offset != current:
+        raise OffsetConflict(f"Expected offset {current}, got {offset}.", current)
+
+    path = spool_path(session_id)
+    digest = hashlib.sha256()
+    remaining = length
+    with open(path, 'ab') as spool:
+        while remaining > 0:
+            block = stream.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            spool.write(block)
+            digest.update(block)
+            remaining -= len(block)
+
+        received = length - remaining
+        checksum = digest.hexdigest()
+        if remaining or not hmac.compare_digest(checksum, expected_sha256.lower()):
+            spool.truncate(offset)
+            reason = "Incomplete chunk body." if remaining else "Chunk checksum mismatch."
+            raise ChunkError(reason, offset)
+
+    with open(manifest_path(session_id), 'a') as manifest:
+        manifest.write(f"{offset} {received} {checksum}\n")
+    return offset + received
+
+
+def file_sha256(path):
+    """Computes the SHA-256 of a file without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(session, expected_size, expected_sha256=None):
+    """Verifies the spool and attaches it to ``session.recording``.
+
+    On local storage the spool is moved into place; remote storages receive
+    a streamed copy. The spool, manifest and lock file are removed afterwards.
+    """
+    with spool_lock(session.id):
+        name = _finalize(session, expected_size, expected_sha256)
+        # Appends waiting on this lock find no spool and get an OffsetConflict
+        os.remove(lock_path(session.id))
+    return name
+
+
+def _finalize(session, expected_size, expected_sha256):
+    path = spool_path(session.id)
+    size = spool_size(session.id)
+    if size == 0:
+        raise ChunkError("No recording chunks received.", 0)
+    if size != expected_size:
+        raise ChunkError(f"Recording has {size} bytes, expected {expected_size}.", size)
+    if expected_sha256 and not hmac.compare_digest(file_sha256(path), expected_sha256.lower()):
+        raise ChunkError("Recording checksum mismatch.", size)
+
+    name = f"recordings/session_{session.id}_{timezone.now():%Y%m%d%H%M%S}.webm"
+    try:
+        target = default_storage.path(name)
+    except NotImplementedError:
+        target = None
+
+    if target:
+        name = default_storage.get_available_name(name)
+        target = default_storage.path(name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+    else:
+        with open(path, 'rb') as f:
+            name = default_storage.save(name, File(f))
+        os.remove(path)
+
+    session.recording.name = name
+    session.save(update_fields=['recording', 'updated_at'])
+
+    try:
+        os.remove(manifest_path(session.id))
+    except FileNotFoundError:
+        pass
+    logger.info(f"Recording finalized: session_id={session.id}, size={size}, name={name}")
+    return name
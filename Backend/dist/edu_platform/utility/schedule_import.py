@@ -0,0 +1,327 @@
+"""
+Bulk import of class schedules from an Excel workbook or CSV file.
+
+One row per batch, with a header row naming the columns:
+
+    course_id, teacher_email, batch, start_date, end_date,
+    days, start_time, end_time                       (weekdays batches)
+    saturday_start, saturday_end, sunday_start, sunday_end   (weekends batches)
+    exception_dates                                  (optional, comma-separated)
+
+Times are 12-hour strings like '4:00 PM' (or time cells), dates ISO strings
+or date cells, ``days`` a comma-separated list of weekday names (default
+Monday to Friday). Workbooks are read with openpyxl in read-only mode, so
+the file is streamed rather than loaded whole.
+
+Every row is checked before anything is written, with the same rules as
+ClassScheduleSerializer: the course and teacher exist, one teacher per
+course and one course per teacher, and no session overlaps another class
+of the teacher, whether already in the database or elsewhere in the file.
+If any row fails nothing is created and the report lists each row's
+errors; otherwise all schedules, sessions and summaries are written with
+bulk inserts in one transaction.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+import csv
+import io
+import logging
+import os
+
+from edu_platform.models import ClassSchedule, ClassScheduleSummary, ClassSession, Course, User
+from edu_platform.utility.course_list_cache import bump_version
+from edu_platform.utility.schedule_summary import format_time_range, summarize_occurrences
+from edu_platform.utility.session_generator import (
+    build_sessions, encode_recurrence, find_conflicts, is_overlap_violation,
+    materialization_horizon, rule_intervals, virtual_occurrences,
+)
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+REQUIRED_COLUMNS = ('course_id', 'teacher_email', 'batch', 'start_date', 'end_date')
+SESSION_BATCH_SIZE = 2000
+
+
+class ImportFileError(ValueError):
+    """The file cannot be read as a schedule sheet at all."""
+
+
+def _column(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+
+def iter_rows(file, filename):
+    """Yields ``(row_number, {column: value})`` for the data rows of a .xlsx or .csv file."""
+    workbook = None
+    try:
+        if os.path.splitext(filename)[1].lower() == '.csv':
+            text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+            rows = csv.reader(text)
+        else:
+            from openpyxl import load_workbook
+            try:
+                workbook = load_workbook(file, read_only=True, data_only=True)
+            except Exception as e:
+                raise ImportFileError(f"Could not read the workbook: {e}")
+            if not workbook.worksheets:
+                raise ImportFileError("The workbook has no sheets.")
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [_column(name) for name in next(rows, ())]
+        missing = [name for name in REQUIRED_COLUMNS if name not in header]
+        if missing:
+            raise ImportFileError(f"Missing columns: {', '.join(missing)}.")
+        for number, values in enumerate(rows, start=2):
+            row = {name: value for name, value in zip(header, values) if name}
+            if any(value not in (None, '') for value in row.values()):
+                yield number, row
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Could not read the file: {e}")
+    finally:
+        if workbook is not None:
+            # Read-only workbooks keep the archive open until closed
+            workbook.close()
+
+
+def _text(value):
+    return str(value).strip() if value is not None else ''
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(_text(value))
+
+
+def _time(value):
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    text = _text(value)
+    for pattern in ('%I:%M %p', '%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(text, pattern).time()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time format: '{text}'. Use format like '4:00 PM'.")
+
+
+def _dates(value):
+    if isinstance(value, (date, datetime)):
+        return [_date(value)]
+    return [_date(part) for part in _text(value).split(',') if part.strip()]
+
+
+def _time_range(row, start_column, end_column, errors):
+    """Parses a start/end time pair; None when both are blank."""
+    if not _text(row.get(start_column)) and not _text(row.get(end_column)):
+        return None
+    try:
+        start, end = _time(row.get(start_column)), _time(row.get(end_column))
+    except ValueError as e:
+        errors.append(str(e))
+        return None
+    if start >= end:
+        errors.append(f"{end_column.replace('_', ' ').title()} must be after {start_column.replace('_', ' ')}.")
+        return None
+    return start, end
+
+
+def parse_row(row):
+    """Returns ``(plan, errors)`` for one row; ``plan`` holds the schedule fields and session rules."""
+    errors = []
+    plan = {'teacher_email': _text(row.get('teacher_email')).lower()}
+    try:
+        plan['course_id'] = int(float(_text(row.get('course_id'))))
+    except (OverflowError, ValueError):
+        errors.append("Course ID must be a number.")
+    if not plan['teacher_email']:
+        errors.append("Teacher email is required.")
+    plan['batch'] = _text(row.get('batch')).lower()
+    if plan['batch'] not in ('weekdays', 'weekends'):
+        errors.append("Batch must be one of: weekdays, weekends.")
+    try:
+        plan['start_date'], plan['end_date'] = _date(row.get('start_date')), _date(row.get('end_date'))
+        if plan['start_date'] > plan['end_date']:
+            errors.append("End date must be after start date.")
+    except (TypeError, ValueError):
+        errors.append("Start date and end date must be dates (YYYY-MM-DD).")
+    try:
+        plan['exceptions'] = set(_dates(row.get('exception_dates')))
+    except (TypeError, ValueError):
+        errors.append("Exception dates must be comma-separated dates (YYYY-MM-DD).")
+    if errors:
+        return None, errors
+
+    slots = []
+    if plan['batch'] == 'weekdays':
+        days = [day.strip().title() for day in _text(row.get('days')).split(',') if day.strip()] or WEEKDAYS
+        if not all(day in WEEKDAYS for day in days):
+            errors.append(f"Weekdays must be from: {', '.join(WEEKDAYS)}.")
+        times = _time_range(row, 'start_time', 'end_time', errors)
+        if times:
+            slots.append((days, times))
+        elif not errors:
+            errors.append("Start time and end time are required for 'weekdays' batch.")
+    else:
+        for day in ('Saturday', 'Sunday'):
+            times = _time_range(row, f'{day.lower()}_start', f'{day.lower()}_end', errors)
+            if times:
+                slots.append(([day], times))
+        if not slots and not errors:
+            errors.append("At least Saturday or Sunday timings must be provided.")
+    plan['rules'] = [
+        {'start_date': plan['start_date'], 'end_date': plan['end_date'], 'days': days, 'start_time': start, 'end_time': end}
+        for days, (start, end) in slots
+    ]
+    return (None, errors) if errors else (plan, [])
+
+
+def _file_overlaps(intervals):
+    """``intervals`` are (start, end, row) of one teacher; returns (row, other_row, start) for rows overlapping each other."""
+    overlaps = []
+    active = []
+    for start, end, row in sorted(intervals, key=lambda interval: interval[0]):
+        active = [item for item in active if item[1] > start]
+        overlaps.extend((row, other, start) for _, _, other in active if other != row)
+        active.append((start, end, row))
+    return overlaps
+
+
+def validate_rows(rows):
+    """Returns ``(plans, report)``: the parsed rows and ``{row_number: [errors]}`` for the ones that failed."""
+    report = defaultdict(list)
+    plans = {}
+    for number, row in rows:
+        plan, errors = parse_row(row)
+        if errors:
+            report[number].extend(errors)
+        else:
+            plans[number] = plan
+
+    courses = Course.objects.filter(id__in={plan['course_id'] for plan in plans.values()}, is_active=True).in_bulk()
+    teachers = {
+        teacher.email.lower(): teacher
+        for teacher in User.objects.annotate(email_lower=Lower('email')).filter(
+            email_lower__in={plan['teacher_email'] for plan in plans.values()}, role='teacher'
+        )
+    }
+    # One teacher per course and one course per teacher, counting existing schedules
+    course_teacher, teacher_course = {}, {}
+    for course_id, teacher_id in ClassSchedule.objects.filter(
+        course_id__in=courses.keys()
+    ).values_list('course_id', 'teacher_id').distinct():
+        course_teacher.setdefault(course_id, teacher_id)
+    for teacher_id, course_id in ClassSchedule.objects.filter(
+        teacher__in=teachers.values()
+    ).values_list('teacher_id', 'course_id').distinct():
+        teacher_course.setdefault(teacher_id, course_id)
+
+    for number, plan in list(plans.items()):
+        course, teacher = courses.get(plan['course_id']), teachers.get(plan['teacher_email'])
+        if course is None:
+            report[number].append(f"Course with ID {plan['course_id']} not found or inactive.")
+        if teacher is None:
+            report[number].append(f"Teacher with email {plan['teacher_email']} not found or not a teacher.")
+        if course is None or teacher is None:
+            del plans[number]
+            continue
+        assigned_teacher = course_teacher.setdefault(course.id, teacher.id)
+        assigned_course = teacher_course.setdefault(teacher.id, course.id)
+        if assigned_teacher != teacher.id:
+            report[number].append(f"Course {course.id} is already assigned to another teacher. A course can only be assigned to one teacher.")
+        if assigned_course != course.id:
+            report[number].append(f'Teacher "{teacher.username}" is already assigned to another course (Course ID {assigned_course}). A teacher can only be assigned to one course.')
+        if number in report:
+            del plans[number]
+            continue
+        plan['course'], plan['teacher'] = course, teacher
+
+    # Session overlaps, against the database and between rows of the file
+    by_teacher = defaultdict(list)
+    for number, plan in plans.items():
+        for rule in plan['rules']:
+            by_teacher[plan['teacher'].id].extend(
+                (start, end, number) for start, end in rule_intervals(rule, plan['exceptions'])
+            )
+    for teacher_id, intervals in by_teacher.items():
+        rows_by_start = defaultdict(list)
+        for start, end, number in intervals:
+            rows_by_start[(start, end)].append(number)
+        for start, end, existing in find_conflicts(teacher_id, [(start, end) for start, end, _ in intervals]):
+            for number in rows_by_start[(start, end)]:
+                report[number].append(
+                    f"Teacher has a conflicting session on {existing.session_date.strftime('%Y-%m-%d')} "
+                    f"(existing: {format_time_range(existing.start_time, existing.end_time)})."
+                )
+        for number, other, start in _file_overlaps(intervals):
+            report[number].append(f"Session on {start.date().isoformat()} overlaps the session of row {other} for the same teacher.")
+            report[other].append(f"Session on {start.date().isoformat()} overlaps the session of row {number} for the same teacher.")
+
+    for number in report:
+        plans.pop(number, None)
+    # A row can clash with many sessions; one message per distinct problem is enough
+    return plans, {number: list(dict.fromkeys(errors)) for number, errors in sorted(report.items())}
+
+
+def create_schedules(plans):
+    """Writes the schedules, sessions and summaries of validated ``plans`` with bulk inserts."""
+    ordered = [plans[number] for number in sorted(plans)]
+    schedules = []
+    for plan in ordered:
+        recurrence = encode_recurrence(plan['rules'], plan['exceptions'])
+        schedules.append(ClassSchedule(
+            course=plan['course'], teacher=plan['teacher'], batch=plan['batch'],
+            batch_start_date=plan['start_date'], batch_end_date=plan['end_date'],
+            recurrence=recurrence, sessions_materialized_until=materialization_horizon(plan['rules'])
+        ))
+    with transaction.atomic():
+        ClassSchedule.objects.bulk_create(schedules)
+        sessions, summaries = [], []
+        for plan, schedule in zip(ordered, schedules):
+            rows = build_sessions(schedule, plan['rules'], plan['exceptions'], until=schedule.sessions_materialized_until)
+            sessions.extend(rows)
+            occurrences = sorted(rows + virtual_occurrences(schedule), key=lambda session: session.start_time)
+            if occurrences:
+                summaries.append(ClassScheduleSummary(schedule=schedule, **summarize_occurrences(occurrences)))
+        ClassSession.objects.bulk_create(sessions, batch_size=SESSION_BATCH_SIZE)
+        ClassScheduleSummary.objects.bulk_create(summaries)
+    # bulk_create sends no signals, so cached course listings are not invalidated otherwise
+    bump_version()
+    return schedules, len(sessions)
+
+
+def import_schedules(file, filename, dry_run=False):
+    """
+    Validates every row of the file and, if all pass and ``dry_run`` is off,
+    creates them. Returns ``{'rows', 'created', 'sessions', 'errors'}`` where
+    ``errors`` is a list of ``{'row', 'errors'}``. Raises ImportFileError for
+    unreadable files.
+    """
+    rows = list(iter_rows(file, filename))
+    plans, report = validate_rows(rows)
+    result = {
+        'rows': len(rows),
+        'created': 0,
+        'sessions': 0,
+        'errors': [{'row': number, 'errors': errors} for number, errors in report.items()],
+    }
+    if report or dry_run or not plans:
+        return result
+    try:
+        schedules, session_count = create_schedules(plans)
+    except IntegrityError as e:
+        if not is_overlap_violation(e):
+            raise
+        # Another write booked one of the teachers after validation ran
+        result['errors'] = [{'row': None, 'errors': ["A teacher was booked at one of these times while importing. Please retry."]}]
+        return result
+    logger.info(f"Imported {len(schedules)} schedules with {session_count} sessions from {filename}")
+    result.update(created=len(schedules), sessions=session_count)
+    return result
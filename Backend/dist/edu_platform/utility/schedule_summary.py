@@ -0,0 +1,127 @@
+"""
+Maintains ``ClassScheduleSummary`` rows from a schedule's ClassSessions.
+
+Course listings show, per batch, the weekdays that have classes and the time
+of the first session (or of the first Saturday/Sunday session for weekend
+batches). Working that out from the sessions themselves costs several
+queries and a pass over every session of the batch; instead each
+ClassSession save/delete recomputes the summary of its schedule with a few
+aggregate queries, and serializers only read the summary.
+
+Code creating many sessions at once should run inside
+``deferred_schedule_summaries()`` (a context manager or decorator) so each
+schedule is summarized once at the end rather than after every session.
+Writes that bypass the signals (``bulk_create``, ``update()``) call
+``schedule_sessions_changed()`` themselves.
+"""
+
+from contextlib import contextmanager
+from django.db.models.functions import ExtractIsoWeekDay
+from django.db.models.signals import post_save, post_delete
+import threading
+
+# Index = ISO weekday - 1; fixed names so the output does not depend on the locale
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+_deferred = threading.local()
+
+
+def format_time_range(start, end):
+    """Formats a session's start/end as shown in course schedules, e.g. '09:00 AM to 10:30 AM'."""
+    return f"{start.strftime('%I:%M %p')} to {end.strftime('%I:%M %p')}"
+
+
+def summarize_sessions(sessions):
+    """Returns the ClassScheduleSummary fields for a queryset of one schedule's sessions."""
+    ordered = sessions.order_by('session_date', 'start_time')
+
+    def first_range(queryset):
+        first = queryset.values('start_time', 'end_time').first()
+        return format_time_range(first['start_time'], first['end_time']) if first else None
+
+    # order_by() drops the model's default ordering, which would defeat DISTINCT
+    weekdays = (
+        sessions.order_by()
+        .annotate(weekday=ExtractIsoWeekDay('session_date'))
+        .values_list('weekday', flat=True)
+        .distinct()
+    )
+    return {
+        'days': sorted(WEEKDAY_NAMES[weekday - 1] for weekday in weekdays),
+        'time': first_range(ordered),
+        'saturday_time': first_range(ordered.filter(session_date__iso_week_day=6)),
+        'sunday_time': first_range(ordered.filter(session_date__iso_week_day=7)),
+        'session_count': sessions.count(),
+    }
+
+
+def summarize_occurrences(occurrences):
+    """summarize_sessions() for a list of sessions ordered by start, e.g. from schedule_occurrences()."""
+
+    def first_range(sessions):
+        first = next(sessions, None)
+        return format_time_range(first.start_time, first.end_time) if first else None
+
+    return {
+        'days': sorted({WEEKDAY_NAMES[session.session_date.weekday()] for session in occurrences}),
+        'time': first_range(iter(occurrences)),
+        'saturday_time': first_range(session for session in occurrences if session.session_date.weekday() == 5),
+        'sunday_time': first_range(session for session in occurrences if session.session_date.weekday() == 6),
+        'session_count': len(occurrences),
+    }
+
+
+def refresh_schedule_summary(schedule_id):
+    """Recomputes the summary for ``schedule_id``; a schedule without sessions has none."""
+    from edu_platform.models import ClassSchedule, ClassSession, ClassScheduleSummary
+    from edu_platform.utility.session_generator import schedule_occurrences
+
+    lazy_schedule = ClassSchedule.objects.filter(pk=schedule_id, sessions_materialized_until__isnull=False).first()
+    if lazy_schedule is not None:
+        # Not every occurrence has a row yet, so summarize the expanded recurrence
+        occurrences = schedule_occurrences(lazy_schedule)
+        defaults = summarize_occurrences(occurrences) if occurrences else None
+    else:
+        sessions = ClassSession.objects.filter(schedule_id=schedule_id)
+        defaults = summarize_sessions(sessions) if sessions.exists() else None
+    if defaults is None:
+        # Also the path taken while a schedule is being cascade-deleted
+        ClassScheduleSummary.objects.filter(schedule_id=schedule_id).delete()
+        return None
+    summary, _ = ClassScheduleSummary.objects.update_or_create(schedule_id=schedule_id, defaults=defaults)
+    return summary
+
+
+@contextmanager
+def deferred_schedule_summaries():
+    """Collects schedules touched inside the block and refreshes each once on exit."""
+    pending = getattr(_deferred, 'pending', None)
+    if pending is not None:
+        # Nested: the outermost block does the refresh
+        yield
+        return
+    _deferred.pending = set()
+    try:
+        yield
+    finally:
+        pending, _deferred.pending = _deferred.pending, None
+        # Also after a failure: sessions written before it are still in the database
+        for schedule_id in pending:
+            refresh_schedule_summary(schedule_id)
+
+
+def schedule_sessions_changed(schedule_id):
+    """Refreshes the summary of ``schedule_id`` now, or when the enclosing deferred block ends."""
+    pending = getattr(_deferred, 'pending', None)
+    if pending is not None:
+        pending.add(schedule_id)
+    else:
+        refresh_schedule_summary(schedule_id)
+
+
+def _session_changed(sender, instance, **kwargs):
+    schedule_sessions_changed(instance.schedule_id)
+
+
+post_save.connect(_session_changed, sender='edu_platform.ClassSession')
+post_delete.connect(_session_changed, sender='edu_platform.ClassSession')
@@ -0,0 +1,321 @@
+"""
+Generates the ClassSessions of a batch from its recurrence.
+
+A batch is described by one or more rules: a date range, the weekday names
+that have a class and the class's start/end time. ``recurrence_dates()``
+works out the matching dates by date arithmetic (the first matching day of
+each weekday, then steps of seven days) instead of walking the range one day
+at a time. ``create_sessions()`` builds the rows of a schedule and writes
+them with a single ``bulk_create`` in one transaction; ``find_conflicts()``
+checks planned sessions against the teacher's existing ones with one query
+and a sorted sweep, reporting every overlap.
+
+On PostgreSQL the exclusion constraint ``OVERLAP_CONSTRAINT`` backs these
+checks, so two requests racing for the same slot cannot both succeed; the
+loser gets ``SessionConflictError`` (or the model's ValidationError).
+
+The rules and exception dates are kept on the schedule (``recurrence``).
+With ``SESSION_MATERIALIZE_DAYS`` set, only the occurrences up to that many
+days past the batch start (or today, once the batch is running) get rows;
+``sessions_materialized_until`` records how far, ``materialize_sessions()``
+moves the window on (daily, from the first worker's background thread in
+``apps.py``, or by hand with the ``materialize_sessions`` command) and
+``schedule_occurrences()`` expands the rest on demand as unsaved sessions.
+Those have no row yet, so API responses show them with a null ``id``.
+"""
+
+from datetime import date, datetime, time, timedelta
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from edu_platform.utility.schedule_summary import WEEKDAY_NAMES, schedule_sessions_changed
+
+WEEKDAY_INDEX = {name: index for index, name in enumerate(WEEKDAY_NAMES)}
+
+# EXCLUDE USING gist (teacher_id WITH =, tstzrange(start_time, end_time) WITH &&), see migration 0008
+OVERLAP_CONSTRAINT = 'class_sessions_teacher_no_overlap'
+
+
+class SessionConflictError(ValidationError):
+    """New sessions overlap the teacher's existing ones; ``conflicts`` as returned by find_conflicts()."""
+
+    def __init__(self, conflicts):
+        super().__init__("The teacher already has a class at this time.")
+        self.conflicts = conflicts
+
+
+def is_overlap_violation(error):
+    """Whether an IntegrityError comes from the teacher overlap constraint (per the driver's diagnostics)."""
+    diag = getattr(error.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None) == OVERLAP_CONSTRAINT
+
+
+def weekday_indexes(days):
+    """Returns the ``date.weekday()`` numbers of the weekday names in ``days``; unknown names are ignored."""
+    return {WEEKDAY_INDEX[day] for day in days if day in WEEKDAY_INDEX}
+
+
+def recurrence_dates(start_date, end_date, days):
+    """Returns the dates from ``start_date`` to ``end_date`` (inclusive) falling on ``days``, in order."""
+    span = (end_date - start_date).days
+    if span < 0:
+        return []
+    dates = []
+    for weekday in weekday_indexes(days):
+        first = (weekday - start_date.weekday()) % 7
+        dates.extend(start_date + timedelta(days=offset) for offset in range(first, span + 1, 7))
+    dates.sort()
+    return dates
+
+
+def session_bounds(session_date, start_time, end_time):
+    """Returns the aware start/end datetimes of a class on ``session_date``."""
+    return (
+        timezone.make_aware(datetime.combine(session_date, start_time)),
+        timezone.make_aware(datetime.combine(session_date, end_time)),
+    )
+
+
+def encode_recurrence(rules, exceptions=()):
+    """Returns the JSON stored in ``ClassSchedule.recurrence`` for rule dicts and exception dates."""
+    return {
+        'rules': [
+            {
+                'days': list(rule['days']),
+                'start_date': rule['start_date'].isoformat(),
+                'end_date': rule['end_date'].isoformat(),
+                'start_time': rule['start_time'].strftime('%H:%M'),
+                'end_time': rule['end_time'].strftime('%H:%M'),
+            }
+            for rule in rules
+        ],
+        'exceptions': sorted({exception.isoformat() for exception in exceptions}),
+    }
+
+
+def decode_recurrence(recurrence):
+    """Returns ``(rules, exceptions)`` from ``ClassSchedule.recurrence``."""
+    rules = [
+        {
+            'days': rule['days'],
+            'start_date': date.fromisoformat(rule['start_date']),
+            'end_date': date.fromisoformat(rule['end_date']),
+            'start_time': time.fromisoformat(rule['start_time']),
+            'end_time': time.fromisoformat(rule['end_time']),
+        }
+        for rule in (recurrence or {}).get('rules', ())
+    ]
+    return rules, {date.fromisoformat(exception) for exception in (recurrence or {}).get('exceptions', ())}
+
+
+def materialization_horizon(rules):
+    """Last date that should have rows for ``rules``; None when every occurrence should."""
+    days = getattr(settings, 'SESSION_MATERIALIZE_DAYS', 0)
+    if not days or not rules:
+        return None
+    until = max(timezone.localdate(), min(rule['start_date'] for rule in rules)) + timedelta(days=days)
+    return until if until < max(rule['end_date'] for rule in rules) else None
+
+
+def build_sessions(schedule, rules, exceptions=(), after=None, until=None):
+    """
+    Returns unsaved ClassSessions of ``schedule`` for each rule dict (start_date,
+    end_date, days, start_time, end_time), skipping ``exceptions`` and keeping
+    to dates after ``after`` and up to ``until`` when given.
+    """
+    from edu_platform.models import ClassSession
+
+    sessions = []
+    for rule in rules:
+        start_date, end_date = rule['start_date'], rule['end_date']
+        if after is not None:
+            start_date = max(start_date, after + timedelta(days=1))
+        if until is not None:
+            end_date = min(end_date, until)
+        for session_date in recurrence_dates(start_date, end_date, rule['days']):
+            if session_date in exceptions:
+                continue
+            start, end = session_bounds(session_date, rule['start_time'], rule['end_time'])
+            sessions.append(ClassSession(
+                schedule=schedule, teacher_id=schedule.teacher_id,
+                session_date=session_date, start_time=start, end_time=end
+            ))
+    return sessions
+
+
+def insert_sessions(schedule, sessions):
+    """Writes ``sessions`` of ``schedule`` with one bulk insert and refreshes its summary."""
+    from edu_platform.models import ClassSession
+
+    try:
+        with transaction.atomic():
+            created = ClassSession.objects.bulk_create(sessions)
+    except IntegrityError as e:
+        if not is_overlap_violation(e):
+            raise
+        # The teacher was booked after validation ran
+        raise SessionConflictError(
+            find_conflicts(schedule.teacher_id, [(session.start_time, session.end_time) for session in sessions])
+        ) from e
+    # bulk_create does not send post_save
+    schedule_sessions_changed(schedule.id)
+    return created
+
+
+def create_sessions(schedule, rules, exceptions=()):
+    """
+    Stores ``rules`` as the recurrence of ``schedule`` and creates its sessions
+    (those inside the materialization window) with one bulk insert. Raises
+    SessionConflictError if the overlap constraint rejects them.
+    """
+    from edu_platform.models import ClassSchedule
+
+    schedule.recurrence = encode_recurrence(rules, exceptions)
+    schedule.sessions_materialized_until = materialization_horizon(rules)
+    ClassSchedule.objects.filter(pk=schedule.pk).update(
+        recurrence=schedule.recurrence, sessions_materialized_until=schedule.sessions_materialized_until
+    )
+    return insert_sessions(
+        schedule, build_sessions(schedule, rules, set(exceptions), until=schedule.sessions_materialized_until)
+    )
+
+
+def materialize_sessions(schedule_id):
+    """Creates the rows of occurrences that entered the materialization window since the last run."""
+    from edu_platform.models import ClassSchedule
+
+    with transaction.atomic():
+        schedule = ClassSchedule.objects.select_for_update().filter(
+            pk=schedule_id, sessions_materialized_until__isnull=False
+        ).first()
+        if schedule is None:
+            return []
+        rules, exceptions = decode_recurrence(schedule.recurrence)
+        until = materialization_horizon(rules)
+        if until is not None and until <= schedule.sessions_materialized_until:
+            return []
+        created = insert_sessions(
+            schedule, build_sessions(schedule, rules, exceptions, after=schedule.sessions_materialized_until, until=until)
+        )
+        ClassSchedule.objects.filter(pk=schedule.pk).update(sessions_materialized_until=until)
+        schedule.sessions_materialized_until = until
+    return created
+
+
+def materialize_due_sessions():
+    """
+    Runs materialize_sessions() for every partly materialized schedule. Returns
+    the number of sessions created and ``(schedule_id, SessionConflictError)``
+    for the schedules skipped because their new occurrences overlap the
+    teacher's other classes.
+    """
+    from edu_platform.models import ClassSchedule
+
+    schedule_ids = ClassSchedule.objects.filter(
+        sessions_materialized_until__isnull=False
+    ).values_list('pk', flat=True)
+    created, skipped = 0, []
+    for schedule_id in schedule_ids.iterator():
+        try:
+            created += len(materialize_sessions(schedule_id))
+        except SessionConflictError as e:
+            # Occurrences without rows are not covered by the overlap constraint until now
+            skipped.append((schedule_id, e))
+    return created, skipped
+
+
+def virtual_occurrences(schedule, start_date=None, end_date=None):
+    """
+    Returns unsaved sessions for the occurrences of ``schedule`` that have no
+    row yet, between ``start_date`` and ``end_date`` when given. They have no
+    id or class_id.
+    """
+    if schedule.sessions_materialized_until is None:
+        return []
+    after = schedule.sessions_materialized_until
+    if start_date is not None:
+        after = max(after, start_date - timedelta(days=1))
+    rules, exceptions = decode_recurrence(schedule.recurrence)
+    sessions = build_sessions(schedule, rules, exceptions, after=after, until=end_date)
+    for session in sessions:
+        session.class_id = None
+    return sessions
+
+
+def schedule_occurrences(schedule, start_date=None, end_date=None):
+    """
+    Returns the sessions of ``schedule`` (between the given dates) ordered by
+    start: its ClassSession rows followed by the occurrences not materialized
+    yet. Uses the prefetched ``sessions`` when no dates are given.
+    """
+    sessions = schedule.sessions.all()
+    if start_date is not None or end_date is not None:
+        sessions = sessions.filter(session_date__range=(start_date or date.min, end_date or date.max))
+    sessions = list(sessions)
+    virtual = virtual_occurrences(schedule, start_date, end_date)
+    if not virtual:
+        return sessions
+    return sorted(sessions + virtual, key=lambda session: session.start_time)
+
+
+def overlapping_sessions(intervals, sessions):
+    """
+    Sweeps ``intervals`` ((start, end) pairs) and ``sessions``, both sorted by
+    start, and returns ``(start, end, session)`` for every overlapping pair.
+    """
+    conflicts = []
+    active = []
+    upcoming = iter(sessions)
+    pending = next(upcoming, None)
+    for start, end in intervals:
+        while pending is not None and pending.start_time < end:
+            active.append(pending)
+            pending = next(upcoming, None)
+        # Intervals come in start order, so a session over before this one starts is over for the rest
+        active = [session for session in active if session.end_time > start]
+        conflicts.extend((start, end, session) for session in active if session.start_time < end)
+    return conflicts
+
+
+def find_conflicts(teacher_id, intervals, exclude=()):
+    """
+    Returns ``(start, end, existing_session)`` for every one of ``intervals``
+    that overlaps a session of the teacher, ordered by start. The teacher's
+    sessions in the window are loaded with one query, and the schedules whose
+    occurrences there are not all materialized with another; ``exclude``
+    lists session ids to ignore, e.g. the session being edited.
+    """
+    from edu_platform.models import ClassSchedule, ClassSession
+
+    intervals = sorted(intervals)
+    if not intervals:
+        return []
+    window_end = max(end for _, end in intervals)
+    first_date, last_date = timezone.localdate(intervals[0][0]), timezone.localdate(window_end)
+    sessions = list(ClassSession.objects.filter(
+        teacher_id=teacher_id,
+        session_date__range=(first_date, last_date),
+        start_time__lt=window_end,
+        end_time__gt=intervals[0][0],
+    ).exclude(pk__in=exclude).order_by('start_time').only('class_id', 'session_date', 'start_time', 'end_time'))
+    # Occurrences of the teacher's schedules that have no rows yet
+    lazy_schedules = ClassSchedule.objects.filter(
+        teacher_id=teacher_id, sessions_materialized_until__lt=last_date
+    ).only('teacher_id', 'recurrence', 'sessions_materialized_until')
+    virtual = [
+        session for schedule in lazy_schedules
+        for session in virtual_occurrences(schedule, first_date, last_date)
+    ]
+    if virtual:
+        sessions = sorted(sessions + virtual, key=lambda session: session.start_time)
+    return overlapping_sessions(intervals, sessions)
+
+
+def rule_intervals(rule, exceptions=()):
+    """Returns the (start, end) datetimes of every session ``rule`` would create, skipping ``exceptions``."""
+    return [
+        session_bounds(session_date, rule['start_time'], rule['end_time'])
+        for session_date in recurrence_dates(rule['start_date'], rule['end_date'], rule['days'])
+        if session_date not in exceptions
+    ]
@@ -1,7 +1,7 @@
 from rest_framework import generics, status, views
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from edu_platform.token_blacklist import RefreshToken
 from rest_framework import serializers
 from django.contrib.auth import login
 from django.core.mail import send_mail
@@ -12,6 +12,8 @@ from django.utils import timezone
 from edu_platform.permissions.auth_permissions import IsAdmin, IsTeacher, IsStudent
 from edu_platform.models import User, OTP, CourseSubscription, ClassSchedule, ClassSession, StudentProfile, TeacherProfile
 from edu_platform.utility.email_services import send_otp_email
+from edu_platform.pagination import KeysetPagination, InvalidCursor, PAGINATION_PARAMETERS
+from edu_platform.serializers.sparse_fieldsets import InvalidFieldset, fieldset_params, fieldset_queryset, SPARSE_FIELDSET_PARAMETERS
 from edu_platform.utility.sms_services import get_sms_service, ConsoleSMSService
 from edu_platform.serializers.auth_serializers import (
     UserSerializer, RegisterSerializer, LoginSerializer, 
@@ -25,14 +27,16 @@ import boto3, botocore
 
 logger = logging.getLogger(__name__)
 
-def api_response(message, message_type, data=None, status_code=200):
-    """Standardizes API response structure."""
+def api_response(message, message_type, data=None, status_code=200, pagination=None):
+    """Standardizes API response structure; ``pagination`` adds top-level keys such as ``next``."""
     response_data = {
         'message': message,
         'message_type': message_type
     }
     if data is not None:
         response_data['data'] = data
+    if pagination:
+        response_data.update(pagination)
     return Response(response_data, status=status_code)
 
 def get_serializer_error_message(errors):
@@ -1113,10 +1117,15 @@ class ForgotPasswordView(generics.GenericAPIView):
 class ListTeachersView(generics.ListAPIView):
     serializer_class = TeacherProfileSerializer
     permission_classes = [IsAuthenticated]
-    queryset = TeacherProfile.objects.all()
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        """Teacher profiles with their users, trimmed to the requested fields."""
+        return fieldset_queryset(TeacherProfile.objects.select_related('user'), TeacherProfileSerializer, fieldset_params(self.request))
 
     @swagger_auto_schema(
         operation_description="List all teachers with their profiles",
+        manual_parameters=PAGINATION_PARAMETERS + SPARSE_FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Teachers retrieved successfully",
@@ -1148,13 +1157,19 @@ class ListTeachersView(generics.ListAPIView):
     def get(self, request, *args, **kwargs):
         try:
             queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True, context={'request': request, 'is_nested': False})
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_serializer(
+                page if page is not None else queryset, many=True, context={'request': request, 'is_nested': False}
+            )
             return api_response(
                 message='Teachers retrieved successfully.',
                 message_type='success',
                 data=serializer.data,
-                status_code=status.HTTP_200_OK
+                status_code=status.HTTP_200_OK,
+                pagination=self.paginator.get_envelope()
             )
+        except (InvalidCursor, InvalidFieldset) as e:
+            return api_response(message=str(e), message_type='error', status_code=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"List teachers error: {str(e)}")
             return api_response(
@@ -1166,10 +1181,15 @@ class ListTeachersView(generics.ListAPIView):
 class ListStudentsView(generics.ListAPIView):
     serializer_class = StudentProfileSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
-    queryset = StudentProfile.objects.all()
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        """Student profiles with their users, trimmed to the requested fields."""
+        return fieldset_queryset(StudentProfile.objects.select_related('user'), StudentProfileSerializer, fieldset_params(self.request))
 
     @swagger_auto_schema(
         operation_description="List all students with their profiles (Admin only)",
+        manual_parameters=PAGINATION_PARAMETERS + SPARSE_FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Students retrieved successfully",
@@ -1202,13 +1222,19 @@ class ListStudentsView(generics.ListAPIView):
     def get(self, request, *args, **kwargs):
         try:
             queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True, context={'request': request, 'is_nested': False})
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_serializer(
+                page if page is not None else queryset, many=True, context={'request': request, 'is_nested': False}
+            )
             return api_response(
                 message='Students retrieved successfully.',
                 message_type='success',
                 data=serializer.data,
-                status_code=status.HTTP_200_OK
+                status_code=status.HTTP_200_OK,
+                pagination=self.paginator.get_envelope()
             )
+        except (InvalidCursor, InvalidFieldset) as e:
+            return api_response(message=str(e), message_type='error', status_code=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"List students error: {str(e)}")
             return api_response(
@@ -2,32 +2,47 @@ from rest_framework import status
 from rest_framework import serializers
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.decorators import api_view, parser_classes, permission_classes
 from rest_framework.parsers import MultiPartParser, FormParser
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import no_body, swagger_auto_schema
 from drf_yasg import openapi
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta, datetime
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import DatabaseError
+from django.db import DatabaseError, transaction
 from edu_platform.permissions.auth_permissions import IsAdmin, IsTeacher
 from edu_platform.models import User, ClassSchedule, ClassSession, Course, CourseEnrollment, CourseSubscription
 from edu_platform.serializers.class_serializers import ClassScheduleSerializer, ClassSessionSerializer, CourseSessionSerializer
+from edu_platform.utility import recording_spool
+from edu_platform.pagination import KeysetPagination, InvalidCursor, PAGINATION_PARAMETERS
+from edu_platform.utility.conditional_get import conditional_get
+from edu_platform.utility.image_variants import variant_url
+from edu_platform.utility.calendar_feed import astream_feed, feed_scope, feed_token, feed_user, rotate_feed_key, stream_feed
+from edu_platform.utility.schedule_import import ImportFileError, import_schedules
+from edustream.db import release_connections
 from django.db.models import Q, F, Count
 import logging
 
 logger = logging.getLogger(__name__)
 
-def api_response(message, message_type, data=None, status_code=200):
-    """Standardizes API response structure."""
+# With SESSION_MATERIALIZE_DAYS, far-off occurrences are listed before their row exists
+SESSION_ID_DESCRIPTION = "Session ID; null for an occurrence not written as a row yet (see SESSION_MATERIALIZE_DAYS)"
+
+def api_response(message, message_type, data=None, status_code=200, pagination=None):
+    """Standardizes API response structure; ``pagination`` adds top-level keys such as ``next``."""
     response_data = {
         'message': message,
         'message_type': message_type
     }
     if data is not None:
         response_data['data'] = data
+    if pagination:
+        response_data.update(pagination)
     return Response(response_data, status=status_code)
 
 def get_serializer_error_message(errors):
@@ -72,6 +87,7 @@ class ClassScheduleView(APIView):
 
     @swagger_auto_schema(
         operation_description="List all class schedules (admin) or teacher's own schedules",
+        manual_parameters=PAGINATION_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Class schedules retrieved successfully",
@@ -95,7 +111,7 @@ class ClassScheduleView(APIView):
                                         items=openapi.Schema(
                                             type=openapi.TYPE_OBJECT,
                                             properties={
-                                                'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                                'id': openapi.Schema(type=openapi.TYPE_INTEGER, nullable=True, description=SESSION_ID_DESCRIPTION),
                                                 'session_date': openapi.Schema(type=openapi.TYPE_STRING, format='date'),
                                                 'start_time': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
                                                 'end_time': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
@@ -181,13 +197,18 @@ class ClassScheduleView(APIView):
                     )
                 schedules = ClassSchedule.objects.filter(teacher=request.user)
             
-            serializer = ClassScheduleSerializer(schedules, many=True)
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(schedules, request, ordering=('batch_start_date', 'id'))
+            serializer = ClassScheduleSerializer(page if page is not None else schedules, many=True)
             return api_response(
                 message='Class schedules retrieved successfully.',
                 message_type='success',
                 data=serializer.data,
-                status_code=status.HTTP_200_OK
+                status_code=status.HTTP_200_OK,
+                pagination=paginator.get_envelope()
             )
+        except InvalidCursor as e:
+            return api_response(message=str(e), message_type='error', status_code=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error retrieving class schedules: {str(e)}")
             return api_response(
@@ -223,7 +244,7 @@ class ClassScheduleView(APIView):
                                             items=openapi.Schema(
                                                 type=openapi.TYPE_OBJECT,
                                                 properties={
-                                                    'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                                    'id': openapi.Schema(type=openapi.TYPE_INTEGER, nullable=True, description=SESSION_ID_DESCRIPTION),
                                                     'session_date': openapi.Schema(type=openapi.TYPE_STRING, format='date'),
                                                     'start_time': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
                                                     'end_time': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
@@ -263,7 +284,7 @@ class ClassScheduleView(APIView):
                                                 items=openapi.Schema(
                                                     type=openapi.TYPE_OBJECT,
                                                     properties={
-                                                        'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                                        'id': openapi.Schema(type=openapi.TYPE_INTEGER, nullable=True, description=SESSION_ID_DESCRIPTION),
                                                         'session_date': openapi.Schema(type=openapi.TYPE_STRING, format='date'),
                                                         'start_time': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
                                                         'end_time': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
@@ -376,6 +397,8 @@ class ClassScheduleView(APIView):
                 return api_response(
                     message=e.detail['message'],
                     message_type=e.detail['message_type'],
+                    # Every overlapping session when the teacher's timetable conflicts
+                    data=getattr(e, 'conflicts', None),
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
             # Fallback to get_serializer_error_message for other cases
@@ -417,7 +440,7 @@ class ClassScheduleView(APIView):
                                     items=openapi.Schema(
                                         type=openapi.TYPE_OBJECT,
                                         properties={
-                                            'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                            'id': openapi.Schema(type=openapi.TYPE_INTEGER, nullable=True, description=SESSION_ID_DESCRIPTION),
                                             'session_date': openapi.Schema(type=openapi.TYPE_STRING, format='date'),
                                             'start_time': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
                                             'end_time': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
@@ -520,7 +543,15 @@ class ClassScheduleView(APIView):
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
             
-            serializer.save()
+            try:
+                serializer.save()
+            except ValidationError as e:
+                # Moving the schedule to a teacher who is busy at its session times
+                return api_response(
+                    message=e.messages[0],
+                    message_type='error',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
             return api_response(
                 message='Class schedule updated successfully.',
                 message_type='success',
@@ -541,12 +572,113 @@ class ClassScheduleView(APIView):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class ClassScheduleImportView(APIView):
+    """Creates a term's class schedules from an uploaded workbook, all rows or none."""
+    permission_classes = [IsAuthenticated, IsAdmin]
+    parser_classes = [MultiPartParser, FormParser]
+
+    @swagger_auto_schema(
+        operation_description="Import class schedules from an .xlsx or .csv file, one batch per row "
+                              "(columns: course_id, teacher_email, batch, start_date, end_date, days, start_time, end_time, "
+                              "saturday_start, saturday_end, sunday_start, sunday_end, exception_dates). "
+                              "Every row is validated first, including teacher conflicts within the file and with existing "
+                              "classes; nothing is created unless all rows pass.",
+        manual_parameters=[
+            openapi.Parameter('file', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True, description="Schedule sheet (.xlsx or .csv)"),
+            openapi.Parameter('dry_run', openapi.IN_FORM, type=openapi.TYPE_BOOLEAN, required=False, description="Only validate the file"),
+        ],
+        responses={
+            201: openapi.Response(
+                description="Schedules imported",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'message_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['success', 'error']),
+                        'data': openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'rows': openapi.Schema(type=openapi.TYPE_INTEGER, description="Data rows in the file"),
+                                'created': openapi.Schema(type=openapi.TYPE_INTEGER, description="Schedules created"),
+                                'sessions': openapi.Schema(type=openapi.TYPE_INTEGER, description="Class sessions created"),
+                                'errors': openapi.Schema(
+                                    type=openapi.TYPE_ARRAY,
+                                    items=openapi.Schema(
+                                        type=openapi.TYPE_OBJECT,
+                                        properties={
+                                            'row': openapi.Schema(type=openapi.TYPE_INTEGER, description="Sheet row number"),
+                                            'errors': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING)),
+                                        }
+                                    )
+                                )
+                            }
+                        )
+                    }
+                )
+            ),
+            200: openapi.Response(description="Dry run: file is valid"),
+            400: openapi.Response(description="Unreadable file, or rows with errors (listed in data.errors)"),
+            403: openapi.Response(description="Permission denied")
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        file = request.FILES.get('file')
+        if not file:
+            return api_response(message='File is required.', message_type='error', status_code=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        try:
+            result = import_schedules(file, file.name, dry_run=dry_run)
+        except ImportFileError as e:
+            return api_response(message=str(e), message_type='error', status_code=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error importing schedules from {file.name}: {str(e)}")
+            return api_response(
+                message='Failed to import schedules.',
+                message_type='error',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        if result['errors']:
+            return api_response(
+                message=f"{len(result['errors'])} rows have errors; no schedules were created.",
+                message_type='error',
+                data=result,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if dry_run:
+            return api_response(message=f"All {result['rows']} rows are valid.", message_type='success', data=result)
+        return api_response(
+            message=f"Imported {result['created']} schedules with {result['sessions']} sessions.",
+            message_type='success',
+            data=result,
+            status_code=status.HTTP_201_CREATED
+        )
+
 class ClassSessionListView(APIView):
     """Lists all class sessions grouped by course and batch."""
     permission_classes = [IsAuthenticated]
 
+    def validator_scope(self, request):
+        """Rows the session listing is built from, for conditional GET."""
+        user = request.user
+        if user.is_admin:
+            return [Course.objects.all(), ClassSchedule.objects.all(), ClassSession.objects.all()]
+        if user.is_teacher:
+            return [
+                Course.objects.filter(class_schedules__teacher=user),
+                ClassSchedule.objects.filter(teacher=user),
+                ClassSession.objects.filter(schedule__teacher=user),
+            ]
+        return [
+            CourseSubscription.objects.filter(student=user),
+            CourseEnrollment.objects.filter(student=user),
+            Course.objects.filter(enrollments__student=user),
+            ClassSchedule.objects.filter(course__enrollments__student=user),
+            ClassSession.objects.filter(schedule__course__enrollments__student=user),
+        ]
+
     @swagger_auto_schema(
         operation_description="List all courses with their batches and class sessions (admin: all courses; teacher: assigned courses; student: enrolled batches)",
+        manual_parameters=PAGINATION_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Class sessions retrieved successfully",
@@ -574,7 +706,7 @@ class ClassSessionListView(APIView):
                                                     items=openapi.Schema(
                                                         type=openapi.TYPE_OBJECT,
                                                         properties={
-                                                            'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                                            'id': openapi.Schema(type=openapi.TYPE_INTEGER, nullable=True, description=SESSION_ID_DESCRIPTION),
                                                             'session_date': openapi.Schema(type=openapi.TYPE_STRING, format='date'),
                                                             'start_time': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
                                                             'end_time': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
@@ -619,6 +751,7 @@ class ClassSessionListView(APIView):
             )
         }
     )
+    @conditional_get(validator_scope)
     def get(self, request, *args, **kwargs):
         """Lists courses with their batches and class sessions based on user role."""
         try:
@@ -640,14 +773,19 @@ class ClassSessionListView(APIView):
                     status_code=status.HTTP_403_FORBIDDEN
                 )
 
-            serializer = CourseSessionSerializer(courses, many=True, context={'request': request})
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(courses, request, ordering=('category', 'name', 'id'))
+            serializer = CourseSessionSerializer(page if page is not None else courses, many=True, context={'request': request})
             return api_response(
                 message='Class sessions retrieved successfully.',
                 message_type='success',
                 data=serializer.data,
-                status_code=status.HTTP_200_OK
+                status_code=status.HTTP_200_OK,
+                pagination=paginator.get_envelope()
             )
 
+        except InvalidCursor as e:
+            return api_response(message=str(e), message_type='error', status_code=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error retrieving class sessions: {str(e)}")
             return api_response(
@@ -657,6 +795,103 @@ class ClassSessionListView(APIView):
             )
 
 
+class CalendarFeedLinkView(APIView):
+    """Returns the caller's personal iCalendar feed URL, or issues a new one."""
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Get the signed iCalendar (ICS) feed URL of your class timetable (teachers and students), "
+                              "for subscribing from a calendar app",
+        responses={
+            200: openapi.Response(
+                description="Feed URL",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'message_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['success', 'error']),
+                        'data': openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={'url': openapi.Schema(type=openapi.TYPE_STRING, description="ICS feed URL")}
+                        )
+                    }
+                )
+            ),
+            403: openapi.Response(description="Not a teacher or student")
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        if not (request.user.is_teacher or request.user.is_student):
+            return self.forbidden()
+        return api_response(message='Calendar feed URL retrieved successfully.', message_type='success', data={'url': self.feed_url(request)})
+
+    @swagger_auto_schema(
+        operation_description="Issue a new calendar feed URL; the previous URL stops working",
+        request_body=no_body,
+        responses={
+            200: openapi.Response(description="New feed URL (same shape as GET)"),
+            403: openapi.Response(description="Not a teacher or student")
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        if not (request.user.is_teacher or request.user.is_student):
+            return self.forbidden()
+        rotate_feed_key(request.user)
+        return api_response(message='Calendar feed URL rotated successfully.', message_type='success', data={'url': self.feed_url(request)})
+
+    def feed_url(self, request):
+        return request.build_absolute_uri(reverse('calendar-feed', kwargs={'token': feed_token(request.user)}))
+
+    def forbidden(self):
+        return api_response(
+            message='Calendar feeds are available to teachers and students.',
+            message_type='error',
+            status_code=status.HTTP_403_FORBIDDEN
+        )
+
+
+class CalendarFeedView(APIView):
+    """Serves a user's class timetable as an iCalendar feed; the signed token in the URL identifies the user."""
+    # Calendar apps send no credentials
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get_feed_user(self):
+        if not hasattr(self, '_feed_user'):
+            self._feed_user = feed_user(self.kwargs.get('token', ''))
+        return self._feed_user
+
+    def validator_scope(self, request):
+        """Rows the feed is built from, for conditional GET."""
+        user = self.get_feed_user()
+        if user is None or not (user.is_teacher or user.is_student):
+            # Answered with a 404, never a 304
+            return None
+        return feed_scope(user), (user.pk, user.role)
+
+    @swagger_auto_schema(
+        operation_description="iCalendar (ICS) feed of a teacher's or student's class sessions. "
+                              "Supports If-None-Match; the URL comes from the calendar feed link endpoint.",
+        security=[],
+        responses={
+            200: openapi.Response(description="text/calendar feed"),
+            304: openapi.Response(description="Feed unchanged"),
+            404: openapi.Response(description="Unknown or invalid feed URL")
+        }
+    )
+    @conditional_get(validator_scope)
+    def get(self, request, *args, **kwargs):
+        user = self.get_feed_user()
+        if user is None or not (user.is_teacher or user.is_student):
+            return api_response(message='Calendar feed not found.', message_type='error', status_code=status.HTTP_404_NOT_FOUND)
+        etag = getattr(request, 'etag', None)
+        # ASGI servers only stream async iterators; a sync one would be read into memory first
+        content = astream_feed(user, etag) if isinstance(request._request, ASGIRequest) else stream_feed(user, etag)
+        response = StreamingHttpResponse(content, content_type='text/calendar; charset=utf-8')
+        response.headers['Content-Disposition'] = 'inline; filename="classes.ics"'
+        return response
+
+
 class ClassSessionUpdateView(APIView):
     """Handles updating details for a specific class session."""
     permission_classes = [IsAuthenticated]
@@ -919,33 +1154,33 @@ class ClassSessionUpdateView(APIView):
                         status_code=status.HTTP_400_BAD_REQUEST
                     )
 
-            # Conflict validation: use serializer.validated_data (parsed datetimes) to set session for clean()
-            if updating_timing:
-                validated = serializer.validated_data
-                session.session_date = validated.get('session_date', session.session_date)
-                session.start_time = validated.get('start_time', session.start_time)
-                session.end_time = validated.get('end_time', session.end_time)
-                try:
+            try:
+                # Conflict validation: use serializer.validated_data (parsed datetimes) to set session for clean()
+                if updating_timing:
+                    validated = serializer.validated_data
+                    session.session_date = validated.get('session_date', session.session_date)
+                    session.start_time = validated.get('start_time', session.start_time)
+                    session.end_time = validated.get('end_time', session.end_time)
                     session.clean()  # keeps your conflict and start<end checks
-                except ValidationError as e:
-                    # Format conflict error message
-                    error_message = str(e)
-                    if "already has a class" in error_message:
-                        # Extract conflicting time from the error message
-                        parts = error_message.split(' at ')[1].split(' on ')
-                        time_range = parts[0].strip()
-                        date = parts[1].split('.')[0].strip()
-                        error_message = f"You already have a session scheduled from {time_range} on {date}."
-                    elif "Start time must be before end time" in error_message:
-                        error_message = "Start time must be before end time."
-                    return api_response(
-                        message=error_message,
-                        message_type='error',
-                        status_code=status.HTTP_400_BAD_REQUEST
-                    )
 
-            # Passed all checks — save
-            serializer.save()
+                # Passed all checks — save (the overlap constraint rejects a slot taken since clean())
+                serializer.save()
+            except ValidationError as e:
+                # Format conflict error message
+                error_message = str(e)
+                if "already has a class" in error_message:
+                    # Extract conflicting time from the error message
+                    parts = error_message.split(' at ')[1].split(' on ')
+                    time_range = parts[0].strip()
+                    date = parts[1].split('.')[0].strip()
+                    error_message = f"You already have a session scheduled from {time_range} on {date}."
+                elif "Start time must be before end time" in error_message:
+                    error_message = "Start time must be before end time."
+                return api_response(
+                    message=error_message,
+                    message_type='error',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
             return api_response(
                 message='Class session updated successfully.',
                 message_type='success',
@@ -994,6 +1229,220 @@ def upload_class_recording(request, class_id):
         status_code=status.HTTP_200_OK)
 
 
+def can_manage_recording(user, session):
+    """Admins, or the teacher who owns the session's schedule, may upload its recording."""
+    return user.is_admin or (user.is_teacher and session.schedule.teacher_id == user.id)
+
+
+class ClassRecordingChunkView(APIView):
+    """Receives live recording chunks for a class session, appended at byte offsets."""
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Get the next expected byte offset of the recording spool (used to resume after a dropped connection)",
+        responses={
+            200: openapi.Response(
+                description="Current spool offset",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'message_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['success', 'error']),
+                        'data': openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={'offset': openapi.Schema(type=openapi.TYPE_INTEGER)}
+                        )
+                    }
+                )
+            ),
+            403: openapi.Response(description="Permission denied"),
+            404: openapi.Response(description="Class session not found")
+        }
+    )
+    def get(self, request, class_id=None, *args, **kwargs):
+        try:
+            session = ClassSession.objects.select_related('schedule').get(id=class_id)
+        except ClassSession.DoesNotExist:
+            return api_response(message='Class session not found.', message_type='error', status_code=status.HTTP_404_NOT_FOUND)
+        if not can_manage_recording(request.user, session):
+            return api_response(
+                message='You do not have permission to record this session.',
+                message_type='error',
+                status_code=status.HTTP_403_FORBIDDEN
+            )
+        return api_response(
+            message='Recording offset retrieved successfully.',
+            message_type='success',
+            data={'offset': recording_spool.spool_size(session.id)},
+            status_code=status.HTTP_200_OK
+        )
+
+    @swagger_auto_schema(
+        operation_description="Append a raw recording chunk (application/octet-stream body) at the given byte offset. "
+                              "The X-Chunk-Sha256 header must carry the hex SHA-256 of the body.",
+        manual_parameters=[
+            openapi.Parameter('offset', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=True,
+                              description="Byte offset of this chunk; must equal the current spool size"),
+            openapi.Parameter('X-Chunk-Sha256', openapi.IN_HEADER, type=openapi.TYPE_STRING, required=True,
+                              description="Hex SHA-256 of the chunk body"),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Chunk appended",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'message_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['success', 'error']),
+                        'data': openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={'offset': openapi.Schema(type=openapi.TYPE_INTEGER)}
+                        )
+                    }
+                )
+            ),
+            400: openapi.Response(description="Missing/invalid offset, checksum or body"),
+            403: openapi.Response(description="Permission denied"),
+            404: openapi.Response(description="Class session not found"),
+            409: openapi.Response(description="Offset does not match the spool; data.offset holds the expected offset"),
+            413: openapi.Response(description="Chunk too large")
+        }
+    )
+    def put(self, request, class_id=None, *args, **kwargs):
+        try:
+            offset = int(request.query_params.get('offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return api_response(message='A numeric offset is required.', message_type='error', status_code=status.HTTP_400_BAD_REQUEST)
+        checksum = request.META.get('HTTP_X_CHUNK_SHA256', '')
+        if offset < 0 or length <= 0 or len(checksum) != 64:
+            return api_response(
+                message='Offset, a non-empty body and an X-Chunk-Sha256 header are required.',
+                message_type='error',
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if length > settings.RECORDING_CHUNK_MAX_BYTES:
+            return api_response(
+                message=f'Chunks may not exceed {settings.RECORDING_CHUNK_MAX_BYTES} bytes.',
+                message_type='error',
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        try:
+            session = ClassSession.objects.select_related('schedule').get(id=class_id)
+            if not can_manage_recording(request.user, session):
+                return api_response(
+                    message='You do not have permission to record this session.',
+                    message_type='error',
+                    status_code=status.HTTP_403_FORBIDDEN
+                )
+            if session.recording:
+                return api_response(
+                    message='This session already has a recording.',
+                    message_type='error',
+                    status_code=status.HTTP_409_CONFLICT
+                )
+            # The body may stream in slowly: hold no DB connection, only the spool's file lock
+            release_connections()
+            new_offset = recording_spool.append_chunk(session.id, offset, request.stream, length, checksum)
+        except ClassSession.DoesNotExist:
+            return api_response(message='Class session not found.', message_type='error', status_code=status.HTTP_404_NOT_FOUND)
+        except recording_spool.ChunkError as e:
+            conflict = isinstance(e, recording_spool.OffsetConflict)
+            return api_response(
+                message=str(e),
+                message_type='error',
+                data={'offset': e.current_size},
+                status_code=status.HTTP_409_CONFLICT if conflict else status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Error appending recording chunk for session {class_id}: {str(e)}")
+            return api_response(
+                message='Failed to store recording chunk. Please retry.',
+                message_type='error',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return api_response(
+            message='Chunk stored successfully.',
+            message_type='success',
+            data={'offset': new_offset},
+            status_code=status.HTTP_200_OK
+        )
+
+
+class ClassRecordingFinalizeView(APIView):
+    """Verifies the spooled recording and attaches it to the class session."""
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Finalize a live recording: verify total size (and optional SHA-256) and attach it to the session without re-uploading",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['size'],
+            properties={
+                'size': openapi.Schema(type=openapi.TYPE_INTEGER, description="Total bytes sent"),
+                'sha256': openapi.Schema(type=openapi.TYPE_STRING, description="Optional hex SHA-256 of the whole recording")
+            }
+        ),
+        responses={
+            200: openapi.Response(
+                description="Recording attached",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'message_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['success', 'error']),
+                        'data': openapi.Schema(type=openapi.TYPE_OBJECT)
+                    }
+                )
+            ),
+            400: openapi.Response(description="Size or checksum mismatch"),
+            403: openapi.Response(description="Permission denied"),
+            404: openapi.Response(description="Class session not found")
+        }
+    )
+    def post(self, request, class_id=None, *args, **kwargs):
+        try:
+            expected_size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            return api_response(message='Total recording size is required.', message_type='error', status_code=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                session = ClassSession.objects.select_for_update().select_related('schedule').get(id=class_id)
+                if not can_manage_recording(request.user, session):
+                    return api_response(
+                        message='You do not have permission to record this session.',
+                        message_type='error',
+                        status_code=status.HTTP_403_FORBIDDEN
+                    )
+                recording_spool.finalize(session, expected_size, request.data.get('sha256'))
+        except ClassSession.DoesNotExist:
+            return api_response(message='Class session not found.', message_type='error', status_code=status.HTTP_404_NOT_FOUND)
+        except recording_spool.ChunkError as e:
+            return api_response(
+                message=str(e),
+                message_type='error',
+                data={'offset': e.current_size},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Error finalizing recording for session {class_id}: {str(e)}")
+            return api_response(
+                message='Failed to finalize recording. Please try again.',
+                message_type='error',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return api_response(
+            message='Recording uploaded successfully.',
+            message_type='success',
+            data=ClassSessionSerializer(session, context={'request': request}).data,
+            status_code=status.HTTP_200_OK
+        )
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_recordings(request):
@@ -1005,6 +1454,7 @@ def get_recordings(request):
         - Admin: all courses.
     - With course_id: Returns detailed response with all batches for the course, including batch_name, batch dates, and recordings.
     - With additional query params (batch_name, batch_start_date, batch_end_date): Further filters batches for the course(s).
+    - Courses are paginated by cursor (cursor, page_size, paginate=false to get them all).
     """
 
     # Check if user is authenticated
@@ -1026,7 +1476,7 @@ def get_recordings(request):
         )
 
     # Define valid query parameters
-    valid_params = {'course_id', 'batch_name', 'batch_start_date', 'batch_end_date'}
+    valid_params = {'course_id', 'batch_name', 'batch_start_date', 'batch_end_date', 'cursor', 'page_size', 'paginate'}
 
     # Check for invalid query parameters
     invalid_params = set(request.query_params.keys()) - valid_params
@@ -1097,6 +1547,12 @@ def get_recordings(request):
             )
 
 
+        # One page of courses (all of them with paginate=false)
+        courses_qs = courses_qs.distinct()
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(courses_qs, request, ordering=('category', 'name', 'id'))
+        courses = page if page is not None else courses_qs
+
         # Build response data
         data = []
 
@@ -1106,14 +1562,14 @@ def get_recordings(request):
                 {
                     "course_id": course.id,
                     "course_name": course.name,
-                    "thumbnail": request.build_absolute_uri(course.thumbnail.url) if course.thumbnail else None,
+                    "thumbnail": variant_url(request, course.thumbnail, 'small'),
                     "recording_count": course.recording_count,
                 }
-                for course in courses_qs.distinct()
+                for course in courses
             ]
         else:
             # Handle detailed response with batch and recording information
-            for course in courses_qs.distinct():
+            for course in courses:
                 # Filter schedules based on query parameters
                 schedules = ClassSchedule.objects.filter(course=course)
 
@@ -1196,8 +1652,8 @@ def get_recordings(request):
                         "batch_recordings": batch_recordings
                     })
 
-        # Check if any data was generated
-        if not data:
+        # Check if any data was generated (a page can come up empty while later pages still have batches)
+        if not data and not paginator.next_cursor:
             return api_response(
                 message="No courses or batches found for the given criteria.",
                 message_type="error",
@@ -1208,9 +1664,16 @@ def get_recordings(request):
             message="Recorded Course Data fetched successfully.",
             message_type="success",
             data=data,
-            status_code=200
+            status_code=200,
+            pagination=paginator.get_envelope()
         )
 
+    except InvalidCursor as e:
+        return api_response(
+            message=str(e),
+            message_type="error",
+            status_code=400
+        )
     except DatabaseError:
         return api_response(
             message="A database error occurred while fetching courses.",
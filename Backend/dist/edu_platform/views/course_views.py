@@ -4,25 +4,33 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from django.db.models import Q
 from rest_framework import serializers
-from edu_platform.models import Course, CourseSubscription, ClassSchedule
-from edu_platform.serializers.course_serializers import CourseSerializer, MyCoursesSerializer
+from edu_platform.models import Course, CourseSubscription, ClassSchedule, ClassScheduleSummary, CourseEnrollment, CoursePricing
+from edu_platform.serializers.course_serializers import (
+    CourseSerializer, MyCoursesSerializer, schedule_summary_prefetch, student_enrollment_maps
+)
 from edu_platform.permissions.auth_permissions import IsTeacher, IsStudent, IsTeacherOrAdmin, IsAdmin
+from edu_platform.utility.course_list_cache import get_course_list
+from edu_platform.utility.course_listing import CourseAudience, list_courses, absolute_thumbnails
+from edu_platform.pagination import KeysetPagination, InvalidCursor, PAGINATION_PARAMETERS
+from edu_platform.utility.conditional_get import conditional_get
+from edu_platform.serializers.sparse_fieldsets import InvalidFieldset, SPARSE_FIELDSET_PARAMETERS
 from django.utils import timezone
 from datetime import date
 import logging
 
 logger = logging.getLogger(__name__)
 
-def api_response(message, message_type, data=None, status_code=200):
-    """Standardizes API response structure."""
+def api_response(message, message_type, data=None, status_code=200, pagination=None):
+    """Standardizes API response structure; ``pagination`` adds top-level keys such as ``next``."""
     response_data = {
         'message': message,
         'message_type': message_type
     }
     if data is not None:
         response_data['data'] = data
+    if pagination:
+        response_data.update(pagination)
     return Response(response_data, status=status_code)
 
 def get_serializer_error_message(errors):
@@ -60,30 +68,29 @@ class CourseListView(generics.ListAPIView):
     """Lists active courses with filtering for students."""
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated, IsTeacher | IsStudent | IsAdmin]
-    
-    def get_queryset(self):
-        """Filters courses based on user role, purchase status, and query parameters."""
-        queryset = Course.objects.filter(is_active=True).prefetch_related("pricings")
-        user = self.request.user
-        if user.is_authenticated and user.role == 'student':
-            purchased_course_ids = CourseSubscription.objects.filter(
-                student=user, payment_status='completed'
-            ).values_list('course__id', flat=True)
-            queryset = queryset.exclude(id__in=purchased_course_ids)
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(description__icontains=search) |
-                Q(category__icontains=search)
-            )
-        category = self.request.query_params.get('category', None)
-        if category:
-            queryset = queryset.filter(category__iexact=category)
-        return queryset
+    pagination_class = KeysetPagination
+
+    def validator_scope(self, request):
+        """Rows the course listing is built from, for conditional GET."""
+        user = request.user
+        schedules = ClassSchedule.objects.filter(course__is_active=True)
+        if user.role == 'teacher':
+            schedules = schedules.filter(teacher=user)
+        querysets = [
+            Course.objects.filter(is_active=True),
+            CoursePricing.objects.filter(course__is_active=True),
+            schedules,
+            ClassScheduleSummary.objects.filter(schedule__in=schedules),
+        ]
+        if user.role == 'student':
+            # Purchases are excluded and batches filtered by date, so both key the listing
+            querysets += [CourseSubscription.objects.filter(student=user), CourseEnrollment.objects.filter(student=user)]
+            return querysets, (date.today(),)
+        return querysets
 
     @swagger_auto_schema(
         operation_description="List active courses with optional search and category filters, including batch details",
+        manual_parameters=PAGINATION_PARAMETERS + SPARSE_FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Courses retrieved successfully",
@@ -150,16 +157,24 @@ class CourseListView(generics.ListAPIView):
             )
         }
     )
+    @conditional_get(validator_scope)
     def get(self, request, *args, **kwargs):
         try:
-            queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True)
+            audience = CourseAudience.for_user(request.user)
+            listing = get_course_list(
+                audience,
+                request.query_params,
+                lambda: list_courses(audience, request.query_params),
+            )
             return api_response(
                 message='Courses retrieved successfully.',
                 message_type='success',
-                data=serializer.data,
-                status_code=status.HTTP_200_OK
+                data=absolute_thumbnails(listing['data'], request),
+                status_code=status.HTTP_200_OK,
+                pagination=listing['pagination']
             )
+        except (InvalidCursor, InvalidFieldset) as e:
+            return api_response(message=str(e), message_type='error', status_code=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Course list error: {str(e)}")
             return api_response(
@@ -363,7 +378,14 @@ class MyCoursesView(generics.ListAPIView):
     """Lists purchased courses for students or assigned courses for teachers with their specific batch and schedule details."""
     serializer_class = MyCoursesSerializer
     permission_classes = [IsAuthenticated, IsStudent | IsTeacher]
+    pagination_class = KeysetPagination
     
+    @property
+    def pagination_ordering(self):
+        if self.request.user.role == 'teacher':
+            return ('-created_at', '-id')
+        return ('-purchased_at', '-id')
+
     def get_queryset(self):
         """Returns purchased courses for students or assigned courses for teachers."""
         user = self.request.user
@@ -371,16 +393,35 @@ class MyCoursesView(generics.ListAPIView):
             return CourseSubscription.objects.filter(
                 student=user,
                 payment_status='completed'
-            ).select_related('course').prefetch_related('enrollments').order_by('-purchased_at')
+            ).select_related('course__current_pricing').order_by('-purchased_at', '-id')
         elif user.role == 'teacher':
             return Course.objects.filter(
                 class_schedules__teacher=user,
                 is_active=True
-            ).distinct().order_by('-created_at')
+            ).distinct().select_related('current_pricing').prefetch_related(schedule_summary_prefetch()).order_by('-created_at', '-id')
         return CourseSubscription.objects.none()
 
+    def validator_scope(self, request):
+        """Rows the student's purchases or the teacher's assigned courses are built from, for conditional GET."""
+        user = request.user
+        if user.role == 'teacher':
+            return [
+                Course.objects.filter(class_schedules__teacher=user),
+                CoursePricing.objects.filter(course__class_schedules__teacher=user),
+                ClassSchedule.objects.filter(teacher=user),
+                ClassScheduleSummary.objects.filter(schedule__teacher=user),
+            ]
+        return [
+            CourseSubscription.objects.filter(student=user),
+            CourseEnrollment.objects.filter(student=user),
+            Course.objects.filter(subscriptions__student=user),
+            CoursePricing.objects.filter(course__subscriptions__student=user),
+            ClassScheduleSummary.objects.filter(schedule__course__subscriptions__student=user),
+        ]
+
     @swagger_auto_schema(
         operation_description="List purchased courses for students (with enrolled batch and schedule details) or assigned courses for teachers (with all assigned batches and their schedule details)",
+        manual_parameters=PAGINATION_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Courses retrieved successfully",
@@ -467,18 +508,26 @@ class MyCoursesView(generics.ListAPIView):
             )
         }
     )
-
+    @conditional_get(validator_scope)
     def get(self, request, *args, **kwargs):
         try:
             queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True)
+            page = self.paginate_queryset(queryset)
+            rows = page if page is not None else list(queryset)
+            context = self.get_serializer_context()
+            if request.user.role == 'student':
+                context.update(student_enrollment_maps(request.user, rows))
+            serializer = self.get_serializer(rows, many=True, context=context)
             message = 'Assigned courses retrieved successfully.' if request.user.role == 'teacher' else 'Purchased courses retrieved successfully.'
             return api_response(
                 message=message,
                 message_type='success',
                 data=serializer.data,
-                status_code=status.HTTP_200_OK
+                status_code=status.HTTP_200_OK,
+                pagination=self.paginator.get_envelope()
             )
+        except InvalidCursor as e:
+            return api_response(message=str(e), message_type='error', status_code=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Courses retrieval error for {request.user.role}: {str(e)}")
             return api_response(
@@ -12,7 +12,8 @@ import calendar
 import logging
 import traceback
 from edu_platform.views.course_views import api_response
-from edu_platform.models import User, StudentProfile, CourseEnrollment, ClassSession, CourseSubscription
+from edu_platform.models import User, StudentProfile, CourseEnrollment, ClassSchedule, ClassSession, CourseSubscription
+from edu_platform.utility.session_generator import virtual_occurrences
 
 
 logger = logging.getLogger(__name__)
@@ -103,6 +104,9 @@ class TeacherDashboardAPIView(APIView):
                 is_active=True
             ).order_by('start_time')
             upcoming_count = upcoming_qs.count()
+            # Plus occurrences too far ahead to have rows yet
+            for schedule in ClassSchedule.objects.filter(teacher=teacher, sessions_materialized_until__isnull=False):
+                upcoming_count += len(virtual_occurrences(schedule, start_date=timezone.localdate(now)))
 
             # ---------- nextClass ----------
             next_class_obj = upcoming_qs.first()
@@ -167,7 +167,8 @@ class CreateOrderView(BaseAPIView):
                 subscription.purchased_at = timezone.now()
                 subscription.save(update_fields=[
                     'order_id', 'batch', 'start_date', 'end_date', 'start_time', 'end_time',
-                    'saturday_start_time', 'saturday_end_time', 'sunday_start_time', 'sunday_end_time', 'purchased_at'
+                    'saturday_start_time', 'saturday_end_time', 'sunday_start_time', 'sunday_end_time', 'purchased_at',
+                    'updated_at'
                 ])
                 logger.info(f"Updated subscription {subscription.id} with new order_id {order['id']}")
             else:
@@ -209,7 +210,7 @@ class CreateOrderView(BaseAPIView):
                 enrollment.sunday_end_time = sunday_end_time
                 enrollment.save(update_fields=[
                     'batch', 'start_date', 'end_date', 'start_time', 'end_time',
-                    'saturday_start_time', 'saturday_end_time', 'sunday_start_time', 'sunday_end_time'
+                    'saturday_start_time', 'saturday_end_time', 'sunday_start_time', 'sunday_end_time', 'updated_at'
                 ])
                 logger.info(f"Updated enrollment for subscription {subscription.id} with batch {batch}")
             except CourseEnrollment.DoesNotExist:
@@ -393,11 +394,11 @@ class VerifyPaymentView(BaseAPIView):
             enrollment = CourseEnrollment.objects.get(subscription=subscription)
 
             # ✅ Store the final price student paid
-            latest_pricing = subscription.course.pricings.first()
+            latest_pricing = subscription.course.current_pricing
             if latest_pricing:
                 enrollment.price = latest_pricing.final_price
 
-            enrollment.save(update_fields=['price'])
+            enrollment.save(update_fields=['price', 'updated_at'])
             
             logger.info(f"Payment verified for subscription {subscription.id}, user {request.user.id}, course {subscription.course.name}, batch {enrollment.batch}")
             return api_response(
@@ -28,6 +28,9 @@ django.setup()
 from edu_platform.routing import websocket_urlpatterns
 from edu_platform.jwt_middleware import JwtAuthMiddlewareStack
 from edustream.socketio_app import sio
+from edustream.metrics import metrics_app
+from edustream.lifespan import lifespan
+from edustream.router import PrefixRouter
 
 django_asgi_app = get_asgi_application()
 socketio_app = ASGIApp(sio)
@@ -37,21 +40,16 @@ channels_app = AllowedHostsOriginValidator(
     )
 )
 
-async def application(scope, receive, send):
-    if scope['type'] == 'http':
-        if scope['path'].startswith('/socket.io/'):
-            logger.info(f"Routing HTTP Socket.IO request: {scope['path']}")
-            await socketio_app(scope, receive, send)
-        else:
-            logger.info(f"Routing HTTP Django request: {scope['path']}")
-            await django_asgi_app(scope, receive, send)
-    elif scope['type'] == 'websocket':
-        if scope['path'].startswith('/socket.io/'):
-            logger.info(f"Routing WebSocket Socket.IO request: {scope['path']}")
-            await socketio_app(scope, receive, send)
-        else:
-            logger.info(f"Routing WebSocket Django Channels request: {scope['path']}")
-            await channels_app(scope, receive, send)
-    else:
-        logger.info(f"Routing other request type: {scope['type']}")
-        await django_asgi_app(scope, receive, send)
\ No newline at end of file
+application = PrefixRouter({
+    'http': {
+        'paths': [('/metrics', metrics_app), ('/socket.io/', socketio_app)],
+        'default': django_asgi_app,
+    },
+    'websocket': {
+        'paths': [('/socket.io/', socketio_app)],
+        'default': channels_app,
+    },
+    'lifespan': {
+        'default': lifespan,
+    },
+})
@@ -0,0 +1,8 @@
+from django.db import connections
+
+
+def release_connections():
+    """Returns this thread's DB connections to the pool before a long wait; the next query reconnects."""
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
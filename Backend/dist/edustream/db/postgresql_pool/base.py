@@ -0,0 +1,59 @@
+"""
+PostgreSQL backend that checks connections out of a shared per-process pool.
+
+Django still opens and closes a connection per request (and per channels
+``database_sync_to_async`` call); with this engine "open" takes a pooled connection and
+"close" hands it back, so threads share a bounded set of server connections.
+Pool options live in ``DATABASES[alias]['POOL']``.
+"""
+
+from django.db.backends.postgresql import base, creation
+from django.utils.asyncio import async_unsafe
+import threading
+from edustream.db.postgresql_pool.pool import ConnectionPool
+from edustream.metrics import register_db_pools
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+register_db_pools(_pools)
+
+
+def get_pool(wrapper):
+    """Returns the pool for a DatabaseWrapper's alias and database name."""
+    key = (wrapper.alias, wrapper.settings_dict['NAME'])
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                options = {k.lower(): v for k, v in wrapper.settings_dict.get('POOL', {}).items()}
+                pool = _pools[key] = ConnectionPool(wrapper.alias, **options)
+    return pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections to the test database would block DROP DATABASE
+        pool = _pools.get((self.connection.alias, test_database_name))
+        if pool is not None:
+            pool.close_all()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        connection = get_pool(self).acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # Normally set while connecting; a reused connection skips that path
+        self.isolation_level = base.IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', base.IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                get_pool(self).release(self.connection)
@@ -0,0 +1,155 @@
+"""
+Bounded, thread-safe pool of psycopg2 connections.
+
+Checkouts block for up to ``timeout`` seconds when every connection is in
+use. Idle connections are health-checked before reuse when they have been
+idle longer than ``check_interval``; connections older than ``max_lifetime``
+or idle beyond ``max_idle`` (above ``min_size``) are closed.
+"""
+
+from collections import deque
+from psycopg2 import OperationalError, extensions
+import logging
+import threading
+import time
+from edustream.metrics import DB_POOL_WAIT, DB_POOL_TIMEOUTS, DB_POOL_DISCARDS
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(OperationalError):
+    """Raised when no connection became available within the checkout timeout."""
+
+
+class ConnectionPool:
+    """Hands out at most ``max_size`` connections created by ``connect``."""
+
+    def __init__(self, alias, max_size=10, min_size=0, timeout=10.0, max_idle=300.0,
+                 max_lifetime=3600.0, check_interval=30.0):
+        self.alias = alias
+        self.max_size = max_size
+        self.min_size = min_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        self._idle = deque()  # (connection, returned_at), most recently returned on the right
+        self._created_at = {}  # id(connection) -> creation time
+        self._size = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def in_use(self):
+        return self._size - len(self._idle)
+
+    def acquire(self, connect):
+        """Returns a healthy connection, creating one with ``connect`` if below ``max_size``."""
+        start = time.monotonic()
+        while True:
+            connection, returned_at = self._checkout(start)
+            if connection is None:
+                try:
+                    connection = connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                self._created_at[id(connection)] = time.monotonic()
+                break
+            if time.monotonic() - returned_at < self.check_interval or self._is_healthy(connection):
+                break
+            DB_POOL_DISCARDS.labels(self.alias, 'unhealthy').inc()
+            self._discard(connection)
+        DB_POOL_WAIT.labels(self.alias).observe(time.monotonic() - start)
+        return connection
+
+    def _checkout(self, start):
+        """Pops an idle connection, or reserves a slot for a new one (returns None)."""
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    self._prune_idle()
+                    if self._idle:
+                        # LIFO: reuse warm connections and let surplus ones idle out
+                        return self._idle.pop()
+                    if self._size < self.max_size:
+                        self._size += 1
+                        return None, None
+                    remaining = self.timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        DB_POOL_TIMEOUTS.labels(self.alias).inc()
+                        raise PoolTimeout(
+                            f"No database connection available for '{self.alias}' within "
+                            f"{self.timeout}s (pool size {self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+    def release(self, connection):
+        """Returns ``connection`` to the pool, rolling back any open transaction."""
+        reason = None
+        if connection.closed:
+            reason = 'closed'
+        elif time.monotonic() - self._created_at.get(id(connection), 0) > self.max_lifetime:
+            reason = 'lifetime'
+        elif connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Exception:
+                reason = 'broken'
+        if reason:
+            DB_POOL_DISCARDS.labels(self.alias, reason).inc()
+            self._discard(connection)
+            return
+        with self._cond:
+            self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    def _is_healthy(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy pooled connection for '{self.alias}': {e}")
+            return False
+
+    def _prune_idle(self):
+        # Caller holds the lock; the oldest returned connections are on the left
+        now = time.monotonic()
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.max_idle:
+            connection, _ = self._idle.popleft()
+            DB_POOL_DISCARDS.labels(self.alias, 'idle').inc()
+            self._close(connection)
+            self._size -= 1
+
+    def _discard(self, connection):
+        self._close(connection)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _close(self, connection):
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        """Closes every idle connection (in-use ones are closed when released)."""
+        with self._cond:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._close(connection)
+                self._size -= 1
@@ -0,0 +1,127 @@
+"""
+ASGI lifespan handling for the combined Django / Channels / Socket.IO app.
+
+Startup opens the database and Redis connections, fills the course list
+cache with the default catalog pages and compiles the OpenAPI schema so the
+first requests after a deploy do not pay for it. Shutdown drains this worker's Socket.IO clients (so their
+disconnect handlers clean up Redis and they reconnect elsewhere), flushes
+buffered whiteboard deltas and the log queue, and closes connections.
+
+Warm-up failures are logged and do not abort startup: a worker that comes up
+before Postgres or Redis is reachable still serves once they are.
+"""
+
+import asyncio
+import logging
+import time
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from django.db import connections
+from edustream.logging_pipeline import stop_listeners
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_DRAIN_TIMEOUT_SECONDS = 10
+
+
+def open_database_connections():
+    """Connects every configured database alias and runs a trivial query."""
+    for conn in connections.all():
+        conn.ensure_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    return len(connections.all())
+
+
+def warm_course_list():
+    """
+    Fills the course list cache with the first default page for students
+    without purchases and for admins, under the keys real requests read.
+    """
+    from edu_platform.utility.course_list_cache import get_course_list
+    from edu_platform.utility.course_listing import CourseAudience, list_courses
+
+    warmed = 0
+    for audience in (CourseAudience(role='student'), CourseAudience(role='admin')):
+        listing = get_course_list(audience, {}, lambda: list_courses(audience, {}))
+        warmed += len(listing['data'])
+    return warmed
+
+
+def compile_openapi_schema():
+    """Builds and caches the Swagger spec."""
+    from edustream.schema import compile_schema
+    from edustream.urls import api_info
+    return compile_schema(api_info)
+
+
+async def _run_step(name, func):
+    start = time.perf_counter()
+    try:
+        result = await func()
+    except Exception as e:
+        logger.warning(f"Startup step {name} failed after {time.perf_counter() - start:.3f}s: {e}")
+        return False
+    logger.info(f"Startup step {name} done in {time.perf_counter() - start:.3f}s ({result})")
+    return True
+
+
+async def startup():
+    """Opens pools and warms caches; returns True when every step succeeded."""
+    from edustream.socketio_app import redis_client
+
+    # database_sync_to_async closes the thread's connections afterwards, so the
+    # connections opened here go back to the pool instead of staying checked out
+    steps = [
+        ('database', database_sync_to_async(open_database_connections)),
+        ('redis', redis_client.ping),
+        ('course_list', database_sync_to_async(warm_course_list)),
+        ('openapi_schema', sync_to_async(compile_openapi_schema)),
+    ]
+    results = [await _run_step(name, func) for name, func in steps]
+    return all(results)
+
+
+async def shutdown():
+    """Drains Socket.IO clients, flushes buffered writers and closes connections."""
+    from edustream.socketio_app import drain_socketio, redis_client
+
+    try:
+        await asyncio.wait_for(drain_socketio(), SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"Socket.IO drain did not finish within {SHUTDOWN_DRAIN_TIMEOUT_SECONDS}s")
+    except Exception as e:
+        logger.error(f"Socket.IO drain failed: {e}")
+
+    try:
+        await redis_client.aclose()
+    except Exception as e:
+        logger.warning(f"Closing Redis client failed: {e}")
+    await sync_to_async(connections.close_all)()
+
+
+async def lifespan(scope, receive, send):
+    """ASGI lifespan protocol handler."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                ok = await startup()
+            except Exception as e:
+                logger.error(f"Startup failed: {e}")
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            logger.info(f"Startup complete{'' if ok else ' (with warm-up warnings)'}")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            try:
+                await shutdown()
+            except Exception as e:
+                logger.error(f"Shutdown failed: {e}")
+                await send({'type': 'lifespan.shutdown.failed', 'message': str(e)})
+                return
+            logger.info("Shutdown complete")
+            # Last, so everything logged during shutdown still reaches the handlers
+            stop_listeners()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
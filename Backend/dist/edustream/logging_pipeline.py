@@ -0,0 +1,95 @@
+"""
+Non-blocking logging for the ASGI workers.
+
+``QueueListenerHandler`` puts records on an in-memory queue; a background
+listener thread hands them to the real handlers (console, files), so the event
+loop never blocks on a write. ``SamplingFilter`` thins out the chattiest
+realtime loggers. Both are wired up from ``settings.LOGGING``.
+"""
+
+import atexit
+import itertools
+import logging
+import queue
+from logging.config import ConvertingList
+from logging.handlers import QueueHandler, QueueListener
+
+_listeners = []
+
+
+class SamplingFilter(logging.Filter):
+    """Passes one in ``rate`` records at or below ``max_level`` from the given logger prefixes.
+
+    Records above ``max_level`` (warnings and errors by default) always pass.
+    """
+
+    def __init__(self, loggers=(), rate=10, max_level='INFO'):
+        super().__init__()
+        self.prefixes = tuple(loggers)
+        self.rate = max(int(rate), 1)
+        self.max_level = logging.getLevelName(max_level) if isinstance(max_level, str) else max_level
+        self._counters = {}
+
+    def _is_sampled(self, name):
+        return any(name == prefix or name.startswith(prefix + '.') for prefix in self.prefixes)
+
+    def filter(self, record):
+        if self.rate == 1 or record.levelno > self.max_level or not self._is_sampled(record.name):
+            return True
+        counter = self._counters.get(record.name)
+        if counter is None:
+            counter = self._counters.setdefault(record.name, itertools.count())
+        # itertools.count is atomic under the GIL, so no lock is needed
+        return next(counter) % self.rate == 0
+
+
+class QueueListenerHandler(QueueHandler):
+    """QueueHandler that owns a QueueListener feeding ``handlers``.
+
+    The queue is bounded; when it is full new records are dropped and counted
+    rather than blocking the caller.
+    """
+
+    def __init__(self, handlers, queue_size=10000, respect_handler_level=True):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.dropped = 0
+        self.listener = QueueListener(
+            self.queue, *_resolve_handlers(handlers), respect_handler_level=respect_handler_level
+        )
+        self.listener.start()
+        self._running = True
+        _listeners.append(self)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Flushes queued records to the target handlers and stops the listener thread."""
+        if not self._running:
+            return
+        self._running = False
+        if self.dropped:
+            self.queue.put(logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"Log queue overflowed, dropped {self.dropped} records",
+            }))
+        self.listener.stop()
+
+
+def _resolve_handlers(handlers):
+    # dictConfig hands over 'cfg://handlers.<name>' entries lazily; indexing converts them
+    if isinstance(handlers, ConvertingList):
+        return [handlers[i] for i in range(len(handlers))]
+    return list(handlers)
+
+
+def stop_listeners():
+    """Drains every queue-backed handler; safe to call more than once."""
+    for handler in _listeners:
+        handler.stop()
+
+
+atexit.register(stop_listeners)
@@ -0,0 +1,221 @@
+"""
+Prometheus metrics for the realtime tier (Socket.IO and Django Channels).
+
+Handlers are wrapped with ``instrument_event`` which records a per-event
+counter and latency histogram. Any ORM query issued while a handler is
+running (including through ``sync_to_async``) is attributed to that handler.
+Connection and room gauges are read from the Socket.IO manager at scrape time.
+
+``/metrics`` answers only scrapers whose address is in ``METRICS_ALLOWED_IPS``
+or that send ``Authorization: Bearer <METRICS_TOKEN>``; anyone else gets a 403.
+
+Under ``manage.py serve`` each worker writes its samples to
+``PROMETHEUS_MULTIPROC_DIR`` and a scrape of any worker aggregates all of
+them; the scrape-time gauges describe the worker that answered.
+"""
+
+import os
+import time
+import hmac
+import logging
+import functools
+import ipaddress
+from contextvars import ContextVar
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry, REGISTRY, make_asgi_app, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+else:
+    registry = REGISTRY
+
+REALTIME_EVENTS = Counter(
+    'realtime_events_total',
+    'Realtime handler invocations.',
+    ['transport', 'event', 'outcome'],
+)
+REALTIME_EVENT_LATENCY = Histogram(
+    'realtime_event_duration_seconds',
+    'Realtime handler latency in seconds.',
+    ['transport', 'event'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+REALTIME_DB_QUERIES = Counter(
+    'realtime_db_queries_total',
+    'Database queries issued from realtime handlers.',
+    ['transport', 'event'],
+)
+REDIS_MANAGER_PENDING = Gauge(
+    'socketio_redis_manager_pending_publishes',
+    'Socket.IO messages waiting to be published to Redis.',
+    multiprocess_mode='livesum',
+)
+REDIS_MANAGER_PUBLISH_LATENCY = Histogram(
+    'socketio_redis_manager_publish_duration_seconds',
+    'Time taken to publish a Socket.IO message to Redis.',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+DB_POOL_WAIT = Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting to check out a pooled database connection.',
+    ['alias'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+)
+DB_POOL_TIMEOUTS = Counter(
+    'db_pool_timeouts_total',
+    'Checkouts that gave up because the pool stayed exhausted.',
+    ['alias'],
+)
+DB_POOL_DISCARDS = Counter(
+    'db_pool_discarded_connections_total',
+    'Pooled connections closed instead of reused.',
+    ['alias', 'reason'],
+)
+
+# (transport, event) of the handler currently running in this context
+_current_event = ContextVar('realtime_current_event', default=None)
+
+
+def _outcome(result):
+    """Maps a handler return value to an outcome label."""
+    if isinstance(result, dict) and result.get('name') == 'Error':
+        return 'error'
+    return 'ok'
+
+
+def instrument_event(transport, event):
+    """Decorator recording call count, latency and DB queries for a realtime handler."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            token = _current_event.set((transport, event))
+            start = time.perf_counter()
+            outcome = 'exception'
+            try:
+                result = await handler(*args, **kwargs)
+                outcome = _outcome(result)
+                return result
+            finally:
+                REALTIME_EVENT_LATENCY.labels(transport, event).observe(time.perf_counter() - start)
+                REALTIME_EVENTS.labels(transport, event, outcome).inc()
+                _current_event.reset(token)
+        return wrapper
+    return decorator
+
+
+def _count_realtime_query(execute, sql, params, many, context):
+    current = _current_event.get()
+    if current is not None:
+        REALTIME_DB_QUERIES.labels(*current).inc()
+    return execute(sql, params, many, context)
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    """Attaches the query counter to each new DB connection (once per wrapper)."""
+    if _count_realtime_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_realtime_query)
+
+
+connection_created.connect(_install_query_counter)
+
+
+class SocketIOCollector:
+    """Reports connected sids, rooms and room sizes from the local Socket.IO manager."""
+
+    def __init__(self, server):
+        self.server = server
+
+    def collect(self):
+        sids = GaugeMetricFamily('socketio_connected_sids', 'Connected Socket.IO sessions.', labels=['namespace'])
+        rooms = GaugeMetricFamily('socketio_rooms', 'Open Socket.IO rooms.', labels=['namespace'])
+        room_size = GaugeMetricFamily('socketio_room_size', 'Participants per Socket.IO room.', labels=['namespace', 'room'])
+
+        for namespace, ns_rooms in list(self.server.manager.rooms.items()):
+            connected = ns_rooms.get(None, {})
+            sids.add_metric([namespace], len(connected))
+            # Every sid also owns a private room named after itself; skip those
+            class_rooms = {
+                room: members for room, members in list(ns_rooms.items())
+                if room is not None and room not in connected
+            }
+            rooms.add_metric([namespace], len(class_rooms))
+            for room, members in class_rooms.items():
+                room_size.add_metric([namespace, str(room)], len(members))
+
+        yield sids
+        yield rooms
+        yield room_size
+
+
+def register_socketio_collector(server):
+    """Registers the Socket.IO gauges for ``server`` with the scrape registry."""
+    registry.register(SocketIOCollector(server))
+
+
+class DatabasePoolCollector:
+    """Reports size, usage, waiters and saturation of the database connection pools."""
+
+    def __init__(self, pools):
+        self.pools = pools
+
+    def collect(self):
+        size = GaugeMetricFamily('db_pool_connections', 'Open pooled connections.', labels=['alias'])
+        in_use = GaugeMetricFamily('db_pool_connections_in_use', 'Pooled connections checked out.', labels=['alias'])
+        waiting = GaugeMetricFamily('db_pool_waiting_threads', 'Threads waiting for a connection.', labels=['alias'])
+        saturation = GaugeMetricFamily('db_pool_saturation', 'Checked-out connections / pool maximum.', labels=['alias'])
+
+        for pool in list(self.pools.values()):
+            size.add_metric([pool.alias], pool.size)
+            in_use.add_metric([pool.alias], pool.in_use)
+            waiting.add_metric([pool.alias], pool.waiting)
+            saturation.add_metric([pool.alias], pool.in_use / pool.max_size)
+
+        yield size
+        yield in_use
+        yield waiting
+        yield saturation
+
+
+def register_db_pools(pools):
+    """Registers gauges for the ``{key: ConnectionPool}`` mapping with the scrape registry."""
+    registry.register(DatabasePoolCollector(pools))
+
+
+def scrape_allowed(scope):
+    """True when the scrape comes from an allowed network or carries the metrics token."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        headers = dict(scope.get('headers', []))
+        if hmac.compare_digest(headers.get(b'authorization', b''), f"Bearer {token}".encode()):
+            return True
+    client = scope.get('client')
+    if not client:
+        return False
+    try:
+        address = ipaddress.ip_address(client[0])
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in getattr(settings, 'METRICS_ALLOWED_IPS', ()))
+
+
+# ASGI app serving the scrape registry in the Prometheus text format
+scrape_app = make_asgi_app(registry)
+
+
+async def metrics_app(scope, receive, send):
+    """scrape_app behind scrape_allowed(); the registry must not be public."""
+    if scope['type'] == 'http' and not scrape_allowed(scope):
+        logger.warning(f"Refused metrics scrape from {(scope.get('client') or ('unknown',))[0]}")
+        await send({
+            'type': 'http.response.start',
+            'status': 403,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+        })
+        await send({'type': 'http.response.body', 'body': b'Forbidden\n'})
+        return
+    await scrape_app(scope, receive, send)
@@ -0,0 +1,43 @@
+"""
+Prefix-based dispatch for the top-level ASGI application.
+
+Each scope type (http, websocket, lifespan) has its own table of
+``(path, app)`` entries plus a default app. A path ending in ``/`` matches
+by prefix, anything else must match exactly; longer entries win.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixRouter:
+    """ASGI app that dispatches scopes to sub-apps by type and path prefix."""
+
+    def __init__(self, routes):
+        """``routes`` maps scope type to ``{'paths': [(path, app), ...], 'default': app}``."""
+        self.routes = {
+            scope_type: (
+                sorted(config.get('paths', []), key=lambda entry: len(entry[0]), reverse=True),
+                config['default'],
+            )
+            for scope_type, config in routes.items()
+        }
+
+    def resolve(self, scope):
+        """Returns the sub-app for ``scope``; raises ValueError for unknown scope types."""
+        try:
+            prefixes, default = self.routes[scope['type']]
+        except KeyError:
+            raise ValueError(f"No route for ASGI scope type {scope['type']!r}")
+        path = scope.get('path', '')
+        for prefix, app in prefixes:
+            if path == prefix or (prefix[-1] == '/' and path.startswith(prefix)):
+                return app
+        return default
+
+    async def __call__(self, scope, receive, send):
+        app = self.resolve(scope)
+        # Lazy formatting: costs nothing unless DEBUG is enabled for this logger
+        logger.debug("Routing %s %s to %r", scope['type'], scope.get('path', ''), app)
+        await app(scope, receive, send)
@@ -0,0 +1,64 @@
+"""
+OpenAPI schema generation for the Swagger/ReDoc endpoints.
+
+The public schema does not depend on the requesting user, so it is generated
+once per API version and reused. ``compile_schema`` is called at startup so
+the first request to /swagger/ does not pay for introspecting every view.
+"""
+
+import logging
+import threading
+from django.http import HttpRequest
+from rest_framework.request import Request
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class CachedSchemaGenerator(OpenAPISchemaGenerator):
+    """Schema generator that memoizes the public spec per API version."""
+
+    _compiled = {}
+    _lock = threading.Lock()
+
+    def __init__(self, info, version='', url=None, patterns=None, urlconf=None):
+        # No host/schemes in the spec, so one cached copy serves every host it is fetched from
+        if url is None:
+            url = swagger_settings.DEFAULT_API_URL or ''
+        super().__init__(info, version, url, patterns, urlconf)
+
+    def get_schema(self, request=None, public=False):
+        # The UI renderers build a generator without patterns; only cache the full spec
+        if not public or self._gen.patterns == []:
+            return super().get_schema(request, public)
+
+        key = self.version
+        schema = self._compiled.get(key)
+        if schema is None:
+            with self._lock:
+                schema = self._compiled.get(key)
+                if schema is None:
+                    schema = super().get_schema(request or _schema_request(), public)
+                    self._compiled[key] = schema
+        return schema
+
+    @classmethod
+    def clear(cls):
+        """Drops cached specs, e.g. after URLconf changes in tests."""
+        with cls._lock:
+            cls._compiled.clear()
+
+
+def _schema_request():
+    """Anonymous GET request used to introspect views outside a real request."""
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    http_request.path = '/swagger/'
+    return Request(http_request)
+
+
+def compile_schema(info, version=''):
+    """Builds and caches the public spec for ``info``; returns the number of paths."""
+    schema = CachedSchemaGenerator(info, version).get_schema(None, public=True)
+    return len(schema.paths or {})
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -84,6 +85,44 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Shared cache (Redis db 1, kept apart from the Channels/Celery db 0)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f"redis://{os.environ.get('REDIS_HOST', 'localhost')}:6379/1",
+        'TIMEOUT': 300,
+    }
+}
+
+# API authentication: users behind JWTs are cached in-process and in Redis, see
+# edu_platform.authentication. The in-process TTL bounds staleness across workers.
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 300))
+AUTH_USER_LOCAL_CACHE_TTL = int(os.environ.get('AUTH_USER_LOCAL_CACHE_TTL', 30))
+AUTH_USER_LOCAL_CACHE_SIZE = int(os.environ.get('AUTH_USER_LOCAL_CACHE_SIZE', 10000))
+
+# WebSocket handshakes: users resolved from JWTs are cached per (user_id, token iat)
+WEBSOCKET_USER_CACHE_TTL = int(os.environ.get('WEBSOCKET_USER_CACHE_TTL', 60))
+WEBSOCKET_USER_CACHE_SIZE = int(os.environ.get('WEBSOCKET_USER_CACHE_SIZE', 10000))
+
+# Course list responses, cached per role/purchase set/query params, see
+# edu_platform.utility.course_list_cache. Model signals invalidate them; the TTL
+# is a backstop. The lock timeout bounds how long one request may hold a cold key;
+# others serve the previous listing, or wait (without a DB connection) at most
+# COURSE_LIST_CACHE_WAIT seconds before computing it themselves.
+COURSE_LIST_CACHE_TTL = int(os.environ.get('COURSE_LIST_CACHE_TTL', 600))
+COURSE_LIST_CACHE_LOCK_TIMEOUT = float(os.environ.get('COURSE_LIST_CACHE_LOCK_TIMEOUT', 5))
+COURSE_LIST_CACHE_WAIT = float(os.environ.get('COURSE_LIST_CACHE_WAIT', 0.5))
+
+# ICS timetable feeds, see edu_platform.utility.calendar_feed. Cached under their
+# ETag, so a change never serves a stale feed; the TTL only frees memory.
+CALENDAR_FEED_CACHE_TTL = int(os.environ.get('CALENDAR_FEED_CACHE_TTL', 86400))
+
+# Prometheus /metrics, see edustream.metrics: served only to these networks
+# (comma-separated addresses or CIDRs, as seen by the ASGI server) or to scrapers
+# sending "Authorization: Bearer $METRICS_TOKEN". Empty token disables bearer auth.
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 # Database
 def get_postgres_host():
     # When inside Docker, use host.docker.internal
@@ -92,14 +131,32 @@ def get_postgres_host():
     # Otherwise (local venv), default to localhost
     return os.environ.get("POSTGRES_HOST", "localhost")
 
+# Connections come from a per-process pool (edustream.db.postgresql_pool). Django
+# "closes" them at the end of every request and around every channels
+# database_sync_to_async call, which returns the connection to the pool, so
+# CONN_MAX_AGE stays 0. A plain asgiref sync_to_async closes nothing: async code that
+# queries must use database_sync_to_async, or its executor thread keeps the connection.
+# The default size matches the ASGI thread executor (min(32, CPUs + 4) worker threads)
+# plus headroom for the cleanup thread and request threads.
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', min(32, (os.cpu_count() or 1) + 4) + 4))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'edustream.db.postgresql_pool',
         'NAME': os.environ.get('POSTGRES_DB', 'edustream_db'),
         'USER': os.environ.get('POSTGRES_USER', 'postgres'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'qwerty@123'),
         'HOST': get_postgres_host(),
         'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': DB_POOL_MAX_SIZE,
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),          # seconds to wait for a free connection
+            'MAX_IDLE': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),       # close surplus idle connections after this
+            'MAX_LIFETIME': float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+            'CHECK_INTERVAL': float(os.environ.get('DB_POOL_CHECK_INTERVAL', 30)),  # health-check connections idle longer
+        },
     }
 }
 
@@ -144,6 +201,17 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Days of class sessions written as rows ahead of a batch's start (or of today); later
+# occurrences are expanded from the schedule's recurrence until the first worker's daily
+# background run (or ``manage.py materialize_sessions``) writes them. Until then the API
+# lists them with a null ``id``. 0 writes every session when the schedule is created.
+SESSION_MATERIALIZE_DAYS = int(os.environ.get('SESSION_MATERIALIZE_DAYS', 0))
+# Threads rendering image variants after uploads; 0 renders inside the request
+IMAGE_VARIANT_WORKERS = int(os.environ.get('IMAGE_VARIANT_WORKERS', 2))
+
+# Live recording ingest: chunks are spooled outside MEDIA_ROOT until finalized
+RECORDING_SPOOL_ROOT = os.environ.get('RECORDING_SPOOL_ROOT', os.path.join(BASE_DIR, 'recording_spool'))
+RECORDING_CHUNK_MAX_BYTES = int(os.environ.get('RECORDING_CHUNK_MAX_BYTES', 16 * 1024 * 1024))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -156,7 +224,7 @@ AUTH_USER_MODEL = 'edu_platform.User'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'edu_platform.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -190,10 +258,24 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    'TOKEN_REFRESH_SERIALIZER': 'edu_platform.serializers.auth_serializers.TokenRefreshSerializer',
 
     'JTI_CLAIM': 'jti',
 }
 
+# Refresh-token blacklist (see edu_platform.token_blacklist). Switch BACKEND to
+# 'edu_platform.token_blacklist.DatabaseBlacklistBackend' to keep using simplejwt's tables;
+# existing rows are copied to Redis with `manage.py migrate_token_blacklist`.
+TOKEN_BLACKLIST = {
+    'BACKEND': os.environ.get('TOKEN_BLACKLIST_BACKEND', 'edu_platform.token_blacklist.RedisBlacklistBackend'),
+    'REDIS_URL': f"redis://{os.environ.get('REDIS_HOST', 'localhost')}:6379/1",
+    'BLOOM_CAPACITY': 100000,     # revocations expected within one refresh lifetime
+    'BLOOM_ERROR_RATE': 0.001,    # share of clean tokens that still need a Redis check
+    'SYNC_INTERVAL': 1.0,         # seconds between pulls of other workers' revocations; also the
+                                  # longest a revocation made on another worker goes unseen here
+    'REBUILD_INTERVAL': 3600,     # seconds between Bloom rebuilds (drops expired JTIs)
+}
+
 # CORS settings
 # CORS_ALLOWED_ORIGINS = [
 #     "http://localhost:3000",
@@ -254,29 +336,48 @@ OTP_EXPIRY_MINUTES = int(os.environ.get('OTP_EXPIRY_MINUTES', 5))
 SESSION_UPDATE_CUTOFF_HOURS = 0.1  # ~6 minutes for testing
 
 # logging
+# Logging: records go through a queue to a background thread so the event loop never
+# blocks on console writes. LOG_LEVEL sets the root level; LOG_LEVELS overrides it per
+# module, e.g. LOG_LEVELS="edustream.socketio_app=DEBUG,django.db.backends=DEBUG".
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_LEVELS = {
+    'edu_platform.middleware': 'DEBUG',
+    'edu_platform.consumers': 'DEBUG',
+    'socketio': 'WARNING',
+    'engineio': 'WARNING',
+}
+LOG_LEVELS.update(
+    item.strip().split('=', 1) for item in os.environ.get('LOG_LEVELS', '').split(',') if '=' in item
+)
+# Keep 1 in LOG_SAMPLE_RATE info/debug records from the per-message realtime loggers
+LOG_SAMPLE_RATE = int(os.environ.get('LOG_SAMPLE_RATE', 10))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'sample_realtime': {
+            '()': 'edustream.logging_pipeline.SamplingFilter',
+            'loggers': ['edustream.socketio_app', 'edu_platform.consumers', 'socketio', 'engineio'],
+            'rate': LOG_SAMPLE_RATE,
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
-            'level': 'DEBUG',  # Set to DEBUG for detailed logs
+            'level': 'DEBUG',
+        },
+        'queue': {
+            '()': 'edustream.logging_pipeline.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console'],
+            'filters': ['sample_realtime'],
         },
     },
     'root': {
-        'handlers': ['console'],
-        'level': 'DEBUG',
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
     },
     'loggers': {
-        'edu_platform.middleware': {  # Specific logger for middleware
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': True,
-        },
-        'edu_platform.consumers': {  # For consumer logs
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': True,
-        },
+        name: {'level': level.upper()} for name, level in LOG_LEVELS.items()
     },
 }
\ No newline at end of file
@@ -5,27 +5,52 @@ import redis.asyncio as aioredis
 from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.sessions.models import Session
 from edu_platform.models import User, ClassSession, ClassSchedule, CourseEnrollment
-from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import AccessToken
+from edustream.metrics import (
+    instrument_event, register_socketio_collector,
+    REDIS_MANAGER_PENDING, REDIS_MANAGER_PUBLISH_LATENCY,
+)
+from edustream.whiteboard import (
+    WHITEBOARD_TICK_SECONDS, WHITEBOARD_SNAPSHOT_EVERY,
+    validate_ops, compact_ops, append_ops, load_state, compact_snapshot,
+)
 import os 
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")  
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+# Long-polling needs every request of a session on the worker that created it;
+# ``manage.py serve`` sets this to "websocket" when it runs more than one worker.
+SOCKETIO_TRANSPORTS = os.getenv("SOCKETIO_TRANSPORTS", "polling,websocket").split(",")
+
+
+class InstrumentedRedisManager(socketio.AsyncRedisManager):
+    """Redis manager that reports pending publishes and publish latency."""
+
+    async def _publish(self, data):
+        REDIS_MANAGER_PENDING.inc()
+        try:
+            with REDIS_MANAGER_PUBLISH_LATENCY.time():
+                return await super()._publish(data)
+        finally:
+            REDIS_MANAGER_PENDING.dec()
 
 
 # Initialize Socket.IO server with Redis manager
-mgr = socketio.AsyncRedisManager(f"redis://{REDIS_HOST}:{REDIS_PORT}/0")
+mgr = InstrumentedRedisManager(f"redis://{REDIS_HOST}:{REDIS_PORT}/0")
 sio = socketio.AsyncServer(
     async_mode="asgi",
     client_manager=mgr,
     cors_allowed_origins="*",
-    logger=True,
-    engineio_logger=True
+    transports=SOCKETIO_TRANSPORTS,
+    # Explicit loggers so LOGGING controls their levels (True attaches an extra handler)
+    logger=logging.getLogger('socketio.server'),
+    engineio_logger=logging.getLogger('engineio.server')
 )
+register_socketio_collector(sio)
 
 # Redis client for participant tracking
 redis_client = aioredis.Redis(
@@ -34,9 +59,13 @@ redis_client = aioredis.Redis(
     db=0,
     decode_responses=True
 )
+
+# Whiteboard ops accepted by this worker, waiting for the next broadcast tick
+whiteboard_pending = {}
+whiteboard_flush_task = None
  
 
-@sync_to_async
+@database_sync_to_async
 def validate_class_session_pk(pk):
     """Validate ClassSession exists for given primary key (id)."""
     try:
@@ -50,7 +79,7 @@ def validate_class_session_pk(pk):
         logger.error(f"Error validating id {pk}: {e}")
         return False
 
-@sync_to_async
+@database_sync_to_async
 def authenticate_user(token, user_role):
     """Authenticate user using JWT token and validate user_role."""
     try:
@@ -75,7 +104,7 @@ def authenticate_user(token, user_role):
         logger.error(f"Error authenticating JWT token {token}: {e}")
         return None
 
-@sync_to_async
+@database_sync_to_async
 def is_user_authorized_for_session(user, room_id):
     """Check if user (student or teacher) is authorized for the ClassSession."""
     try:
@@ -121,6 +150,7 @@ def is_user_authorized_for_session(user, room_id):
         return False
 
 @sio.event
+@instrument_event('socketio', 'connect')
 async def connect(sid, environ, auth=None):
     """Handle client connection, authenticate user, and store sessionId."""
     query = parse_qs(environ.get('QUERY_STRING', ''))
@@ -159,18 +189,19 @@ async def connect(sid, environ, auth=None):
         "user": user.id  # Store user ID for later reference
     })
     
-    logger.info(f"Connected: sid={sid}, session_id={session_id}, user={user.email}, userRole={user_role}, userName={user_name}")
+    logger.info("Connected: sid=%s, session_id=%s, user=%s, userRole=%s, userName=%s", sid, session_id, user.email, user_role, user_name)
     return None
 
 
 @sio.event
+@instrument_event('socketio', 'disconnect')
 async def disconnect(sid):
     """Handle client disconnection, update participant count if in a room."""
     session = await sio.get_session(sid)
     session_id = session.get("sessionId")
     room_id = session.get("roomId")  # Check if client joined a room
     if not session_id:
-        logger.debug(f"Disconnect: sid={sid}, no sessionId")
+        logger.debug("Disconnect: sid=%s, no sessionId", sid)
         return
  
     if room_id:
@@ -192,9 +223,9 @@ async def disconnect(sid):
         # Update raised hands
         await update_raised_hands(room_id)
        
-        logger.info(f"Disconnected: sid={sid}, room_id={room_id}, participants={count}")
+        logger.info("Disconnected: sid=%s, room_id=%s, participants=%s", sid, room_id, count)
     else:
-        logger.info(f"Disconnected: sid={sid}, session_id={session_id}, no room joined")
+        logger.info("Disconnected: sid=%s, session_id=%s, no room joined", sid, session_id)
 
 
 async def update_raised_hands(room_id):
@@ -208,13 +239,14 @@ async def update_raised_hands(room_id):
     await sio.emit("action:raised_hands_update", {"raisedHands": raised_list}, room=room_id)
 
 @sio.on("request:join_room")
+@instrument_event('socketio', 'request:join_room')
 async def join_room(sid, data):
     """Handle join_room request, validate roomId and user authorization."""
     session = await sio.get_session(sid)
     room_id = data.get("roomId")
     user_name = data.get("userName", session.get("userName", "Anonymous"))
     user_role = data.get("userRole", session.get("userRole", "student"))
-    logger.debug(f"Join room: sid={sid}, roomId={room_id}, userName={user_name}, userRole={user_role}")
+    logger.debug("Join room: sid=%s, roomId=%s, userName=%s, userRole=%s", sid, room_id, user_name, user_role)
 
     # Validate roomId as ClassSession primary key
     if not room_id or not await validate_class_session_pk(room_id):
@@ -222,7 +254,7 @@ async def join_room(sid, data):
         return {"name": "Error", "message": "Invalid ClassSession id"}
 
     # Check user authorization
-    user = await sync_to_async(User.objects.get)(id=session.get("user"))
+    user = await database_sync_to_async(User.objects.get)(id=session.get("user"))
     if not await is_user_authorized_for_session(user, room_id):
         logger.error(f"Join failed: User {user.email} not authorized for ClassSession id {room_id}, sid={sid}")
         return {"name": "Error", "message": "Not authorized for this session"}
@@ -263,16 +295,21 @@ async def join_room(sid, data):
     
     # Update raised hands for new joiner
     await update_raised_hands(room_id)
+
+    # Bring the new joiner's whiteboard up to date (snapshot + tail)
+    whiteboard_state = await load_state(redis_client, room_id)
+    await sio.emit("action:whiteboard_state", {"roomId": room_id, **whiteboard_state}, to=sid)
     
-    logger.info(f"Joined room: sid={sid}, room_id={room_id}, userName={user_name}, participants={count}")
+    logger.info("Joined room: sid=%s, room_id=%s, userName=%s, participants=%s", sid, room_id, user_name, count)
     return None
 
 @sio.on("request:leave_room")
+@instrument_event('socketio', 'request:leave_room')
 async def leave_room(sid, data):
     """Handle leave_room request."""
     session = await sio.get_session(sid)
     room_id = data.get("roomId")
-    logger.debug(f"Leave room: sid={sid}, roomId={room_id}")
+    logger.debug("Leave room: sid=%s, roomId=%s", sid, room_id)
 
     # Validate roomId
     if not room_id or not await validate_class_session_pk(room_id):
@@ -305,17 +342,18 @@ async def leave_room(sid, data):
         "userRole": session.get("userRole", "student"),
         "user": session.get("user")
     })
-    logger.info(f"Left room: sid={sid}, room_id={room_id}, participants={count}")
+    logger.info("Left room: sid=%s, room_id=%s, participants=%s", sid, room_id, count)
     return None
 
 @sio.on("request:send_message")
+@instrument_event('socketio', 'request:send_message')
 async def send_message(sid, data):
     """Handle send_message for chat or WebRTC signaling."""
     session = await sio.get_session(sid)
     room_id = data.get("roomId", session.get("roomId"))  # Fallback to session's roomId
     msg_data = data.get("data", {})
     to_user = data.get("to")
-    logger.debug(f"Send message: sid={sid}, roomId={room_id}, to={to_user}, data={msg_data}")
+    logger.debug("Send message: sid=%s, roomId=%s, to=%s, data=%s", sid, room_id, to_user, msg_data)
 
     if not room_id:
         logger.error(f"Send message failed: No roomId provided, sid={sid}")
@@ -333,7 +371,7 @@ async def send_message(sid, data):
             {"from": sid, "data": msg_data},
             to=to_user
         )
-        logger.info(f"Direct message sent: from={sid}, to={to_user}, room_id={room_id}")
+        logger.info("Direct message sent: from=%s, to=%s, room_id=%s", sid, to_user, room_id)
     else:
         # Broadcast chat message
         chat_data = msg_data.get("chat", {})
@@ -346,22 +384,24 @@ async def send_message(sid, data):
                 },
                 room=room_id
             )
-            logger.info(f"Chat message broadcast: from={sid}, room_id={room_id}")
+            logger.info("Chat message broadcast: from=%s, room_id=%s", sid, room_id)
     return None
 
 @sio.on("request:send_mesage")  # Handle frontend typo
+@instrument_event('socketio', 'request:send_mesage')
 async def send_message_typo(sid, data):
     """Handle send_mesage due to frontend typo."""
-    logger.warning(f"Received request:send_mesage (typo) from sid={sid}, redirecting to send_message")
+    logger.warning("Received request:send_mesage (typo) from sid=%s, redirecting to send_message", sid)
     return await send_message(sid, data)
 
 @sio.on("request:raise_hand")
+@instrument_event('socketio', 'request:raise_hand')
 async def raise_hand(sid, data):
     session = await sio.get_session(sid)
     room_id = data.get("roomId", session.get("roomId"))
     raised = data.get("raised", False)
     
-    logger.debug(f"Raise hand request: sid={sid}, userName={session.get('userName', 'Anonymous')}, sessionId={session.get('sessionId')}, room_id={room_id}, raised={raised}")
+    logger.debug("Raise hand request: sid=%s, userName=%s, sessionId=%s, room_id=%s, raised=%s", sid, session.get('userName', 'Anonymous'), session.get('sessionId'), room_id, raised)
 
     if session.get("userRole") != 'student':
         logger.error(f"Raise hand failed: Only students can raise hands, sid={sid}")
@@ -372,28 +412,31 @@ async def raise_hand(sid, data):
         return {"name": "Error", "message": "Invalid room id"}
     
     raised_key = f"class:{room_id}:raised_hands"
-    current_raised = await redis_client.smembers(raised_key)
-    logger.debug(f"Before raise update: raised_sids={current_raised}")
+    # The before/after snapshots cost two Redis round trips; only fetch them when traced
+    trace = logger.isEnabledFor(logging.DEBUG)
+    if trace:
+        logger.debug("Before raise update: raised_sids=%s", await redis_client.smembers(raised_key))
     
     if raised:
         await redis_client.sadd(raised_key, sid)
     else:
         await redis_client.srem(raised_key, sid)
     
-    current_raised_after = await redis_client.smembers(raised_key)
-    logger.debug(f"After raise update: raised_sids={current_raised_after}")
+    if trace:
+        logger.debug("After raise update: raised_sids=%s", await redis_client.smembers(raised_key))
     
     await update_raised_hands(room_id)
-    logger.info(f"Hand raised updated: sid={sid}, raised={raised}, room_id={room_id}")
+    logger.info("Hand raised updated: sid=%s, raised=%s, room_id=%s", sid, raised, room_id)
     return None
 
 @sio.on("request:unmute_user")
+@instrument_event('socketio', 'request:unmute_user')
 async def unmute_user(sid, data):
     session = await sio.get_session(sid)
     room_id = data.get("roomId")
     target_user_id = data.get("userId")
     
-    logger.debug(f"Unmute request: sid={sid}, session={session}, room_id={room_id}, target_user_id={target_user_id}")
+    logger.debug("Unmute request: sid=%s, session=%s, room_id=%s, target_user_id=%s", sid, session, room_id, target_user_id)
     
     if session.get("userRole") != "teacher":
         logger.error(f"Unmute failed: Only teachers can unmute, sid={sid}, userRole={session.get('userRole')}")
@@ -409,19 +452,20 @@ async def unmute_user(sid, data):
         logger.error(f"Unmute failed: Target user {target_user_id} not in room {room_id}, sid={sid}")
         return {"name": "Error", "message": "User not in room"}
     
-    logger.debug(f"Emitting action:unmute to target_user_id={target_user_id} in room_id={room_id}")
+    logger.debug("Emitting action:unmute to target_user_id=%s in room_id=%s", target_user_id, room_id)
     await sio.emit("action:unmute", {}, to=target_user_id)
     
     raised_key = f"class:{room_id}:raised_hands"
     if await redis_client.sismember(raised_key, target_user_id):
-        logger.debug(f"Removing target_user_id={target_user_id} from raised_hands")
+        logger.debug("Removing target_user_id=%s from raised_hands", target_user_id)
         await redis_client.srem(raised_key, target_user_id)
         await update_raised_hands(room_id)
     
-    logger.info(f"Unmuted user: target_user_id={target_user_id}, room_id={room_id}, by sid={sid}")
+    logger.info("Unmuted user: target_user_id=%s, room_id=%s, by sid=%s", target_user_id, room_id, sid)
     return None
 
 @sio.on("request:mute_user")
+@instrument_event('socketio', 'request:mute_user')
 async def mute_user(sid, data):
     session = await sio.get_session(sid)
     room_id = data.get("roomId", session.get("roomId"))
@@ -441,7 +485,105 @@ async def mute_user(sid, data):
     
     await sio.emit("action:mute", to=target_user_id)
     
-    logger.info(f"Muted user: target={target_user_id}, by={sid}, room_id={room_id}")
+    logger.info("Muted user: target=%s, by=%s, room_id=%s", target_user_id, sid, room_id)
+    return None
+
+async def flush_whiteboard_pending():
+    """Broadcasts the compacted whiteboard delta of every room with queued ops."""
+    if not whiteboard_pending:
+        return
+    pending = dict(whiteboard_pending)
+    whiteboard_pending.clear()
+    for room_id, delta in pending.items():
+        try:
+            await sio.emit(
+                "action:whiteboard_delta",
+                {
+                    "roomId": room_id,
+                    "fromSeq": delta["fromSeq"],
+                    "toSeq": delta["toSeq"],
+                    "ops": compact_ops(delta["ops"])
+                },
+                room=room_id
+            )
+        except Exception as e:
+            logger.error(f"Whiteboard delta broadcast failed: room_id={room_id}, error={e}")
+
+async def flush_whiteboard_deltas():
+    """Broadcasts compacted whiteboard deltas for every active room at a fixed tick rate."""
+    while True:
+        await sio.sleep(WHITEBOARD_TICK_SECONDS)
+        await flush_whiteboard_pending()
+
+async def drain_socketio():
+    """Flush queued whiteboard deltas, then close this worker's connections before exit.
+
+    Transports are closed at the Engine.IO level, so disconnect handlers clean up
+    Redis room state and clients treat it as a dropped connection and reconnect
+    to another worker.
+    """
+    global whiteboard_flush_task
+    if whiteboard_flush_task is not None:
+        whiteboard_flush_task.cancel()
+        whiteboard_flush_task = None
+    await flush_whiteboard_pending()
+
+    eio_sids = []
+    for namespace in list(sio.manager.rooms):
+        eio_sids.extend(eio_sid for _, eio_sid in sio.manager.get_participants(namespace, None))
+    for eio_sid in set(eio_sids):
+        try:
+            await sio.eio.disconnect(eio_sid)
+        except Exception as e:
+            logger.error(f"Drain disconnect failed: eio_sid={eio_sid}, error={e}")
+    logger.info("Socket.IO drained: connections=%s", len(set(eio_sids)))
+
+@sio.on("request:whiteboard_ops")
+@instrument_event('socketio', 'request:whiteboard_ops')
+async def whiteboard_ops(sid, data):
+    """Sequence a batch of whiteboard ops and queue them for the next delta broadcast."""
+    global whiteboard_flush_task
+    session = await sio.get_session(sid)
+    room_id = session.get("roomId")
+
+    if not room_id or str(data.get("roomId", room_id)) != str(room_id):
+        logger.error(f"Whiteboard ops failed: sid={sid} has not joined room {data.get('roomId')}")
+        return {"name": "Error", "message": "Join the room before drawing"}
+
+    ops, error = validate_ops(data.get("ops"))
+    if error:
+        logger.error(f"Whiteboard ops failed: {error}, sid={sid}, room_id={room_id}")
+        return {"name": "Error", "message": error}
+
+    last_seq = await append_ops(redis_client, room_id, ops)
+    first_seq = last_seq - len(ops) + 1
+
+    delta = whiteboard_pending.setdefault(room_id, {"fromSeq": first_seq, "toSeq": last_seq, "ops": []})
+    delta["toSeq"] = last_seq
+    delta["ops"].extend(ops)
+
+    if whiteboard_flush_task is None or whiteboard_flush_task.done():
+        whiteboard_flush_task = sio.start_background_task(flush_whiteboard_deltas)
+
+    # Fold the op log into the snapshot whenever this batch crosses a boundary
+    if (first_seq - 1) // WHITEBOARD_SNAPSHOT_EVERY != last_seq // WHITEBOARD_SNAPSHOT_EVERY:
+        sio.start_background_task(compact_snapshot, redis_client, room_id)
+
+    logger.debug("Whiteboard ops queued: sid=%s, room_id=%s, seq=%s-%s", sid, room_id, first_seq, last_seq)
+    return {"seq": last_seq}
+
+@sio.on("request:whiteboard_sync")
+@instrument_event('socketio', 'request:whiteboard_sync')
+async def whiteboard_sync(sid, data):
+    """Resend snapshot plus tail, e.g. after a client detects a sequence gap."""
+    session = await sio.get_session(sid)
+    room_id = session.get("roomId")
+    if not room_id:
+        logger.error(f"Whiteboard sync failed: sid={sid} has not joined a room")
+        return {"name": "Error", "message": "Join the room before syncing"}
+
+    whiteboard_state = await load_state(redis_client, room_id)
+    await sio.emit("action:whiteboard_state", {"roomId": room_id, **whiteboard_state}, to=sid)
     return None
 
 app = sio
\ No newline at end of file
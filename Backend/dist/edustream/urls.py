@@ -2,24 +2,29 @@
 URL configuration for edustream project.
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
+from edustream.schema import CachedSchemaGenerator
+from edu_platform.utility.image_variants import VARIANT_DIR, serve_variant
+
+api_info = openapi.Info(
+    title="EduStream API",
+    default_version='v1',
+    description="API documentation for EduStream VR Learning Platform",
+    terms_of_service="https://www.edustream.com/terms/",
+    contact=openapi.Contact(email="support@edustream.com"),
+    license=openapi.License(name="BSD License"),
+)
 
 schema_view = get_schema_view(
-    openapi.Info(
-        title="EduStream API",
-        default_version='v1',
-        description="API documentation for EduStream VR Learning Platform",
-        terms_of_service="https://www.edustream.com/terms/",
-        contact=openapi.Contact(email="support@edustream.com"),
-        license=openapi.License(name="BSD License"),
-    ),
+    api_info,
     public=True,
     permission_classes=[permissions.AllowAny],
+    generator_class=CachedSchemaGenerator,
 )
 
 urlpatterns = [
@@ -36,6 +41,9 @@ urlpatterns = [
     # API documentation
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+
+    # Resized uploads: content-addressed, so served with immutable caching even outside DEBUG
+    re_path(rf"^{settings.MEDIA_URL.lstrip('/')}{VARIANT_DIR}/(?P<path>.*)$", serve_variant, name='image-variant'),
 ]
 
 if settings.DEBUG:
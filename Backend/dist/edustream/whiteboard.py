@@ -0,0 +1,187 @@
+"""
+Shared whiteboard state for Socket.IO classrooms.
+
+Operations are sequenced per room in Redis by a Lua script, so the order in
+the op log always matches the sequence numbers even with several workers.
+The log is periodically folded into a snapshot; late joiners receive the
+snapshot plus the ops recorded after it instead of a full replay.
+
+Supported operations (all carry a client-generated stroke ``id`` except clear):
+    {"type": "stroke", "id": ..., "points": [...], ...}  start/replace a stroke
+    {"type": "append", "id": ..., "points": [...]}       extend a stroke
+    {"type": "delete", "id": ...}                        remove a stroke
+    {"type": "clear"}                                    wipe the board
+"""
+
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+WHITEBOARD_TICK_SECONDS = 0.05          # delta broadcast rate (20 Hz)
+WHITEBOARD_SNAPSHOT_EVERY = 200         # fold the op log after this many ops
+WHITEBOARD_MAX_BATCH = 200              # ops accepted per request
+WHITEBOARD_MAX_OP_BYTES = 16 * 1024     # serialized size limit per op
+WHITEBOARD_TTL_SECONDS = 24 * 3600      # idle boards expire after a day
+
+OP_TYPES = {'stroke', 'append', 'delete', 'clear'}
+
+# KEYS: seq, ops; ARGV: ttl, op1, op2, ... -> last sequence number
+_APPEND_SCRIPT = """
+local seq = 0
+for i = 2, #ARGV do
+    seq = redis.call('INCR', KEYS[1])
+    redis.call('RPUSH', KEYS[2], seq .. '|' .. ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return seq
+"""
+
+# KEYS: lock; ARGV: token -> releases the lock only if this worker still holds it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _keys(room_id):
+    prefix = f"whiteboard:{room_id}"
+    return {
+        'seq': f"{prefix}:seq",
+        'ops': f"{prefix}:ops",
+        'snapshot': f"{prefix}:snapshot",
+        'lock': f"{prefix}:compact_lock",
+    }
+
+
+def validate_ops(ops):
+    """Returns (ops, error) after checking batch size, op types and op size."""
+    if not isinstance(ops, list) or not ops:
+        return None, "ops must be a non-empty list"
+    if len(ops) > WHITEBOARD_MAX_BATCH:
+        return None, f"At most {WHITEBOARD_MAX_BATCH} ops per batch"
+    for op in ops:
+        if not isinstance(op, dict) or op.get('type') not in OP_TYPES:
+            return None, "Invalid whiteboard op"
+        if op['type'] != 'clear' and op.get('id') is None:
+            return None, "Whiteboard op requires an id"
+        if len(json.dumps(op, separators=(',', ':'))) > WHITEBOARD_MAX_OP_BYTES:
+            return None, "Whiteboard op too large"
+    return ops, None
+
+
+def compact_ops(ops):
+    """Coalesces a run of ops into the smallest equivalent list.
+
+    A clear drops everything before it, appends to a stroke started in the
+    same run are merged into that stroke, and strokes created and deleted in
+    the same run disappear entirely.
+    """
+    compacted = []
+    created = {}  # stroke id -> index of its 'stroke' op in compacted
+    for op in ops:
+        kind = op['type']
+        if kind == 'clear':
+            compacted = [op]
+            created = {}
+        elif kind == 'stroke':
+            if op['id'] in created:
+                compacted[created[op['id']]] = None
+            created[op['id']] = len(compacted)
+            compacted.append(dict(op, points=list(op.get('points', []))))
+        elif kind == 'append' and op['id'] in created:
+            compacted[created[op['id']]]['points'].extend(op.get('points', []))
+        elif kind == 'delete' and op['id'] in created:
+            compacted[created.pop(op['id'])] = None
+        else:
+            compacted.append(op)
+    return [op for op in compacted if op is not None]
+
+
+def apply_ops(strokes, ops):
+    """Applies ops to a {stroke_id: stroke} mapping in place."""
+    for op in ops:
+        kind = op['type']
+        if kind == 'clear':
+            strokes.clear()
+        elif kind == 'stroke':
+            strokes[str(op['id'])] = dict(op, points=list(op.get('points', [])))
+        elif kind == 'append':
+            stroke = strokes.get(str(op['id']))
+            if stroke is not None:
+                stroke['points'].extend(op.get('points', []))
+        elif kind == 'delete':
+            strokes.pop(str(op['id']), None)
+    return strokes
+
+
+def _parse_entry(entry):
+    seq, payload = entry.split('|', 1)
+    return int(seq), json.loads(payload)
+
+
+async def append_ops(redis_client, room_id, ops):
+    """Sequences ops into the room's log and returns the last sequence number."""
+    keys = _keys(room_id)
+    payloads = [json.dumps(op, separators=(',', ':')) for op in ops]
+    return await redis_client.eval(
+        _APPEND_SCRIPT, 2, keys['seq'], keys['ops'], WHITEBOARD_TTL_SECONDS, *payloads
+    )
+
+
+async def load_state(redis_client, room_id):
+    """Returns the snapshot and the ops recorded after it for a late joiner."""
+    keys = _keys(room_id)
+    # MULTI/EXEC: a compaction (new snapshot + LTRIM) must not land between the two reads,
+    # or the joiner would get the old snapshot and a tail missing the folded ops
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.get(keys['snapshot'])
+    pipe.lrange(keys['ops'], 0, -1)
+    raw_snapshot, entries = await pipe.execute()
+
+    snapshot = json.loads(raw_snapshot) if raw_snapshot else {'seq': 0, 'strokes': {}}
+    tail = []
+    for entry in entries:
+        seq, op = _parse_entry(entry)
+        if seq > snapshot['seq']:
+            tail.append({'seq': seq, 'op': op})
+    return {
+        'snapshot': {'seq': snapshot['seq'], 'strokes': list(snapshot['strokes'].values())},
+        'ops': tail,
+    }
+
+
+async def compact_snapshot(redis_client, room_id):
+    """Folds the op log into the snapshot; one worker at a time per room."""
+    keys = _keys(room_id)
+    token = uuid.uuid4().hex
+    if not await redis_client.set(keys['lock'], token, nx=True, ex=30):
+        return
+    try:
+        raw_snapshot = await redis_client.get(keys['snapshot'])
+        entries = await redis_client.lrange(keys['ops'], 0, -1)
+        if not entries:
+            return
+        snapshot = json.loads(raw_snapshot) if raw_snapshot else {'seq': 0, 'strokes': {}}
+        strokes = snapshot['strokes']
+        last_seq = snapshot['seq']
+        for entry in entries:
+            seq, op = _parse_entry(entry)
+            if seq > last_seq:
+                apply_ops(strokes, [op])
+                last_seq = seq
+
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.set(keys['snapshot'], json.dumps({'seq': last_seq, 'strokes': strokes}, separators=(',', ':')),
+                 ex=WHITEBOARD_TTL_SECONDS)
+        # Only drop what was folded; ops appended meanwhile stay at the tail
+        pipe.ltrim(keys['ops'], len(entries), -1)
+        await pipe.execute()
+        logger.debug(f"Whiteboard compacted: room_id={room_id}, seq={last_seq}, folded={len(entries)}")
+    finally:
+        # The lock may have expired and been taken by another worker meanwhile
+        await redis_client.eval(_RELEASE_SCRIPT, 1, keys['lock'], token)
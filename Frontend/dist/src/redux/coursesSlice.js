@@ -21,6 +21,7 @@ export const fetchCourses = createAsyncThunk(
       }
 
       const response = await api.get(apiList.course.courses, {
+        params: { paginate: "false" },
         headers: {
           accept: "application/json",
           Authorization: `Bearer ${token}`,
@@ -153,6 +154,7 @@ export const fetchMyCourses = createAsyncThunk(
       }
 
       const response = await api.get(apiList.course.mycourses, {
+        params: { paginate: "false" },
         headers: {
           accept: "application/json",
           Authorization: `Bearer ${token}`,
@@ -183,6 +185,7 @@ export const fetchSessions = createAsyncThunk(
       }
 
       const response = await api.get(apiList.classes.sessions, {
+        params: { paginate: "false" },
         headers: {
           accept: "application/json",
           Authorization: `Bearer ${token}`,
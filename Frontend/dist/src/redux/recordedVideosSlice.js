@@ -23,6 +23,7 @@ export const fetchRecordedVideos = createAsyncThunk(
         : apiList.classes.recordedVideos;
 
       const response = await api.get(url, {
+        params: { paginate: "false" },
         headers: {
           accept: "application/json",
           Authorization: `Bearer ${token}`,